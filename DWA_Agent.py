@@ -0,0 +1,84 @@
+# agent_dwa.py
+# Rollout-planner agent: instead of a hand-blended dodge direction it scores
+# sampled headings/speeds against predicted pedestrian positions every step
+# (see rollout.py). Works on any S*/M* world; controllerArgs "x y" set the
+# destination.
+from controller import Supervisor
+import math
+import sys
+
+from agent_core import PedestrianArray
+from rollout import RolloutPlanner
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, per_step, substeps
+
+class AgentDWA(Supervisor):
+    def __init__(self, destination, peds=None):
+        super().__init__()
+        self.dt = int(self.getBasicTimeStep())
+        self.n_sub = substeps(self.dt)   # more than 1 only above the reference step
+        self.node = self.getSelf()
+        self.t_field = self.node.getField("translation")
+        self.r_field = self.node.getField("rotation")
+        self.pos = self.t_field.getSFVec3f()
+        self.yaw = self.r_field.getSFRotation()[3]
+
+        self.destination = destination
+        self.speed = per_step(AGENT_SPEED, self.dt / self.n_sub)   # m per substep
+        self.goal_eps = 0.05
+
+        # Pedestrians: every DEF Ped1, Ped2, ... in the world unless given
+        if peds is None:
+            peds = {}
+            while self.getFromDef(f"Ped{len(peds) + 1}") is not None:
+                peds[f"Ped{len(peds) + 1}"] = "ped"
+        self.peds = PedestrianArray(self, peds)
+        # About a million rollout cells per plan: the nearest ~1100 pedestrians
+        self.planner = RolloutPlanner(self.speed, max_cells=2 ** 20)
+        self.trajectory = TrajectoryRecorder.for_controller("DWA_Agent", n_peds=len(self.peds))
+
+    def _record(self, dir_x, dir_y, mode):
+        if self.trajectory is not None:
+            self.trajectory.log(self.pos, self.yaw, self.peds.pos, dir_x, dir_y, mode)
+
+    def _substep(self, k):
+        # The rules once, k substeps of n_sub into the basic time step
+        dx = self.destination[0] - self.pos[0]
+        dy = self.destination[1] - self.pos[1]
+        if math.hypot(dx, dy) < self.goal_eps:
+            print("✅ Destination reached")
+            return 0.0, 0.0, "arrived"
+
+        # Pedestrian positions and velocities, then one batched rollout
+        self.peds.sense(self.pos, k, self.n_sub)
+        vel = self.peds.update_velocity()
+        dir_x, dir_y, best = self.planner.plan(self.pos[:2], self.destination, self.peds.pos, vel, self.yaw)
+        dir_x, dir_y = float(dir_x), float(dir_y)
+        mode = self.planner.mode(best)
+
+        # Move
+        self.pos[0] += dir_x * self.speed
+        self.pos[1] += dir_y * self.speed
+        self.t_field.setSFVec3f(self.pos)
+
+        # Rotate (only if moving)
+        if mode != "stop":
+            self.yaw = math.atan2(dir_y, dir_x)
+            self.r_field.setSFRotation([0, 0, 1, self.yaw])
+        return dir_x, dir_y, mode
+
+    def run(self):
+        while self.step(self.dt) != -1:
+            self.peds.read()
+            for k in range(1, self.n_sub + 1):
+                dir_x, dir_y, mode = self._substep(k)
+            self._record(dir_x, dir_y, mode)
+            if mode == "arrived":
+                break   # nothing moves the agent any more
+        if self.trajectory is not None:
+            self.trajectory.close()
+
+
+destination = [float(v) for v in sys.argv[1:3]] if len(sys.argv) > 2 else [-2.0, 0.0]
+controller = AgentDWA(destination=destination)
+controller.run()
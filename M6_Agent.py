@@ -1,11 +1,19 @@
 # agent_m6.py
 from controller import Supervisor
 import math
+import numpy as np
+
+import cruise
+from agent_core import PedestrianArray
+from cpa import CpaTrigger
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, per_step, substeps
 
 class AgentM6(Supervisor):
-    def __init__(self, destination):
+    def __init__(self, destination, peds=None):
         super().__init__()
         self.dt = int(self.getBasicTimeStep())
+        self.n_sub = substeps(self.dt)   # more than 1 only above the reference step
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.r_field = self.node.getField("rotation")
@@ -13,86 +21,116 @@ class AgentM6(Supervisor):
         self.yaw = 0.0
 
         self.destination = destination
-        self.speed = 0.02
+        self.speed = per_step(AGENT_SPEED, self.dt / self.n_sub)   # m per substep
         self.goal_eps = 0.05
         self.avoid_radius = 0.6
 
-        # Pedestrians
-        self.p1_t = self.getFromDef("Ped1").getField("translation")
-        self.p2_t = self.getFromDef("Ped2").getField("translation")
-        self.p3_t = self.getFromDef("Ped3").getField("translation")
-
-        # For velocity estimation
-        self.prev_p1 = None
-        self.prev_p2 = None
+        # Pedestrians: DEF -> "moving" (crossing flow) or "static" (obstacle)
+        if peds is None:
+            peds = {"Ped1": "moving", "Ped2": "moving", "Ped3": "static"}
+        self.peds = PedestrianArray(self, peds, radius=self.avoid_radius, static_role="static")
+        self.moving = self.peds.role("moving")
+        self.static = self.peds.role("static")
+        self.trajectory = TrajectoryRecorder.for_controller("M6_Agent", n_peds=len(self.peds))
+        self.trigger = CpaTrigger.for_controller("M6_Agent", self.avoid_radius, self.dt / self.n_sub / 1000.0)
+        # Sleep through steps in which nobody can come near (distance trigger only)
+        self.cruise = cruise.enabled() and self.trigger is None
 
     @staticmethod
     def _norm(x, y):
         n = math.hypot(x, y)
         return (x/n, y/n) if n > 1e-6 else (0, 0)
 
+    def _record(self, dir_x, dir_y, mode):
+        if self.trajectory is not None:
+            self.trajectory.log(self.pos, self.yaw, self.peds.pos, dir_x, dir_y, mode)
+
+    def _substep(self, k):
+        # The rules once, k substeps of n_sub into the basic time step
+        # Goal vector
+        dx, dy = self.destination[0]-self.pos[0], self.destination[1]-self.pos[1]
+        dist_goal = math.hypot(dx, dy)
+        if dist_goal < self.goal_eps:
+            print("✅ Reached goal")
+            return 0.0, 0.0, "arrived"
+        gx, gy = self._norm(dx, dy)
+
+        # Ped positions, distances and velocities in one pass
+        d = self.peds.sense(self.pos, k, self.n_sub)
+        vel = self.peds.update_velocity()
+        if self.trigger is None:
+            near = d < self.avoid_radius
+        else:
+            # Closest-approach threats (AVOID_TRIGGER=cpa)
+            near = self.trigger.near(self.pos, self.peds.pos, self.peds.tracker.vel)
+
+        dir_x, dir_y = gx, gy
+        mode = "goal"
+
+        # --- Avoidance priority ---
+        static = self.peds.nearest(self.static & near)
+        crowd = np.flatnonzero(self.moving & near)
+
+        if static >= 0:  # Static obstacle first
+            avoid = self.peds.side(static, self.pos[1])
+            mode = "dodge_static"
+            dir_x = 0.5*gx + 0.5*avoid[0]
+            dir_y = 0.5*gy + 0.5*avoid[1]
+
+        elif len(crowd) > 1:
+            # Combine every nearby crossing pedestrian (multi-lane flow)
+            w = 1.0/np.maximum(d[crowd], 1e-3)
+            sum_vx, sum_vy = (w[:, None]*vel[crowd]).sum(axis=0).tolist()
+            avoid_x, avoid_y = -sum_vy, sum_vx
+            mode = "dodge_flow"
+            ax, ay = self._norm(avoid_x, avoid_y)
+            dir_x = 0.5*gx + 0.5*ax
+            dir_y = 0.5*gy + 0.5*ay
+
+        elif len(crowd) == 1:
+            avoid = self.peds.side(crowd[0], self.pos[1])
+            mode = "dodge"
+            dir_x = 0.6*gx + 0.4*avoid[0]
+            dir_y = 0.6*gx + 0.4*avoid[1]
+
+        # Normalize
+        dir_x, dir_y = self._norm(dir_x, dir_y)
+
+        # Move
+        self.pos[0] += dir_x*self.speed
+        self.pos[1] += dir_y*self.speed
+        self.t_field.setSFVec3f(self.pos)
+
+        # Rotate
+        self.yaw = math.atan2(dir_y, dir_x)
+        self.r_field.setSFRotation([0,0,1,self.yaw])
+        return dir_x, dir_y, mode
+
+    def _coast(self):
+        # Basic time steps of cruise mode (cruise.py) that can follow this one
+        if not self.cruise:
+            return 0
+        return cruise.coast_steps(self.pos, self.destination, self.goal_eps, self.peds.clearance(self.pos),
+                                  self.peds.radius, self.speed * self.n_sub, self.dt)
+
     def run(self):
-        while self.step(self.dt) != -1:
-            # Goal vector
-            dx, dy = self.destination[0]-self.pos[0], self.destination[1]-self.pos[1]
-            dist_goal = math.hypot(dx, dy)
-            if dist_goal < self.goal_eps:
-                print("✅ Reached goal")
-                continue
-            gx, gy = self._norm(dx, dy)
-
-            # Ped positions
-            p1 = self.p1_t.getSFVec3f()
-            p2 = self.p2_t.getSFVec3f()
-            p3 = self.p3_t.getSFVec3f()
-            d1 = math.hypot(p1[0]-self.pos[0], p1[1]-self.pos[1])
-            d2 = math.hypot(p2[0]-self.pos[0], p2[1]-self.pos[1])
-            d3 = math.hypot(p3[0]-self.pos[0], p3[1]-self.pos[1])
-
-            dir_x, dir_y = gx, gy
-
-            # Velocities
-            v1x=v1y=v2x=v2y=0.0
-            if self.prev_p1: v1x, v1y = p1[0]-self.prev_p1[0], p1[1]-self.prev_p1[1]
-            if self.prev_p2: v2x, v2y = p2[0]-self.prev_p2[0], p2[1]-self.prev_p2[1]
-            self.prev_p1, self.prev_p2 = (p1[0], p1[1]), (p2[0], p2[1])
-
-            # --- Avoidance priority ---
-            if d3 < self.avoid_radius:  # Static obstacle first
-                avoid = (0, 1) if p3[1] < self.pos[1] else (0, -1)
-                dir_x = 0.5*gx + 0.5*avoid[0]
-                dir_y = 0.5*gy + 0.5*avoid[1]
-
-            elif d1 < self.avoid_radius and d2 < self.avoid_radius:
-                # Combine P1 and P2 (multi-lane flow)
-                w1, w2 = 1.0/max(d1,1e-3), 1.0/max(d2,1e-3)
-                sum_vx, sum_vy = w1*v1x+w2*v2x, w1*v1y+w2*v2y
-                avoid_x, avoid_y = -sum_vy, sum_vx
-                ax, ay = self._norm(avoid_x, avoid_y)
-                dir_x = 0.5*gx + 0.5*ax
-                dir_y = 0.5*gy + 0.5*ay
-
-            elif d1 < self.avoid_radius:
-                avoid = (0, 1) if p1[1] < self.pos[1] else (0, -1)
-                dir_x = 0.6*gx + 0.4*avoid[0]
-                dir_y = 0.6*gx + 0.4*avoid[1]
-
-            elif d2 < self.avoid_radius:
-                avoid = (0, 1) if p2[1] < self.pos[1] else (0, -1)
-                dir_x = 0.6*gx + 0.4*avoid[0]
-                dir_y = 0.6*gx + 0.4*avoid[1]
-
-            # Normalize
-            dir_x, dir_y = self._norm(dir_x, dir_y)
-
-            # Move
-            self.pos[0] += dir_x*self.speed
-            self.pos[1] += dir_y*self.speed
-            self.t_field.setSFVec3f(self.pos)
-
-            # Rotate
-            self.yaw = math.atan2(dir_y, dir_x)
-            self.r_field.setSFRotation([0,0,1,self.yaw])
+        coast = 0
+        while self.step(self.dt * (1 + coast)) != -1:
+            self.peds.read()
+            if coast:
+                # Woken from cruise mode: catch up on the goal moves slept through
+                self.yaw = cruise.replay(self.pos, self.destination, self.speed, coast * self.n_sub,
+                                         self.t_field, self.r_field)
+                self.peds.skip(coast)
+                cruise.skip(coast, self.trajectory)
+            for k in range(1, self.n_sub + 1):
+                dir_x, dir_y, mode = self._substep(k)
+            self._record(dir_x, dir_y, mode)
+            if mode == "arrived":
+                break   # nothing moves the agent any more
+            coast = self._coast()
+        if self.trajectory is not None:
+            self.trajectory.close()
 
 # Run
 controller = AgentM6(destination=[-2.0, 0.0])
@@ -1,10 +1,18 @@
 from controller import Supervisor
 import math
+import numpy as np
+
+import cruise
+from agent_core import PedestrianArray
+from cpa import CpaTrigger
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, per_step, substeps
 
 class AgentM5M6(Supervisor):
-    def __init__(self, destination, dodge_angle_deg=-30):
+    def __init__(self, destination, dodge_angle_deg=-30, peds=None):
         super().__init__()
         self.dt = int(self.getBasicTimeStep())
+        self.n_sub = substeps(self.dt)   # more than 1 only above the reference step
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.r_field = self.node.getField("rotation")
@@ -12,18 +20,20 @@ class AgentM5M6(Supervisor):
         self.yaw = 0.0
 
         self.destination = destination
-        self.speed = 0.02
+        self.speed = per_step(AGENT_SPEED, self.dt / self.n_sub)   # m per substep
         self.goal_eps = 0.05
         self.avoid_radius = 0.5
 
-        # Pedestrians
-        self.p1_t = self.getFromDef("Ped1").getField("translation")
-        self.p2_t = self.getFromDef("Ped2").getField("translation")
-        self.p3_t = self.getFromDef("Ped3").getField("translation")  # static
-
-        # Previous positions for velocity estimation
-        self.prev_p1 = None
-        self.prev_p2 = None
+        # Pedestrians: DEF -> "moving" (crossing flow) or "static" (obstacle)
+        if peds is None:
+            peds = {"Ped1": "moving", "Ped2": "moving", "Ped3": "static"}
+        self.peds = PedestrianArray(self, peds, radius=self.avoid_radius, static_role="static")
+        self.moving = self.peds.role("moving")
+        self.static = self.peds.role("static")
+        self.trajectory = TrajectoryRecorder.for_controller("M6_Agent_M5upgrade", n_peds=len(self.peds))
+        self.trigger = CpaTrigger.for_controller("M6_Agent_M5upgrade", self.avoid_radius, self.dt / self.n_sub / 1000.0)
+        # Sleep through steps in which nobody can come near (distance trigger only)
+        self.cruise = cruise.enabled() and self.trigger is None
 
         # Rotation bias angle (deg → rad)
         theta = math.radians(dodge_angle_deg)
@@ -41,91 +51,112 @@ class AgentM5M6(Supervisor):
         ry = x * self.sin_t + y * self.cos_t
         return rx, ry
 
-    def run(self):
-        while self.step(self.dt) != -1:
-            # Goal vector
-            dx = self.destination[0] - self.pos[0]
-            dy = self.destination[1] - self.pos[1]
-            dist_goal = math.hypot(dx, dy)
-            if dist_goal < self.goal_eps:
-                print("✅ Destination reached")
-                continue
-            gx, gy = self._norm(dx, dy)
-
-            # Ped positions
-            p1 = self.p1_t.getSFVec3f()
-            p2 = self.p2_t.getSFVec3f()
-            p3 = self.p3_t.getSFVec3f()
-            d1 = math.hypot(p1[0] - self.pos[0], p1[1] - self.pos[1])
-            d2 = math.hypot(p2[0] - self.pos[0], p2[1] - self.pos[1])
-            d3 = math.hypot(p3[0] - self.pos[0], p3[1] - self.pos[1])
-
-            dir_x, dir_y = gx, gy  # default = goal
-
-            # === Velocity estimation ===
-            v1x = v1y = v2x = v2y = 0.0
-            if self.prev_p1 is not None:
-                v1x, v1y = p1[0] - self.prev_p1[0], p1[1] - self.prev_p1[1]
-            if self.prev_p2 is not None:
-                v2x, v2y = p2[0] - self.prev_p2[0], p2[1] - self.prev_p2[1]
-            self.prev_p1 = (p1[0], p1[1])
-            self.prev_p2 = (p2[0], p2[1])
-
-            # === Avoidance logic ===
-            if d3 < self.avoid_radius:
-                # Static Ped3 gets highest priority
-                avoid = (0, 1) if p3[1] < self.pos[1] else (0, -1)
+    def _record(self, dir_x, dir_y, mode):
+        if self.trajectory is not None:
+            self.trajectory.log(self.pos, self.yaw, self.peds.pos, dir_x, dir_y, mode)
+
+    def _substep(self, k):
+        # The rules once, k substeps of n_sub into the basic time step
+        # Goal vector
+        dx = self.destination[0] - self.pos[0]
+        dy = self.destination[1] - self.pos[1]
+        dist_goal = math.hypot(dx, dy)
+        if dist_goal < self.goal_eps:
+            print("✅ Destination reached")
+            return 0.0, 0.0, "arrived"
+        gx, gy = self._norm(dx, dy)
+
+        # Ped positions, distances and velocities in one pass
+        d = self.peds.sense(self.pos, k, self.n_sub)
+        vel = self.peds.update_velocity()
+        if self.trigger is None:
+            near = d < self.avoid_radius
+        else:
+            # Closest-approach threats (AVOID_TRIGGER=cpa)
+            near = self.trigger.near(self.pos, self.peds.pos, self.peds.tracker.vel)
+
+        dir_x, dir_y = gx, gy  # default = goal
+        mode = "goal"
+
+        static = self.peds.nearest(self.static & near)
+        crowd = np.flatnonzero(self.moving & near)
+
+        # === Avoidance logic ===
+        if static >= 0:
+            # Static pedestrians get highest priority
+            avoid = self.peds.side(static, self.pos[1])
+            mode = "dodge_static"
+            dir_x = 0.5*gx + 0.5*avoid[0]
+            dir_y = 0.5*gy + 0.5*avoid[1]
+
+        elif len(crowd) > 1:
+            # Several moving pedestrians near: compare the two closest
+            a, b = crowd[np.argsort(d[crowd], kind="stable")[:2]]
+            va = self._norm(*vel[a].tolist())
+            vb = self._norm(*vel[b].tolist())
+            dot = va[0]*vb[0] + va[1]*vb[1]  # similarity of velocity
+
+            if dot < -0.5:
+                # Opposite direction → pick the nearer one
+                avoid = self.peds.side(a, self.pos[1])
+                mode = "dodge"
                 dir_x = 0.5*gx + 0.5*avoid[0]
                 dir_y = 0.5*gy + 0.5*avoid[1]
+            else:
+                # Normal M5 velocity-sum method
+                w = 1.0 / np.maximum(d[crowd], 1e-3)
+                sum_vx, sum_vy = (w[:, None]*vel[crowd]).sum(axis=0).tolist()
+                avoid_x, avoid_y = -sum_vy, sum_vx
+                mode = "dodge_flow"
+                ax, ay = self._norm(avoid_x, avoid_y)
+                ax, ay = self._rotate_bias(ax, ay)  # apply bias
+                dir_x = 0.5*gx + 0.5*ax
+                dir_y = 0.5*gy + 0.5*ay
+
+        elif len(crowd) == 1:
+            avoid = self.peds.side(crowd[0], self.pos[1])
+            mode = "dodge"
+            dir_x = 0.6*gx + 0.4*avoid[0]
+            dir_y = 0.6*gy + 0.4*avoid[1]
+
+        # Normalize
+        dir_x, dir_y = self._norm(dir_x, dir_y)
+
+        # Move
+        self.pos[0] += dir_x * self.speed
+        self.pos[1] += dir_y * self.speed
+        self.t_field.setSFVec3f(self.pos)
+
+        # Rotate
+        self.yaw = math.atan2(dir_y, dir_x)
+        self.r_field.setSFRotation([0, 0, 1, self.yaw])
+        return dir_x, dir_y, mode
+
+    def _coast(self):
+        # Basic time steps of cruise mode (cruise.py) that can follow this one
+        if not self.cruise:
+            return 0
+        return cruise.coast_steps(self.pos, self.destination, self.goal_eps, self.peds.clearance(self.pos),
+                                  self.peds.radius, self.speed * self.n_sub, self.dt)
 
-            elif d1 < self.avoid_radius and d2 < self.avoid_radius:
-                # Both P1 and P2 near
-                v1n = self._norm(v1x, v1y)
-                v2n = self._norm(v2x, v2y)
-                dot = v1n[0]*v2n[0] + v1n[1]*v2n[1]  # similarity of velocity
-
-                if dot < -0.5:
-                    # Opposite direction → pick one
-                    if d1 < d2:
-                        target = p1
-                    else:
-                        target = p2
-                    avoid = (0, 1) if target[1] < self.pos[1] else (0, -1)
-                    dir_x = 0.5*gx + 0.5*avoid[0]
-                    dir_y = 0.5*gy + 0.5*avoid[1]
-                else:
-                    # Normal M5 velocity-sum method
-                    w1 = 1.0 / max(d1, 1e-3)
-                    w2 = 1.0 / max(d2, 1e-3)
-                    sum_vx = w1*v1x + w2*v2x
-                    sum_vy = w1*v1y + w2*v2y
-                    avoid_x, avoid_y = -sum_vy, sum_vx
-                    ax, ay = self._norm(avoid_x, avoid_y)
-                    ax, ay = self._rotate_bias(ax, ay)  # apply bias
-                    dir_x = 0.5*gx + 0.5*ax
-                    dir_y = 0.5*gy + 0.5*ay
-
-            elif d1 < self.avoid_radius:
-                avoid = (0, 1) if p1[1] < self.pos[1] else (0, -1)
-                dir_x = 0.6*gx + 0.4*avoid[0]
-                dir_y = 0.6*gy + 0.4*avoid[1]
-
-            elif d2 < self.avoid_radius:
-                avoid = (0, 1) if p2[1] < self.pos[1] else (0, -1)
-                dir_x = 0.6*gx + 0.4*avoid[0]
-                dir_y = 0.6*gy + 0.4*avoid[1]
-
-            # Normalize
-            dir_x, dir_y = self._norm(dir_x, dir_y)
-
-            # Move
-            self.pos[0] += dir_x * self.speed
-            self.pos[1] += dir_y * self.speed
-            self.t_field.setSFVec3f(self.pos)
-
-            # Rotate
-            self.yaw = math.atan2(dir_y, dir_x)
-            self.r_field.setSFRotation([0, 0, 1, self.yaw])
+    def run(self):
+        coast = 0
+        while self.step(self.dt * (1 + coast)) != -1:
+            self.peds.read()
+            if coast:
+                # Woken from cruise mode: catch up on the goal moves slept through
+                self.yaw = cruise.replay(self.pos, self.destination, self.speed, coast * self.n_sub,
+                                         self.t_field, self.r_field)
+                self.peds.skip(coast)
+                cruise.skip(coast, self.trajectory)
+            for k in range(1, self.n_sub + 1):
+                dir_x, dir_y, mode = self._substep(k)
+            self._record(dir_x, dir_y, mode)
+            if mode == "arrived":
+                break   # nothing moves the agent any more
+            coast = self._coast()
+        if self.trajectory is not None:
+            self.trajectory.close()
 
 
 # Example run
@@ -1,6 +1,9 @@
 # ped1_cross.py
 from controller import Supervisor
 
+from pedmotion import interpolate, bounce_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
+
 class Ped1Cross(Supervisor):
     def __init__(self):
         super().__init__()
@@ -8,17 +11,19 @@ class Ped1Cross(Supervisor):
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.pos = self.t_field.getSFVec3f()
-        self.speed = 0.03
+        self.start = self.pos[1]
+        self.t = 0
+        self.speed = 1.5    # m/s
+        self.ref_speed = per_step(self.speed, REFERENCE_STEP_MS)
         self.min_x, self.max_x = -2.0, 2.0
         self.direction = 1
 
     def run(self):
         while self.step(self.dt) != -1:
-            self.pos[1] += self.speed * self.direction
-            if self.pos[1] > self.max_x:
-                self.pos[1] = self.max_x; self.direction = -1
-            elif self.pos[1] < self.min_x:
-                self.pos[1] = self.min_x; self.direction = 1
+            # Bounces between min_x and max_x on Y
+            self.t += 1
+            self.pos[1] = float(interpolate(bounce_at, reference_steps(self.t, self.dt),
+                                            self.start, self.ref_speed, self.min_x, self.max_x, self.direction))
             self.t_field.setSFVec3f(self.pos)
 
 controller = Ped1Cross()
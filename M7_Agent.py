@@ -1,10 +1,17 @@
 from controller import Supervisor
 import math
 
+import cruise
+from agent_core import PedestrianArray
+from cpa import CpaTrigger
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, per_step, substeps
+
 class AgentM7(Supervisor):
-    def __init__(self, destination):
+    def __init__(self, destination, peds=None):
         super().__init__()
         self.dt = int(self.getBasicTimeStep())
+        self.n_sub = substeps(self.dt)   # more than 1 only above the reference step
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.r_field = self.node.getField("rotation")
@@ -12,109 +19,166 @@ class AgentM7(Supervisor):
         self.yaw = 0.0
 
         self.destination = destination
-        self.speed = 0.02
+        self.speed = per_step(AGENT_SPEED, self.dt / self.n_sub)   # m per substep
         self.goal_eps = 0.05
 
-        # Pedestrians
-        self.p1_t = self.getFromDef("Ped1").getField("translation")  # head-on
-        self.p2_t = self.getFromDef("Ped2").getField("translation")  # crossing path
-        self.p3_t = self.getFromDef("Ped3").getField("translation")  # overtaking
-
+        # Pedestrians: DEF -> "headon", "crossing" or "overtaking"
+        if peds is None:
+            peds = {"Ped1": "headon", "Ped2": "crossing", "Ped3": "overtaking"}
         # Parameters
         self.avoid_radius = 0.35
         self.cross_radius = 0.6
 
-        # Ped2 state
-        self.focus_ped2 = False
-        self.ped2_start_y = None
-        self.flee_from_ped2 = False
-        self.dodge_dir_ped2 = (0, 0)
+        self.peds = PedestrianArray(self, peds, radius=max(self.avoid_radius, self.cross_radius))
+        self.headon = self.peds.role("headon")
+        self.crossing = self.peds.role("crossing")
+        self.overtaking = self.peds.role("overtaking")
+        self.trajectory = TrajectoryRecorder.for_controller("M7_Agent", n_peds=len(self.peds))
+        self.trigger = CpaTrigger.for_controller("M7_Agent", self.avoid_radius, self.dt / self.n_sub / 1000.0)
+        # Sleep through steps in which nobody can come near (distance trigger only)
+        self.cruise = cruise.enabled() and self.trigger is None
+
+        # Crossing pedestrian state
+        self.cross_ped = -1
+        self.focus_ped = False
+        self.cross_start_y = None
+        self.flee_from_ped = False
+        self.dodge_dir_cross = (0, 0)
 
     @staticmethod
     def _norm(x, y):
         n = math.hypot(x, y)
         return (x/n, y/n) if n > 1e-6 else (0, 0)
 
-    def run(self):
-        while self.step(self.dt) != -1:
-            # Destination vector
-            dx = self.destination[0] - self.pos[0]
-            dy = self.destination[1] - self.pos[1]
-            dist_goal = math.hypot(dx, dy)
-
-            if dist_goal < self.goal_eps:
-                print("✅ Destination reached")
-                continue
-
-            gx, gy = self._norm(dx, dy)
-            dir_x, dir_y = gx, gy  # default
-
-            # Pedestrian positions
-            p1 = self.p1_t.getSFVec3f()
-            p2 = self.p2_t.getSFVec3f()
-            p3 = self.p3_t.getSFVec3f()
-
-            d1 = math.hypot(p1[0] - self.pos[0], p1[1] - self.pos[1])
-            d2 = math.hypot(p2[0] - self.pos[0], p2[1] - self.pos[1])
-            d3 = math.hypot(p3[0] - self.pos[0], p3[1] - self.pos[1])
-
-            # === PRIORITY 1: Ped2 crossing ===
-            if d2 < self.cross_radius or self.focus_ped2 or self.flee_from_ped2:
-                if not self.focus_ped2 and not self.flee_from_ped2:
-                    self.focus_ped2 = True
-                    self.ped2_start_y = self.pos[1]
-                    self.dodge_dir_ped2 = (0, 1) if p2[1] < self.pos[1] else (0, -1)
-                    print("⚠️ Focus mode: Ped2 crossing")
-
-                if self.focus_ped2:
-                    # Full dodge
-                    dir_x, dir_y = self.dodge_dir_ped2
-                    # Switch to flee mode after 0.07m lateral shift
-                    if self.ped2_start_y is not None and abs(self.pos[1] - self.ped2_start_y) >= 0.07:
-                        self.focus_ped2 = False
-                        self.flee_from_ped2 = True
-                        print("🏃 Switching to flee mode from Ped2")
-
-                elif self.flee_from_ped2:
-                    # Flee opposite to Ped2 direction, but only if Ped1 and Ped3 are not threats
-                    if d1 >= self.avoid_radius and d3 >= self.avoid_radius:
-                        # Opposite of Ped2's position relative to Agent
-                        relx, rely = self.pos[0] - p2[0], self.pos[1] - p2[1]
-                        dir_x, dir_y = self._norm(relx, rely)
-                        print("↩️ Fleeing away from Ped2")
-                        # Exit flee once sufficiently separated
-                        if d2 > self.cross_radius:
-                            self.flee_from_ped2 = False
-                            print("✅ Ped2 cleared, resuming goal")
-                    else:
-                        # If Ped1 or Ped3 present, handle them normally
-                        self.flee_from_ped2 = False
-
-            # === PRIORITY 2: Ped3 overtaking ===
-            elif d3 < self.avoid_radius and p3[0] < self.pos[0]:
-                avoid = (0, 1) if p3[1] < self.pos[1] else (0, -1)
+    def _record(self, dir_x, dir_y, mode):
+        if self.trajectory is not None:
+            self.trajectory.log(self.pos, self.yaw, self.peds.pos, dir_x, dir_y, mode)
+
+    def _substep(self, k):
+        # The rules once, k substeps of n_sub into the basic time step
+        # Destination vector
+        dx = self.destination[0] - self.pos[0]
+        dy = self.destination[1] - self.pos[1]
+        dist_goal = math.hypot(dx, dy)
+
+        if dist_goal < self.goal_eps:
+            print("✅ Destination reached")
+            return 0.0, 0.0, "arrived"
+
+        gx, gy = self._norm(dx, dy)
+        dir_x, dir_y = gx, gy  # default
+        mode = "goal"
+
+        # Pedestrian positions and distances in one pass
+        d = self.peds.sense(self.pos, k, self.n_sub)
+        p = self.peds.pos
+        if self.trigger is None:
+            near = d < self.avoid_radius
+        else:
+            # Closest-approach threats (AVOID_TRIGGER=cpa)
+            near = self.trigger.near(self.pos, self.peds.pos)
+
+        if not self.focus_ped and not self.flee_from_ped:
+            self.cross_ped = self.peds.nearest(self.crossing & (d < self.cross_radius))
+
+        # === PRIORITY 1: crossing pedestrian ===
+        if self.cross_ped >= 0:
+            c = self.cross_ped
+            name = self.peds.defs[c]
+            if not self.focus_ped and not self.flee_from_ped:
+                self.focus_ped = True
+                self.cross_start_y = self.pos[1]
+                self.dodge_dir_cross = self.peds.side(c, self.pos[1])
+                print(f"⚠️ Focus mode: {name} crossing")
+
+            if self.focus_ped:
+                # Full dodge
+                dir_x, dir_y = self.dodge_dir_cross
+                mode = "focus"
+                # Switch to flee mode after 0.07m lateral shift
+                if self.cross_start_y is not None and abs(self.pos[1] - self.cross_start_y) >= 0.07:
+                    self.focus_ped = False
+                    self.flee_from_ped = True
+                    print(f"🏃 Switching to flee mode from {name}")
+
+            elif self.flee_from_ped:
+                # Flee opposite to the crossing pedestrian, but only if nobody else is a threat
+                others = near.copy()
+                others[c] = False
+                if not others.any():
+                    # Opposite of its position relative to Agent
+                    relx, rely = self.pos[0] - p[c, 0], self.pos[1] - p[c, 1]
+                    dir_x, dir_y = self._norm(relx, rely)
+                    mode = "flee"
+                    print(f"↩️ Fleeing away from {name}")
+                    # Exit flee once sufficiently separated
+                    if d[c] > self.cross_radius:
+                        self.flee_from_ped = False
+                        self.cross_ped = -1
+                        print(f"✅ {name} cleared, resuming goal")
+                else:
+                    # If another pedestrian is close, handle it normally
+                    self.flee_from_ped = False
+                    self.cross_ped = -1
+
+        else:
+            ahead = self.peds.nearest(self.overtaking & near & (p[:, 0] < self.pos[0]))
+            front = self.peds.nearest(self.headon & near)
+
+            # === PRIORITY 2: overtaking ===
+            if ahead >= 0:
+                avoid = self.peds.side(ahead, self.pos[1])
                 dir_x = 0.4*gx + 0.6*avoid[0]
                 dir_y = 0.4*gy + 0.6*avoid[1]
-                print("↔️ Overtaking Ped3")
+                mode = "overtake"
+                print(f"↔️ Overtaking {self.peds.defs[ahead]}")
 
-            # === PRIORITY 3: Ped1 head-on ===
-            elif d1 < self.avoid_radius:
-                avoid = (0, 1) if p1[1] < self.pos[1] else (0, -1)
+            # === PRIORITY 3: head-on ===
+            elif front >= 0:
+                avoid = self.peds.side(front, self.pos[1])
                 dir_x = 0.5*gx + 0.5*avoid[0]
                 dir_y = 0.5*gy + 0.5*avoid[1]
-                print("⬅️ Avoiding Ped1")
+                mode = "dodge"
+                print(f"⬅️ Avoiding {self.peds.defs[front]}")
 
-            # Normalize
-            dir_x, dir_y = self._norm(dir_x, dir_y)
+        # Normalize
+        dir_x, dir_y = self._norm(dir_x, dir_y)
 
-            # Move
-            self.pos[0] += dir_x * self.speed
-            self.pos[1] += dir_y * self.speed
-            self.t_field.setSFVec3f(self.pos)
+        # Move
+        self.pos[0] += dir_x * self.speed
+        self.pos[1] += dir_y * self.speed
+        self.t_field.setSFVec3f(self.pos)
 
-            # Rotate
-            self.yaw = math.atan2(dir_y, dir_x)
-            self.r_field.setSFRotation([0, 0, 1, self.yaw])
+        # Rotate
+        self.yaw = math.atan2(dir_y, dir_x)
+        self.r_field.setSFRotation([0, 0, 1, self.yaw])
+        return dir_x, dir_y, mode
+
+    def _coast(self):
+        # Basic time steps of cruise mode (cruise.py) that can follow this one
+        if not self.cruise or self.focus_ped or self.flee_from_ped:
+            return 0
+        return cruise.coast_steps(self.pos, self.destination, self.goal_eps, self.peds.clearance(self.pos),
+                                  self.peds.radius, self.speed * self.n_sub, self.dt)
+
+    def run(self):
+        coast = 0
+        while self.step(self.dt * (1 + coast)) != -1:
+            self.peds.read()
+            if coast:
+                # Woken from cruise mode: catch up on the goal moves slept through
+                self.yaw = cruise.replay(self.pos, self.destination, self.speed, coast * self.n_sub,
+                                         self.t_field, self.r_field)
+                self.peds.skip(coast)
+                cruise.skip(coast, self.trajectory)
+            for k in range(1, self.n_sub + 1):
+                dir_x, dir_y, mode = self._substep(k)
+            self._record(dir_x, dir_y, mode)
+            if mode == "arrived":
+                break   # nothing moves the agent any more
+            coast = self._coast()
+        if self.trajectory is not None:
+            self.trajectory.close()
 
 
 # Example run
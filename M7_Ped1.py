@@ -1,6 +1,9 @@
 # ped1_headon_supervisor.py
 from controller import Supervisor
 
+from pedmotion import interpolate, wrap_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
+
 class Ped1HeadOn(Supervisor):
     def __init__(self):
         super().__init__()
@@ -8,18 +11,20 @@ class Ped1HeadOn(Supervisor):
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.pos = self.t_field.getSFVec3f()
+        self.start = self.pos[0]
+        self.t = 0
 
-        self.speed = 0.015  # move steadily toward Agent
+        self.speed = 0.75   # m/s, move steadily toward Agent
+        self.ref_speed = per_step(self.speed, REFERENCE_STEP_MS)
         self.min_x = -4.0   # start far left
         self.max_x =  2.0   # stop near Agent
 
     def run(self):
         while self.step(self.dt) != -1:
-            # Move rightward (toward Agent, assumed at ~0,0)
-            self.pos[0] += self.speed
-
-            if self.pos[0] > self.max_x:
-                self.pos[0] = self.min_x  # reset loop
+            # Move rightward (toward Agent, assumed at ~0,0), reset loop past max_x
+            self.t += 1
+            self.pos[0] = float(interpolate(wrap_at, reference_steps(self.t, self.dt),
+                                            self.start, self.ref_speed, self.min_x, self.max_x, 1))
 
             self.t_field.setSFVec3f(self.pos)
 
@@ -1,6 +1,9 @@
 # ped2_crossing_supervisor.py
 from controller import Supervisor
 
+from pedmotion import interpolate, bounce_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
+
 class Ped2Cross(Supervisor):
     def __init__(self):
         super().__init__()
@@ -8,22 +11,21 @@ class Ped2Cross(Supervisor):
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.pos = self.t_field.getSFVec3f()
+        self.start = self.pos[1]
+        self.t = 0
 
-        self.speed = 0.025    # faster lateral crossing
+        self.speed = 1.25     # m/s, faster lateral crossing
+        self.ref_speed = per_step(self.speed, REFERENCE_STEP_MS)
         self.min_y = -1.5
         self.max_y =  1.5
         self.direction = 1    # start moving upward (+Y)
 
     def run(self):
         while self.step(self.dt) != -1:
-            self.pos[1] += self.speed * self.direction
-
-            if self.pos[1] > self.max_y:
-                self.pos[1] = self.max_y
-                self.direction = -1
-            elif self.pos[1] < self.min_y:
-                self.pos[1] = self.min_y
-                self.direction = 1
+            # Bounces between min_y and max_y
+            self.t += 1
+            self.pos[1] = float(interpolate(bounce_at, reference_steps(self.t, self.dt),
+                                            self.start, self.ref_speed, self.min_y, self.max_y, self.direction))
 
             self.t_field.setSFVec3f(self.pos)
 
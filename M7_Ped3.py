@@ -1,6 +1,9 @@
 # ped3_overtake_supervisor.py
 from controller import Supervisor
 
+from pedmotion import interpolate, wrap_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
+
 class Ped3Overtake(Supervisor):
     def __init__(self):
         super().__init__()
@@ -8,18 +11,20 @@ class Ped3Overtake(Supervisor):
         self.node = self.getSelf()
         self.t_field = self.node.getField("translation")
         self.pos = self.t_field.getSFVec3f()
+        self.start = self.pos[0]
+        self.t = 0
 
-        self.speed = 0.01   # slower than Agent (0.02)
+        self.speed = 0.5    # m/s, slower than Agent (1.0)
+        self.ref_speed = per_step(self.speed, REFERENCE_STEP_MS)
         self.min_x = -4.0
         self.max_x =  0.0   # stays in front, doesn’t loop too far
 
     def run(self):
         while self.step(self.dt) != -1:
-            # Move leftward slowly
-            self.pos[0] -= self.speed
-
-            if self.pos[0] < self.min_x:
-                self.pos[0] = self.max_x  # reset in front
+            # Move leftward slowly, reset in front past min_x
+            self.t += 1
+            self.pos[0] = float(interpolate(wrap_at, reference_steps(self.t, self.dt),
+                                            self.start, self.ref_speed, self.min_x, self.max_x, -1))
 
             self.t_field.setSFVec3f(self.pos)
 
@@ -1,6 +1,14 @@
 from controller import Supervisor
 import math
 
+import cruise
+from camera_access import CameraSampler
+from cpa import CpaTrigger
+from detection_log import DetectionRecorder
+from static_field import StaticField
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, between, per_step, substeps
+
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 
@@ -15,78 +23,111 @@ ped_translation_field = ped_node.getField("translation")
 
 # === Camera with recognition ===
 camera = robot.getDevice("CAM")
-camera.enable(timestep)
-camera.recognitionEnable(timestep)   # enable object recognition
+camera_period = timestep   # ms between camera samples
+cam = CameraSampler(camera, timestep, period=camera_period)
+detections = DetectionRecorder.for_controller("S1")
+trajectory = TrajectoryRecorder.for_controller("S1", n_peds=1)
 
 # === Destination (XY plane only) ===
 destination = [-2.0, 0.0]   # (x, y)
 
 # Motion parameters
-speed = 0.02
+n_sub = substeps(timestep)   # substeps per step, more than 1 only above the reference step
+speed = per_step(AGENT_SPEED, timestep / n_sub)   # m per substep
 arrive_eps = 0.05
 avoid_radius = 0.25
-
-while robot.step(timestep) != -1:
+trigger = CpaTrigger.for_controller("S1", avoid_radius, timestep / n_sub / 1000.0)
+# Ped1 stands still: its distance comes from a precomputed field until it moves
+field = StaticField([ped_translation_field.getSFVec3f()[:2]], avoid_radius)
+
+# Cruise mode (cruise.py): basic time steps to sleep through before the next one
+cruising = cruise.enabled() and trigger is None
+coast = 0
+last_ped = None
+while robot.step(timestep * (1 + coast)) != -1:
     # Current position of Agent
     pos = translation_field.getSFVec3f()
-    ax, ay = pos[0], pos[1]
-
-    # Current position of Ped1
-    ped_pos = ped_translation_field.getSFVec3f()
-    px, py = ped_pos[0], ped_pos[1]
-
-    # Vector to destination
-    dx = destination[0] - ax
-    dy = destination[1] - ay
-    dist_goal = math.hypot(dx, dy)
-
-    if dist_goal > arrive_eps:  # not arrived yet
-        # Normalized goal direction
-        goal_x = dx / dist_goal
-        goal_y = dy / dist_goal
-
-        # Distance to Ped1
-        dxp = ax - px
-        dyp = ay - py
-        dist_ped = math.hypot(dxp, dyp)
-
-        if dist_ped < avoid_radius:  # too close, dodge
-            # Avoidance vector: perpendicular to Ped1->Agent
-            avoid_x = -dyp
-            avoid_y = dxp
-            avoid_len = math.hypot(avoid_x, avoid_y)
-            if avoid_len > 1e-6:
-                avoid_x /= avoid_len
-                avoid_y /= avoid_len
-            # Blend goal and avoidance
-            dir_x = 0.5 * goal_x + 0.5 * avoid_x
-            dir_y = 0.5 * goal_y + 0.5 * avoid_y
+    if coast:
+        # Woken from cruise mode: catch up on the goal moves slept through
+        cruise.replay(pos, destination, speed, coast * n_sub, translation_field, rotation_field)
+        cruise.skip(coast, cam, trajectory)
+        last_ped = None
+    ped_now = ped_translation_field.getSFVec3f()
+    for k in range(1, n_sub + 1):
+        ax, ay = pos[0], pos[1]
+
+        # Current position of Ped1, k substeps into this step
+        ped_pos = between(last_ped, ped_now, k, n_sub)
+        px, py = ped_pos[0], ped_pos[1]
+        threat = trigger is not None and trigger.near([ax, ay], [[px, py]])[0]   # AVOID_TRIGGER=cpa
+
+        # Vector to destination
+        dx = destination[0] - ax
+        dy = destination[1] - ay
+        dist_goal = math.hypot(dx, dy)
+
+        if dist_goal > arrive_eps:  # not arrived yet
+            # Normalized goal direction
+            mode = "goal"
+            goal_x = dx / dist_goal
+            goal_y = dy / dist_goal
+
+            # Distance to Ped1
+            dxp = ax - px
+            dyp = ay - py
+            field.watch([[px, py]])
+            dist_ped = field.nearest([ax, ay])[1] if field.active[0] else math.hypot(dxp, dyp)
+
+            near = threat if trigger is not None else dist_ped < avoid_radius
+            if near:  # too close, dodge
+                # Avoidance vector: perpendicular to Ped1->Agent
+                mode = "dodge"
+                avoid_x = -dyp
+                avoid_y = dxp
+                avoid_len = math.hypot(avoid_x, avoid_y)
+                if avoid_len > 1e-6:
+                    avoid_x /= avoid_len
+                    avoid_y /= avoid_len
+                # Blend goal and avoidance
+                dir_x = 0.5 * goal_x + 0.5 * avoid_x
+                dir_y = 0.5 * goal_y + 0.5 * avoid_y
+            else:
+                dir_x, dir_y = goal_x, goal_y
+
+            # Normalize
+            norm = math.hypot(dir_x, dir_y)
+            if norm > 1e-6:
+                dir_x /= norm
+                dir_y /= norm
+
+            # Move Agent
+            pos[0] += dir_x * speed
+            pos[1] += dir_y * speed
+            translation_field.setSFVec3f(pos)
+
+            # Rotate to face direction
+            angle = math.atan2(dir_y, dir_x)
+            rotation_field.setSFRotation([0, 0, 1, angle])
         else:
-            dir_x, dir_y = goal_x, goal_y
+            dir_x, dir_y, mode = 0.0, 0.0, "arrived"
+            print("Destination reached!")
+    last_ped = ped_now
 
-        # Normalize
-        norm = math.hypot(dir_x, dir_y)
-        if norm > 1e-6:
-            dir_x /= norm
-            dir_y /= norm
+    # === Camera recognition ===
+    if cam.due() and detections.enabled:
+        detections.record(cam.recognition(), step=cam.step)
+        # NOTE: Webots will automatically draw bounding boxes in Camera window
 
-        # Move Agent
-        pos[0] += dir_x * speed
-        pos[1] += dir_y * speed
-        translation_field.setSFVec3f(pos)
+    if trajectory is not None:
+        trajectory.log(pos, rotation_field.getSFRotation()[3], [ped_pos], dir_x, dir_y, mode)
 
-        # Rotate to face direction
-        angle = math.atan2(dir_y, dir_x)
-        rotation_field.setSFRotation([0, 0, 1, angle])
-    else:
-        print("Destination reached!")
+    if mode == "arrived":
+        break   # nothing moves the agent any more
+    coast = 0
+    if cruising:
+        clearance = math.hypot(ped_now[0] - pos[0], ped_now[1] - pos[1])
+        coast = cruise.coast_steps(pos, destination, arrive_eps, clearance, avoid_radius, speed * n_sub, timestep)
 
-    # === Camera recognition ===
-    image = camera.getImage()
-    if image:
-        objects = camera.getRecognitionObjects()
-        for obj in objects:
-            cx, cy = obj.getPositionOnImage()
-            w, h = obj.getSizeOnImage()
-            print(f"[CAM] Detected ID {obj.getId()} at ({cx:.1f},{cy:.1f}), size=({w:.1f},{h:.1f})")
-        # NOTE: Webots will automatically draw bounding boxes in Camera window
+detections.close()
+if trajectory is not None:
+    trajectory.close()
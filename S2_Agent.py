@@ -1,6 +1,13 @@
 from controller import Supervisor
 import math
 
+import cruise
+from camera_access import CameraSampler
+from cpa import CpaTrigger
+from detection_log import DetectionRecorder
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, between, per_step, substeps
+
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 
@@ -15,71 +22,102 @@ ped_translation_field = ped_node.getField("translation")
 
 # === Camera with recognition ===
 camera = robot.getDevice("CAM")
-camera.enable(timestep)
-camera.recognitionEnable(timestep)
+camera_period = timestep   # ms between camera samples
+cam = CameraSampler(camera, timestep, period=camera_period)
+detections = DetectionRecorder.for_controller("S2_Agent")
+trajectory = TrajectoryRecorder.for_controller("S2_Agent", n_peds=1)
 
 # === Destination (XY plane only) ===
 destination = [-2.0, 0.0]   # (x, y)
 
 # Motion params
-speed = 0.02
+n_sub = substeps(timestep)   # substeps per step, more than 1 only above the reference step
+speed = per_step(AGENT_SPEED, timestep / n_sub)   # m per substep
 arrive_eps = 0.05
 avoid_radius = 0.25
+trigger = CpaTrigger.for_controller("S2_Agent", avoid_radius, timestep / n_sub / 1000.0)
 
-while robot.step(timestep) != -1:
+# Cruise mode (cruise.py): basic time steps to sleep through before the next one
+cruising = cruise.enabled() and trigger is None
+coast = 0
+last_ped = None
+while robot.step(timestep * (1 + coast)) != -1:
     # Current Agent pos
     pos = translation_field.getSFVec3f()
-    ax, ay = pos[0], pos[1]
-
-    # Current Ped1 pos
-    ped_pos = ped_translation_field.getSFVec3f()
-    px, py = ped_pos[0], ped_pos[1]
-
-    # Goal vector
-    dx, dy = destination[0] - ax, destination[1] - ay
-    dist_goal = math.hypot(dx, dy)
-
-    if dist_goal > arrive_eps:
-        # Goal direction
-        goal_x, goal_y = dx / dist_goal, dy / dist_goal
-
-        # Distance to Ped1
-        dxp, dyp = ax - px, ay - py
-        dist_ped = math.hypot(dxp, dyp)
-
-        if dist_ped < avoid_radius:
-            # Avoidance vector (perpendicular)
-            avoid_x, avoid_y = -dyp, dxp
-            avoid_len = math.hypot(avoid_x, avoid_y)
-            if avoid_len > 1e-6:
-                avoid_x /= avoid_len
-                avoid_y /= avoid_len
-            dir_x = 0.45 * goal_x + 0.55 * avoid_x
-            dir_y = 0.45 * goal_y + 0.55 * avoid_y
+    if coast:
+        # Woken from cruise mode: catch up on the goal moves slept through
+        cruise.replay(pos, destination, speed, coast * n_sub, translation_field, rotation_field)
+        cruise.skip(coast, cam, trajectory)
+        last_ped = None
+    ped_now = ped_translation_field.getSFVec3f()
+    for k in range(1, n_sub + 1):
+        ax, ay = pos[0], pos[1]
+
+        # Current Ped1 pos, k substeps into this step
+        ped_pos = between(last_ped, ped_now, k, n_sub)
+        px, py = ped_pos[0], ped_pos[1]
+        threat = trigger is not None and trigger.near([ax, ay], [[px, py]])[0]   # AVOID_TRIGGER=cpa
+
+        # Goal vector
+        dx, dy = destination[0] - ax, destination[1] - ay
+        dist_goal = math.hypot(dx, dy)
+
+        if dist_goal > arrive_eps:
+            # Goal direction
+            mode = "goal"
+            goal_x, goal_y = dx / dist_goal, dy / dist_goal
+
+            # Distance to Ped1
+            dxp, dyp = ax - px, ay - py
+            dist_ped = math.hypot(dxp, dyp)
+
+            near = threat if trigger is not None else dist_ped < avoid_radius
+            if near:
+                # Avoidance vector (perpendicular)
+                mode = "dodge"
+                avoid_x, avoid_y = -dyp, dxp
+                avoid_len = math.hypot(avoid_x, avoid_y)
+                if avoid_len > 1e-6:
+                    avoid_x /= avoid_len
+                    avoid_y /= avoid_len
+                dir_x = 0.45 * goal_x + 0.55 * avoid_x
+                dir_y = 0.45 * goal_y + 0.55 * avoid_y
+            else:
+                dir_x, dir_y = goal_x, goal_y
+
+            # Normalize
+            norm = math.hypot(dir_x, dir_y)
+            if norm > 1e-6:
+                dir_x /= norm
+                dir_y /= norm
+
+            # Step
+            pos[0] += dir_x * speed
+            pos[1] += dir_y * speed
+            translation_field.setSFVec3f(pos)
+
+            # Face direction
+            yaw = math.atan2(dir_y, dir_x)
+            rotation_field.setSFRotation([0, 0, 1, yaw])
         else:
-            dir_x, dir_y = goal_x, goal_y
-
-        # Normalize
-        norm = math.hypot(dir_x, dir_y)
-        if norm > 1e-6:
-            dir_x /= norm
-            dir_y /= norm
-
-        # Step
-        pos[0] += dir_x * speed
-        pos[1] += dir_y * speed
-        translation_field.setSFVec3f(pos)
-
-        # Face direction
-        yaw = math.atan2(dir_y, dir_x)
-        rotation_field.setSFRotation([0, 0, 1, yaw])
-    else:
-        print("Destination reached!")
+            dir_x, dir_y, mode = 0.0, 0.0, "arrived"
+            print("Destination reached!")
+    last_ped = ped_now
 
     # Camera recognition info
-    img = camera.getImage()
-    if img:
-        for obj in camera.getRecognitionObjects():
-            cx, cy = obj.getPositionOnImage()
-            w, h = obj.getSizeOnImage()
-            print(f"[CAM] Detected ID {obj.getId()} at ({cx:.1f},{cy:.1f}), size=({w:.1f},{h:.1f})")
+    if cam.due() and detections.enabled:
+        detections.record(cam.recognition(), step=cam.step)
+
+    if trajectory is not None:
+        trajectory.log(pos, rotation_field.getSFRotation()[3], [ped_pos], dir_x, dir_y, mode)
+
+    if mode == "arrived":
+        break   # nothing moves the agent any more
+    coast = 0
+    if cruising:
+        clearance = math.hypot(ped_now[0] - pos[0], ped_now[1] - pos[1])
+        coast = cruise.coast_steps(pos, destination, arrive_eps, clearance, avoid_radius, speed * n_sub, timestep)
+
+detections.close()
+if trajectory is not None:
+    trajectory.close()
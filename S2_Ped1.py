@@ -1,5 +1,7 @@
 from controller import Supervisor
-import math
+
+from pedmotion import interpolate, seek_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
 
 # This controller is attached to DEF WorldSupervisor (a supervisor robot)
 supervisor = Supervisor()
@@ -14,20 +16,21 @@ ped_translation = ped.getField("translation")
 pos = ped_translation.getSFVec3f()   # [x, y, z]
 
 # Move along +Y to simulate "left -> right" crossing
-speed = 0.01            # meters per step
+speed = 0.5             # m/s
 start_y = pos[1]
-target_y = start_y + 2.0   # cross 2 meters to the right side
+distance = 2.0          # cross 2 meters to the right side
 arrive_eps = 0.01
+t = 0
 
 while supervisor.step(timestep) != -1:
+    t += 1
     pos = ped_translation.getSFVec3f()   # refresh current position
-    y = pos[1]
 
-    # Move toward target_y on Y axis; keep X,Z unchanged
-    dy = target_y - y
-    if abs(dy) > arrive_eps:
-        step = math.copysign(min(abs(dy), speed), dy)
-        pos[1] = y + step
+    # Position on Y after t steps toward start_y + distance; keep X,Z unchanged
+    y = float(interpolate(seek_at, reference_steps(t, timestep),
+                          start_y, distance, per_step(speed, REFERENCE_STEP_MS), arrive_eps))
+    if y != pos[1]:
+        pos[1] = y
         ped_translation.setSFVec3f(pos)
     else:
         # Reached crossing target; stop here
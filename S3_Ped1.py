@@ -1,5 +1,7 @@
 from controller import Supervisor
-import math
+
+from pedmotion import interpolate, seek_at
+from units import REFERENCE_STEP_MS, per_step, reference_steps
 
 sup = Supervisor()
 timestep = int(sup.getBasicTimeStep())
@@ -12,15 +14,18 @@ t_field = ped.getField("translation")
 pos = t_field.getSFVec3f()  # [x, y, z]
 
 # Move along +X (head-on toward Agent that’s to the right)
-speed = 0.015        # m/step
-target_x = pos[0] + 4.0  # walk ~4 meters to the right
+speed = 0.75         # m/s
+start_x = pos[0]
+distance = 4.0       # walk ~4 meters to the right
 eps = 1e-2
+t = 0
 
 while sup.step(timestep) != -1:
+    t += 1
     pos = t_field.getSFVec3f()
-    dx = target_x - pos[0]
-    if abs(dx) > eps:
-        step = math.copysign(min(abs(dx), speed), dx)
-        pos[0] += step          # X changes; Y,Z stay
+    x = float(interpolate(seek_at, reference_steps(t, timestep),
+                          start_x, distance, per_step(speed, REFERENCE_STEP_MS), eps))
+    if x != pos[0]:
+        pos[0] = x              # X changes; Y,Z stay
         t_field.setSFVec3f(pos)
     # else: arrived — do nothing / stop
@@ -1,5 +1,8 @@
 from controller import Supervisor
 
+from pedmotion import linear_at
+from units import per_step
+
 ped = Supervisor()
 timestep = int(ped.getBasicTimeStep())
 
@@ -7,9 +10,12 @@ self_node = ped.getSelf()
 t_field = self_node.getField("translation")
 
 pos = t_field.getSFVec3f()
-speed = 0.01   # slower than Agent
+start_x = pos[0]
+speed = 0.5    # m/s, slower than Agent
+t = 0
 
 while ped.step(timestep) != -1:
+    t += 1
     pos = t_field.getSFVec3f()
-    pos[0] -= speed    # move toward negative X (same direction as Agent)
+    pos[0] = float(linear_at(start_x, -per_step(speed, timestep), t))    # move toward negative X (same direction as Agent)
     t_field.setSFVec3f(pos)
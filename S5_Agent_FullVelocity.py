@@ -1,6 +1,14 @@
 from controller import Supervisor
 import math
 
+import cruise
+from camera_access import CameraSampler
+from cpa import CpaTrigger
+from detection_log import DetectionRecorder
+from tracker import Tracker
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, between, per_step, substeps
+
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 
@@ -15,82 +23,113 @@ ped_t_field = ped_node.getField("translation")
 
 # === Camera ===
 camera = robot.getDevice("CAM")
-camera.enable(timestep)
-camera.recognitionEnable(timestep)
+camera_period = timestep   # ms between camera samples
+cam = CameraSampler(camera, timestep, period=camera_period)
+detections = DetectionRecorder.for_controller("S5_Agent_FullVelocity")
+trajectory = TrajectoryRecorder.for_controller("S5_Agent_FullVelocity", n_peds=1)
 
 # === Destination ===
 destination = [-4.0, 0.0]   # goal (straight left)
-speed = 0.02
+n_sub = substeps(timestep)   # substeps per step, more than 1 only above the reference step
+speed = per_step(AGENT_SPEED, timestep / n_sub)   # m per substep
 arrive_eps = 0.05
 avoid_radius = 0.4   # trigger dodge earlier than before
+trigger = CpaTrigger.for_controller("S5_Agent_FullVelocity", avoid_radius, timestep / n_sub / 1000.0)
 
 # === Ped1 state tracking ===
-prev_px, prev_py = None, None
+tracker = Tracker((1,), timestep / n_sub / 1000.0)
 
-while robot.step(timestep) != -1:
+# Cruise mode (cruise.py): basic time steps to sleep through before the next one
+cruising = cruise.enabled() and trigger is None
+coast = 0
+last_ped = None
+while robot.step(timestep * (1 + coast)) != -1:
     # Agent pos
     pos = t_field.getSFVec3f()
-    ax, ay = pos[0], pos[1]
-
-    # Ped pos
-    ped_pos = ped_t_field.getSFVec3f()
-    px, py = ped_pos[0], ped_pos[1]
-
-    # Destination vector
-    dx, dy = destination[0] - ax, destination[1] - ay
-    dist_goal = math.hypot(dx, dy)
-
-    if dist_goal > arrive_eps:
-        goal_x, goal_y = dx / dist_goal, dy / dist_goal
-
-        # Distance to Ped1
-        dxp, dyp = px - ax, py - ay
-        dist_ped = math.hypot(dxp, dyp)
-
-        # Default: go toward goal
-        dir_x, dir_y = goal_x, goal_y
-
-        if dist_ped < avoid_radius and prev_px is not None:
-            # Compute Ped1 velocity vector
-            vpx = px - prev_px
-            vpy = py - prev_py
-            vlen = math.hypot(vpx, vpy)
-
-            if vlen > 1e-6:
-                vpx /= vlen
-                vpy /= vlen
-
-                # Opposite of Ped1 velocity → safe dodge direction
-                dodge_x, dodge_y = -vpx, -vpy
-
-                # Blend dodge with goal
-                dir_x = 0.3 * goal_x + 0.7 * dodge_x
-                dir_y = 0.3 * goal_y + 0.7 * dodge_y
-
-        # Normalize
-        norm = math.hypot(dir_x, dir_y)
-        if norm > 1e-6:
-            dir_x /= norm
-            dir_y /= norm
-
-        # Move Agent
-        pos[0] += dir_x * speed
-        pos[1] += dir_y * speed
-        t_field.setSFVec3f(pos)
-
-        # Rotate Agent
-        yaw = math.atan2(dir_y, dir_x)
-        r_field.setSFRotation([0, 0, 1, yaw])
-    else:
-        print("Destination reached!")
-
-    # Update previous Ped1 position
-    prev_px, prev_py = px, py
+    if coast:
+        # Woken from cruise mode: catch up on the goal moves slept through
+        cruise.replay(pos, destination, speed, coast * n_sub, t_field, r_field)
+        cruise.skip(coast, cam, trajectory)
+        last_ped = None
+    ped_now = ped_t_field.getSFVec3f()
+    for k in range(1, n_sub + 1):
+        ax, ay = pos[0], pos[1]
+
+        # Ped pos, k substeps into this step
+        ped_pos = between(last_ped, ped_now, k, n_sub)
+        px, py = ped_pos[0], ped_pos[1]
+        # After a coast the first update spans the whole gap; the other
+        # substeps see the same read and leave the tracker alone
+        if k == 1 or not coast:
+            tracker.update([[px, py]], dt=tracker.dt * (coast + 1) * n_sub if coast else None)
+        threat = trigger is not None and trigger.near([ax, ay], [[px, py]], tracker.vel)[0]   # AVOID_TRIGGER=cpa
+
+        # Destination vector
+        dx, dy = destination[0] - ax, destination[1] - ay
+        dist_goal = math.hypot(dx, dy)
+
+        if dist_goal > arrive_eps:
+            goal_x, goal_y = dx / dist_goal, dy / dist_goal
+
+            # Distance to Ped1
+            dxp, dyp = px - ax, py - ay
+            dist_ped = math.hypot(dxp, dyp)
+
+            # Default: go toward goal
+            dir_x, dir_y = goal_x, goal_y
+            mode = "goal"
+
+            near = threat if trigger is not None else dist_ped < avoid_radius
+            if near and tracker.ready[0]:
+                # Ped1 velocity vector per step
+                vpx, vpy = (tracker.vel[0] * tracker.dt).tolist()
+                vlen = math.hypot(vpx, vpy)
+
+                if vlen > 1e-6:
+                    mode = "dodge"
+                    vpx /= vlen
+                    vpy /= vlen
+
+                    # Opposite of Ped1 velocity → safe dodge direction
+                    dodge_x, dodge_y = -vpx, -vpy
+
+                    # Blend dodge with goal
+                    dir_x = 0.3 * goal_x + 0.7 * dodge_x
+                    dir_y = 0.3 * goal_y + 0.7 * dodge_y
+
+            # Normalize
+            norm = math.hypot(dir_x, dir_y)
+            if norm > 1e-6:
+                dir_x /= norm
+                dir_y /= norm
+
+            # Move Agent
+            pos[0] += dir_x * speed
+            pos[1] += dir_y * speed
+            t_field.setSFVec3f(pos)
+
+            # Rotate Agent
+            yaw = math.atan2(dir_y, dir_x)
+            r_field.setSFRotation([0, 0, 1, yaw])
+        else:
+            dir_x, dir_y, mode = 0.0, 0.0, "arrived"
+            print("Destination reached!")
+    last_ped = ped_now
 
     # Camera recognition info
-    img = camera.getImage()
-    if img:
-        for obj in camera.getRecognitionObjects():
-            cx, cy = obj.getPositionOnImage()
-            w, h = obj.getSizeOnImage()
-            print(f"[CAM] Detected ID {obj.getId()} at ({cx:.1f},{cy:.1f}), size=({w:.1f},{h:.1f})")
+    if cam.due() and detections.enabled:
+        detections.record(cam.recognition(), step=cam.step)
+
+    if trajectory is not None:
+        trajectory.log(pos, r_field.getSFRotation()[3], [ped_pos], dir_x, dir_y, mode)
+
+    if mode == "arrived":
+        break   # nothing moves the agent any more
+    coast = 0
+    if cruising:
+        clearance = math.hypot(ped_now[0] - pos[0], ped_now[1] - pos[1])
+        coast = cruise.coast_steps(pos, destination, arrive_eps, clearance, avoid_radius, speed * n_sub, timestep)
+
+detections.close()
+if trajectory is not None:
+    trajectory.close()
@@ -1,6 +1,13 @@
 from controller import Supervisor
 import math
 
+import cruise
+from camera_access import CameraSampler
+from cpa import CpaTrigger
+from detection_log import DetectionRecorder
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, between, per_step, steps, substeps
+
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 
@@ -15,74 +22,107 @@ ped_t_field = ped_node.getField("translation")
 
 # === Camera ===
 camera = robot.getDevice("CAM")
-camera.enable(timestep)
-camera.recognitionEnable(timestep)
+camera_period = timestep   # ms between camera samples
+cam = CameraSampler(camera, timestep, period=camera_period)
+detections = DetectionRecorder.for_controller("S5_Agent_Wait")
+trajectory = TrajectoryRecorder.for_controller("S5_Agent_Wait", n_peds=1)
 
 # === Destination ===
 destination = [-4.0, 0.0]   # goal (leftward)
-speed = 0.02
+n_sub = substeps(timestep)   # substeps per step, more than 1 only above the reference step
+speed = per_step(AGENT_SPEED, timestep / n_sub)   # m per substep
 arrive_eps = 0.05
 avoid_radius = 0.35
+trigger = CpaTrigger.for_controller("S5_Agent_Wait", avoid_radius, timestep / n_sub / 1000.0)
 
 # Stop timer
 stop_steps = 0
-stop_duration = 15  # stop ~0.3s if timestep=20ms
+stop_duration = steps(0.3, timestep / n_sub)  # stop 0.3 s, in substeps
 
-while robot.step(timestep) != -1:
+# Cruise mode (cruise.py): basic time steps to sleep through before the next one
+cruising = cruise.enabled() and trigger is None
+coast = 0
+last_ped = None
+while robot.step(timestep * (1 + coast)) != -1:
     pos = t_field.getSFVec3f()
-    ax, ay = pos[0], pos[1]
-
-    ped_pos = ped_t_field.getSFVec3f()
-    px, py = ped_pos[0], ped_pos[1]
-
-    dx, dy = destination[0] - ax, destination[1] - ay
-    dist_goal = math.hypot(dx, dy)
-
-    if dist_goal > arrive_eps:
-        goal_x, goal_y = dx / dist_goal, dy / dist_goal
-
-        # Distance to Ped1
-        dxp, dyp = px - ax, py - ay
-        dist_ped = math.hypot(dxp, dyp)
-
-        if stop_steps > 0:
-            # Currently waiting
-            stop_steps -= 1
-            dir_x, dir_y = 0.0, 0.0
-        elif dist_ped < avoid_radius:
-            # Ped1 too close → option 1: stop
-            stop_steps = stop_duration
-            dir_x, dir_y = 0.0, 0.0
-
-            # Option 2 (alternative): dodge away from Ped1 direction
-            # ped_motion = (px - old_px, py - old_py)   # you'd track this across steps
-            # dodge_dir = (-ped_motion[0], -ped_motion[1])  # opposite to Ped1's motion
-            # normalize and blend with goal instead of stopping
+    if coast:
+        # Woken from cruise mode: catch up on the goal moves slept through
+        cruise.replay(pos, destination, speed, coast * n_sub, t_field, r_field)
+        cruise.skip(coast, cam, trajectory)
+        last_ped = None
+    ped_now = ped_t_field.getSFVec3f()
+    for k in range(1, n_sub + 1):
+        ax, ay = pos[0], pos[1]
+
+        ped_pos = between(last_ped, ped_now, k, n_sub)
+        px, py = ped_pos[0], ped_pos[1]
+        threat = trigger is not None and trigger.near([ax, ay], [[px, py]])[0]   # AVOID_TRIGGER=cpa
+
+        dx, dy = destination[0] - ax, destination[1] - ay
+        dist_goal = math.hypot(dx, dy)
+
+        if dist_goal > arrive_eps:
+            mode = "goal"
+            goal_x, goal_y = dx / dist_goal, dy / dist_goal
+
+            # Distance to Ped1
+            dxp, dyp = px - ax, py - ay
+            dist_ped = math.hypot(dxp, dyp)
+
+            near = threat if trigger is not None else dist_ped < avoid_radius
+
+            if stop_steps > 0:
+                # Currently waiting
+                mode = "stop"
+                stop_steps -= 1
+                dir_x, dir_y = 0.0, 0.0
+            elif near:
+                # Ped1 too close → option 1: stop
+                mode = "stop"
+                stop_steps = stop_duration
+                dir_x, dir_y = 0.0, 0.0
+
+                # Option 2 (alternative): dodge away from Ped1 direction
+                # ped_motion = (px - old_px, py - old_py)   # you'd track this across steps
+                # dodge_dir = (-ped_motion[0], -ped_motion[1])  # opposite to Ped1's motion
+                # normalize and blend with goal instead of stopping
+            else:
+                dir_x, dir_y = goal_x, goal_y
+
+            # Normalize
+            norm = math.hypot(dir_x, dir_y)
+            if norm > 1e-6:
+                dir_x /= norm
+                dir_y /= norm
+
+            # Move
+            pos[0] += dir_x * speed
+            pos[1] += dir_y * speed
+            t_field.setSFVec3f(pos)
+
+            # Rotate to face direction (skip if stopping)
+            if norm > 1e-6:
+                yaw = math.atan2(dir_y, dir_x)
+                r_field.setSFRotation([0, 0, 1, yaw])
         else:
-            dir_x, dir_y = goal_x, goal_y
-
-        # Normalize
-        norm = math.hypot(dir_x, dir_y)
-        if norm > 1e-6:
-            dir_x /= norm
-            dir_y /= norm
-
-        # Move
-        pos[0] += dir_x * speed
-        pos[1] += dir_y * speed
-        t_field.setSFVec3f(pos)
-
-        # Rotate to face direction (skip if stopping)
-        if norm > 1e-6:
-            yaw = math.atan2(dir_y, dir_x)
-            r_field.setSFRotation([0, 0, 1, yaw])
-    else:
-        print("Destination reached!")
+            dir_x, dir_y, mode = 0.0, 0.0, "arrived"
+            print("Destination reached!")
+    last_ped = ped_now
 
     # Camera recognition logging
-    img = camera.getImage()
-    if img:
-        for obj in camera.getRecognitionObjects():
-            cx, cy = obj.getPositionOnImage()
-            w, h = obj.getSizeOnImage()
-            print(f"[CAM] Detected ID {obj.getId()} at ({cx:.1f},{cy:.1f}), size=({w:.1f},{h:.1f})")
+    if cam.due() and detections.enabled:
+        detections.record(cam.recognition(), step=cam.step)
+
+    if trajectory is not None:
+        trajectory.log(pos, r_field.getSFRotation()[3], [ped_pos], dir_x, dir_y, mode)
+
+    if mode == "arrived":
+        break   # nothing moves the agent any more
+    coast = 0
+    if cruising and stop_steps == 0:
+        clearance = math.hypot(ped_now[0] - pos[0], ped_now[1] - pos[1])
+        coast = cruise.coast_steps(pos, destination, arrive_eps, clearance, avoid_radius, speed * n_sub, timestep)
+
+detections.close()
+if trajectory is not None:
+    trajectory.close()
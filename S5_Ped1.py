@@ -1,5 +1,8 @@
 from controller import Supervisor
 
+from pedmotion import linear_at
+from units import per_step
+
 robot = Supervisor()
 timestep = int(robot.getBasicTimeStep())
 
@@ -7,10 +10,13 @@ ped = robot.getSelf()
 t_field = ped.getField("translation")
 
 pos = t_field.getSFVec3f()
-speed = 0.015
+start_x, start_y = pos[0], pos[1]
+speed = 0.75   # m/s
+t = 0
 
 while robot.step(timestep) != -1:
+    t += 1
     pos = t_field.getSFVec3f()
-    pos[0] -= speed   # move left (negative X)
-    pos[1] += speed   # move up (positive Y) → diagonal 45°
+    pos[0] = float(linear_at(start_x, -per_step(speed, timestep), t))   # move left (negative X)
+    pos[1] = float(linear_at(start_y, per_step(speed, timestep), t))    # move up (positive Y) → diagonal 45°
     t_field.setSFVec3f(pos)
@@ -0,0 +1,93 @@
+# agent_spacetime.py
+# Space-time A* agent: plans a collision-free path to the destination against
+# the predicted paths of all pedestrians and follows it, searching again only
+# when a pedestrian leaves its prediction (see spacetime.py). Works on any
+# S*/M* world; controllerArgs "x y" set the destination.
+from controller import Supervisor
+import math
+import sys
+
+from agent_core import PedestrianArray
+from spacetime import SpaceTimePlanner
+from trajectory import TrajectoryRecorder
+from units import AGENT_SPEED, per_step, substeps
+
+class AgentSpaceTime(Supervisor):
+    def __init__(self, destination, peds=None):
+        super().__init__()
+        self.dt = int(self.getBasicTimeStep())
+        self.n_sub = substeps(self.dt)   # more than 1 only above the reference step
+        self.node = self.getSelf()
+        self.t_field = self.node.getField("translation")
+        self.r_field = self.node.getField("rotation")
+        self.pos = self.t_field.getSFVec3f()
+        self.yaw = self.r_field.getSFRotation()[3]
+
+        self.destination = destination
+        self.speed = per_step(AGENT_SPEED, self.dt / self.n_sub)   # m per substep
+        self.goal_eps = 0.05
+        self.steps = 0
+
+        # Pedestrians: every DEF Ped1, Ped2, ... in the world unless given
+        if peds is None:
+            peds = {}
+            while self.getFromDef(f"Ped{len(peds) + 1}") is not None:
+                peds[f"Ped{len(peds) + 1}"] = "ped"
+        self.peds = PedestrianArray(self, peds)
+        # Searches are capped by expansions, not time, so runs repeat exactly;
+        # most steps reuse the plan
+        self.planner = SpaceTimePlanner(self.speed, goal_eps=self.goal_eps / 2)
+        self.trajectory = TrajectoryRecorder.for_controller("SpaceTime_Agent", n_peds=len(self.peds))
+
+    def _record(self, dir_x, dir_y, mode):
+        if self.trajectory is not None:
+            self.trajectory.log(self.pos, self.yaw, self.peds.pos, dir_x, dir_y, mode)
+
+    def _substep(self, k):
+        # The rules once, k substeps of n_sub into the basic time step
+        self.steps += 1
+        dx = self.destination[0] - self.pos[0]
+        dy = self.destination[1] - self.pos[1]
+        if math.hypot(dx, dy) < self.goal_eps:
+            print("✅ Destination reached")
+            return 0.0, 0.0, "arrived"
+
+        # Track pedestrians every step; the plan is only redone when they surprise it
+        self.peds.sense(self.pos, k, self.n_sub)
+        vel = self.peds.update_velocity()
+        dir_x, dir_y, replanned = self.planner.follow(self.pos, self.destination, self.peds.pos, vel, self.steps)
+        if replanned:
+            print(f"🧭 Replanned ({self.planner.searches} searches)")
+
+        # Straight at the goal is plain goal-seeking; anything else is avoidance
+        n = math.hypot(dir_x, dir_y)
+        mode = "stop" if n < 1e-6 else "dodge"
+        if n > 1e-6 and (dir_x*dx + dir_y*dy) / (n*math.hypot(dx, dy)) > 0.999:
+            mode = "goal"
+
+        # Move
+        self.pos[0] += dir_x * self.speed
+        self.pos[1] += dir_y * self.speed
+        self.t_field.setSFVec3f(self.pos)
+
+        # Rotate (only if moving)
+        if n > 1e-6:
+            self.yaw = math.atan2(dir_y, dir_x)
+            self.r_field.setSFRotation([0, 0, 1, self.yaw])
+        return dir_x, dir_y, mode
+
+    def run(self):
+        while self.step(self.dt) != -1:
+            self.peds.read()
+            for k in range(1, self.n_sub + 1):
+                dir_x, dir_y, mode = self._substep(k)
+            self._record(dir_x, dir_y, mode)
+            if mode == "arrived":
+                break   # nothing moves the agent any more
+        if self.trajectory is not None:
+            self.trajectory.close()
+
+
+destination = [float(v) for v in sys.argv[1:3]] if len(sys.argv) > 2 else [-2.0, 0.0]
+controller = AgentSpaceTime(destination=destination)
+controller.run()
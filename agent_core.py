@@ -0,0 +1,130 @@
+# agent_core.py
+# Pedestrian state for the M-series agents. Positions, distances and velocity
+# estimates for every pedestrian live in contiguous arrays, so one step is a
+# single vectorised pass no matter how many pedestrians the world has.
+# Pedestrians of a `static_role` are served from a precomputed distance field
+# (static_field.py) until they are seen to move.
+import numpy as np
+
+from static_field import StaticField
+from units import substeps
+from tracker import Tracker
+
+
+class PedestrianArray:
+    def __init__(self, supervisor, roles, radius=None, static_role=None, **tracker):
+        # roles: {DEF: role}, e.g. {"Ped1": "moving", "Ped2": "moving", "Ped3": "static"}
+        # radius: largest radius the agent compares distances against
+        # static_role: role whose pedestrians stand still (needs radius)
+        # tracker: keyword arguments for tracker.Tracker (accel_std, meas_std, gains, ...)
+        self.defs = list(roles)
+        self.roles = np.array([roles[name] for name in self.defs])
+        self.fields = []
+        for name in self.defs:
+            node = supervisor.getFromDef(name)
+            if node is None:
+                raise RuntimeError(f"DEF {name} not found. Add `DEF {name}` to the pedestrian robot.")
+            self.fields.append(node.getField("translation"))
+
+        n = len(self.defs)
+        self.pos = np.zeros((n, 2))
+        self.now = np.zeros((n, 2))          # read this basic time step
+        self.last = None                     # read the one before
+        self.reads = 0
+        self.vel = np.zeros((n, 2))
+        self.dist = np.zeros(n)
+        # Agents above the reference step run their rules per substep
+        self.n_sub = substeps(supervisor.getBasicTimeStep())
+        self.dt = supervisor.getBasicTimeStep() / self.n_sub / 1000.0
+        self.tracker = Tracker((n,), self.dt, **tracker)
+        self.gap = 0                         # substeps the next velocity update spans beyond one
+        self.repeats = 0                     # velocity updates left that would re-feed the same read
+
+        self.radius = radius
+
+        # Static pedestrians: rasterised once from where they start
+        self.fixed = np.zeros(n, dtype=bool)
+        self.field = None
+        if static_role is not None and radius is not None:
+            self.fixed = self.roles == static_role
+            self.fixed_rows = np.flatnonzero(self.fixed)
+            start = [self.fields[i].getSFVec3f()[:2] for i in self.fixed_rows.tolist()]
+            self.field = StaticField(start, radius)
+
+    def __len__(self):
+        return len(self.defs)
+
+    def role(self, name):
+        return self.roles == name
+
+    def read(self):
+        # Every translation, once per basic time step
+        if self.reads:
+            self.last = self.now.copy()
+        for i, field in enumerate(self.fields):
+            self.now[i] = field.getSFVec3f()[:2]
+        self.reads += 1
+
+    def skip(self, steps):
+        # After read(), when the agent slept through `steps` basic time steps
+        # (cruise.py): the read before is stale, so nothing is interpolated
+        # this step; the next velocity update spans the whole gap and the
+        # other substeps of this step leave the tracker alone
+        self.last = None
+        self.gap = steps * self.n_sub + self.n_sub - 1
+        self.repeats = self.n_sub - 1
+
+    def clearance(self, agent_pos):
+        # Distance from the agent to the nearest pedestrian as last read, static ones included
+        if not len(self.defs):
+            return np.inf
+        return float(np.hypot(self.now[:, 0] - agent_pos[0], self.now[:, 1] - agent_pos[1]).min())
+
+    def sense(self, agent_pos, k=1, n=1):
+        # Positions k substeps of n into the step (between the last two reads)
+        # and their distance to the agent
+        if k == n or self.last is None:
+            self.pos[:] = self.now
+        else:
+            self.pos[:] = self.last + (self.now - self.last) * (k / n)
+        # One np.hypot over every pedestrian: for a single query point it is
+        # cheaper than keeping a spatial index up to date, even in large crowds
+        self.dist = np.hypot(self.pos[:, 0] - agent_pos[0], self.pos[:, 1] - agent_pos[1])
+        if self.field is not None:
+            self._sense_static(agent_pos)
+        return self.dist
+
+    def _sense_static(self, agent_pos):
+        # A static pedestrian that moved is measured directly from now on; the
+        # others only report the nearest one, and only inside radius
+        for k in self.field.watch(self.pos[self.fixed_rows]).tolist():
+            self.fixed[self.fixed_rows[k]] = False
+        self.dist[self.fixed] = np.inf
+        k, d = self.field.nearest(agent_pos)
+        if k >= 0:
+            self.dist[self.fixed_rows[k]] = d
+
+    def update_velocity(self):
+        # Filtered velocity in m per step (the agents' unit), zero on first sight
+        if self.repeats and not self.gap:
+            self.repeats -= 1
+            return self.vel
+        self.tracker.update(self.pos, dt=self.dt * (1 + self.gap))
+        self.gap = 0
+        np.multiply(self.tracker.vel, self.dt, out=self.vel)
+        return self.vel
+
+    def predict(self, steps):
+        # Tracked positions the given number of steps ahead
+        return self.tracker.predict(steps * self.dt)
+
+    def nearest(self, mask):
+        # Index of the closest pedestrian selected by mask, or -1
+        if not mask.any():
+            return -1
+        idx = np.flatnonzero(mask)
+        return int(idx[np.argmin(self.dist[idx])])
+
+    def side(self, i, agent_y):
+        # Dodge away from pedestrian i along Y
+        return (0, 1) if self.pos[i, 1] < agent_y else (0, -1)
@@ -0,0 +1,532 @@
+# batch.py
+# Runs N independent copies of a scenario in lockstep with NumPy.
+# Agent state is held in (N, 2) arrays, pedestrians in (N, k, 2); each policy
+# below is the decision rule of one agent script written over arrays, so a
+# batch episode follows the same path as the scalar controller under cosim.py:
+#   python batch.py S2 --episodes 10000 --steps 300
+import argparse
+import os
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+import pedmotion
+import scenarios
+from rollout import RolloutPlanner
+from safety_metrics import SafetyMetrics
+from tracker import Tracker
+from trajectory import MODE_CODES
+from units import AGENT_SPEED, REFERENCE_STEP_MS, per_step, steps
+
+
+# Policies step at the reference basicTimeStep, so per-step parameters are the
+# scripts' SI values converted at that step
+SPEED = per_step(AGENT_SPEED, REFERENCE_STEP_MS)
+STOP_DURATION = steps(0.3, REFERENCE_STEP_MS)
+
+
+def _unit(x, y):
+    # S-series normalisation: leave the vector alone when it is ~zero
+    n = np.hypot(x, y)
+    big = n > 1e-6
+    safe = np.where(big, n, 1.0)
+    return np.where(big, x / safe, x), np.where(big, y / safe, y), n
+
+
+def _norm(x, y):
+    # AgentM6/AgentM7._norm: zero vector when ~zero
+    n = np.hypot(x, y)
+    big = n > 1e-6
+    safe = np.where(big, n, 1.0)
+    return np.where(big, x / safe, 0.0), np.where(big, y / safe, 0.0)
+
+
+def _side(py, ay):
+    # (0, 1) if the pedestrian is below the agent else (0, -1)
+    return np.where(py < ay, 1.0, -1.0)
+
+
+class Policy(ABC):
+    PARAMS = {}
+    DT = scenarios.BASIC_TIME_STEP / 1000.0
+
+    def __init__(self, n, params=None):
+        self.n = n
+        self.p = {}
+        for name, value in dict(self.PARAMS, **(params or {})).items():
+            self.p[name] = np.asarray(value, dtype=float)
+        self.tracker = None
+        self.mode = np.zeros(n, dtype=np.uint8)     # trajectory.MODES code of the last step
+
+    def _track(self, peds, mask=None):
+        # Pedestrian velocities in m per step from tracker.Tracker, as the scripts get them
+        if self.tracker is None:
+            self.tracker = Tracker(peds.shape[:-1], self.DT)
+        if mask is not None:
+            mask = np.broadcast_to(mask[:, None], peds.shape[:-1])
+        self.tracker.update(peds, mask)
+        return self.tracker.vel * self.tracker.dt
+
+    def _to_goal(self, pos):
+        dest = self.p["destination"]
+        dx = dest[..., 0] - pos[:, 0]
+        dy = dest[..., 1] - pos[:, 1]
+        return dx, dy, np.hypot(dx, dy)
+
+    def _goal(self, pos):
+        dx, dy, dist_goal = self._to_goal(pos)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return dx / dist_goal, dy / dist_goal, dist_goal
+
+    def _mode(self, active, *cases):
+        # Mode per episode, as the script would log it: the first (mask, name)
+        # that matches, else goal, and arrived once inactive
+        mode = np.full(self.n, MODE_CODES["goal"], dtype=np.uint8)
+        for mask, name in reversed(cases):
+            mode[mask] = MODE_CODES[name]
+        mode[~active] = MODE_CODES["arrived"]
+        self.mode = mode
+
+    @abstractmethod
+    def step(self, pos, peds):
+        # -> dir_x, dir_y, moved (position updated), turned (rotation updated)
+        ...
+
+
+# === S-series ===
+class PerpendicularDodge(Policy):
+    # S1.py, S2_Agent.py, S3_Agent.py
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "arrive_eps": 0.05,
+              "avoid_radius": 0.25, "goal_weight": 0.5, "avoid_weight": 0.5}
+
+    def step(self, pos, peds):
+        p = self.p
+        goal_x, goal_y, dist_goal = self._goal(pos)
+        active = dist_goal > p["arrive_eps"]
+
+        dxp = pos[:, 0] - peds[:, 0, 0]
+        dyp = pos[:, 1] - peds[:, 0, 1]
+        dodge = np.hypot(dxp, dyp) < p["avoid_radius"]
+        avoid_x, avoid_y, _ = _unit(-dyp, dxp)
+        dir_x = np.where(dodge, p["goal_weight"] * goal_x + p["avoid_weight"] * avoid_x, goal_x)
+        dir_y = np.where(dodge, p["goal_weight"] * goal_y + p["avoid_weight"] * avoid_y, goal_y)
+        self._mode(active, (dodge, "dodge"))
+
+        dir_x, dir_y, _ = _unit(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class OvertakeDodge(Policy):
+    # S4_Agent.py
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "arrive_eps": 0.05,
+              "safe_distance": 0.3, "goal_weight": 0.4, "avoid_weight": 0.6}
+
+    def step(self, pos, peds):
+        p = self.p
+        goal_x, goal_y, dist_goal = self._goal(pos)
+        active = dist_goal > p["arrive_eps"]
+
+        px, py = peds[:, 0, 0], peds[:, 0, 1]
+        dist_ped = np.hypot(px - pos[:, 0], py - pos[:, 1])
+        dodge = (dist_ped < p["safe_distance"]) & (px < pos[:, 0])
+        dir_x = np.where(dodge, p["goal_weight"] * goal_x + p["avoid_weight"] * 0.0, goal_x)
+        dir_y = np.where(dodge, p["goal_weight"] * goal_y + p["avoid_weight"] * 1.0, goal_y)
+        self._mode(active, (dodge, "overtake"))
+
+        dir_x, dir_y, _ = _unit(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class VelocityDodge(Policy):
+    # S5_Agent_FullVelocity.py
+    PARAMS = {"destination": (-4.0, 0.0), "speed": SPEED, "arrive_eps": 0.05,
+              "avoid_radius": 0.4, "goal_weight": 0.3, "avoid_weight": 0.7}
+
+    def step(self, pos, peds):
+        p = self.p
+        goal_x, goal_y, dist_goal = self._goal(pos)
+        active = dist_goal > p["arrive_eps"]
+
+        ped = peds[:, 0]
+        vel = self._track(peds)[:, 0]
+        dist_ped = np.hypot(ped[:, 0] - pos[:, 0], ped[:, 1] - pos[:, 1])
+        vpx, vpy = vel[:, 0], vel[:, 1]
+        vlen = np.hypot(vpx, vpy)
+        dodge = (dist_ped < p["avoid_radius"]) & self.tracker.ready[:, 0] & (vlen > 1e-6)
+        safe = np.where(vlen > 1e-6, vlen, 1.0)
+        dir_x = np.where(dodge, p["goal_weight"] * goal_x + p["avoid_weight"] * -(vpx / safe), goal_x)
+        dir_y = np.where(dodge, p["goal_weight"] * goal_y + p["avoid_weight"] * -(vpy / safe), goal_y)
+        self._mode(active, (dodge, "dodge"))
+
+        dir_x, dir_y, _ = _unit(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class WaitDodge(Policy):
+    # S5_Agent_Wait.py
+    PARAMS = {"destination": (-4.0, 0.0), "speed": SPEED, "arrive_eps": 0.05,
+              "avoid_radius": 0.35, "stop_duration": STOP_DURATION}
+
+    def __init__(self, n, params=None):
+        super().__init__(n, params)
+        self.stop_steps = np.zeros(n, dtype=int)
+
+    def step(self, pos, peds):
+        p = self.p
+        goal_x, goal_y, dist_goal = self._goal(pos)
+        active = dist_goal > p["arrive_eps"]
+
+        dist_ped = np.hypot(peds[:, 0, 0] - pos[:, 0], peds[:, 0, 1] - pos[:, 1])
+        waiting = active & (self.stop_steps > 0)
+        trigger = active & ~waiting & (dist_ped < p["avoid_radius"])
+        self.stop_steps = np.where(waiting, self.stop_steps - 1, self.stop_steps)
+        self.stop_steps = np.where(trigger, p["stop_duration"].astype(int), self.stop_steps)
+        halt = waiting | trigger
+        dir_x = np.where(halt, 0.0, goal_x)
+        dir_y = np.where(halt, 0.0, goal_y)
+        self._mode(active, (halt, "stop"))
+
+        dir_x, dir_y, norm = _unit(dir_x, dir_y)
+        return dir_x, dir_y, active, active & (norm > 1e-6)
+
+
+class HybridDodge(Policy):
+    # S5_Agent_Hybrid.py
+    PARAMS = {"destination": (-4.0, 0.0), "speed": SPEED, "arrive_eps": 0.05,
+              "avoid_radius": 0.4, "stop_duration": STOP_DURATION,
+              "moving_speed": per_step(0.5, REFERENCE_STEP_MS), "fast_speed": per_step(1.0, REFERENCE_STEP_MS),
+              "goal_weight": 0.3, "avoid_weight": 0.7}
+
+    def __init__(self, n, params=None):
+        super().__init__(n, params)
+        self.stop_steps = np.zeros(n, dtype=int)
+
+    def step(self, pos, peds):
+        p = self.p
+        goal_x, goal_y, dist_goal = self._goal(pos)
+        active = dist_goal > p["arrive_eps"]
+
+        ped = peds[:, 0]
+        dxp = ped[:, 0] - pos[:, 0]
+        dyp = ped[:, 1] - pos[:, 1]
+        dist_ped = np.hypot(dxp, dyp)
+        vel = self._track(peds)[:, 0]
+        dir_x, dir_y = goal_x, goal_y
+
+        waiting = active & (self.stop_steps > 0)
+        self.stop_steps = np.where(waiting, self.stop_steps - 1, self.stop_steps)
+        dir_x = np.where(waiting, 0.0, dir_x)
+        dir_y = np.where(waiting, 0.0, dir_y)
+
+        react = active & ~waiting & (dist_ped < p["avoid_radius"]) & self.tracker.ready[:, 0]
+        vpx, vpy = vel[:, 0], vel[:, 1]
+        vlen = np.hypot(vpx, vpy)
+        moving = vlen > p["moving_speed"]
+        fast = react & moving & (vlen > p["fast_speed"])
+        slow = react & moving & ~(vlen > p["fast_speed"])
+        still = react & ~moving
+
+        safe = np.where(vlen > 0.0, vlen, 1.0)
+        side_x, side_y, _ = _unit(-dyp, dxp)
+        dodge_x = np.where(slow, -vpx / safe, side_x)
+        dodge_y = np.where(slow, -vpy / safe, side_y)
+        blend = slow | still
+        dir_x = np.where(blend, p["goal_weight"] * goal_x + p["avoid_weight"] * dodge_x, dir_x)
+        dir_y = np.where(blend, p["goal_weight"] * goal_y + p["avoid_weight"] * dodge_y, dir_y)
+        dir_x = np.where(fast, 0.0, dir_x)
+        dir_y = np.where(fast, 0.0, dir_y)
+        self.stop_steps = np.where(fast, p["stop_duration"].astype(int), self.stop_steps)
+        self._mode(active, (waiting | fast, "stop"), (blend, "dodge"))
+
+        dir_x, dir_y, norm = _unit(dir_x, dir_y)
+        return dir_x, dir_y, active, active & (norm > 1e-6)
+
+
+# === M-series ===
+class MPolicy(Policy):
+    def _goal(self, pos):
+        dx, dy, dist_goal = self._to_goal(pos)
+        gx, gy = _norm(dx, dy)
+        return gx, gy, dist_goal
+
+
+class AgentM6Policy(MPolicy):
+    # M6_Agent.py
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "goal_eps": 0.05, "avoid_radius": 0.6}
+
+    def step(self, pos, peds):
+        p = self.p
+        gx, gy, dist_goal = self._goal(pos)
+        active = ~(dist_goal < p["goal_eps"])
+        ax, ay = pos[:, 0], pos[:, 1]
+        d = np.hypot(peds[..., 0] - ax[:, None], peds[..., 1] - ay[:, None])
+        d1, d2, d3 = d[:, 0], d[:, 1], d[:, 2]
+        vel = self._track(peds, active)
+
+        R = p["avoid_radius"]
+        c3 = d3 < R
+        c12 = ~c3 & (d1 < R) & (d2 < R)
+        c1 = ~c3 & ~c12 & (d1 < R)
+        c2 = ~c3 & ~c12 & ~c1 & (d2 < R)
+
+        dir_x, dir_y = gx, gy
+        side3 = _side(peds[:, 2, 1], ay)
+        dir_x = np.where(c3, 0.5 * gx + 0.5 * 0.0, dir_x)
+        dir_y = np.where(c3, 0.5 * gy + 0.5 * side3, dir_y)
+
+        w1 = 1.0 / np.maximum(d1, 1e-3)
+        w2 = 1.0 / np.maximum(d2, 1e-3)
+        sum_vx = w1 * vel[:, 0, 0] + w2 * vel[:, 1, 0]
+        sum_vy = w1 * vel[:, 0, 1] + w2 * vel[:, 1, 1]
+        avx, avy = _norm(-sum_vy, sum_vx)
+        dir_x = np.where(c12, 0.5 * gx + 0.5 * avx, dir_x)
+        dir_y = np.where(c12, 0.5 * gy + 0.5 * avy, dir_y)
+
+        # Single-pedestrian branches use gx for dir_y, exactly as M6_Agent.py does
+        for mask, col in ((c1, 0), (c2, 1)):
+            side = _side(peds[:, col, 1], ay)
+            dir_x = np.where(mask, 0.6 * gx + 0.4 * 0.0, dir_x)
+            dir_y = np.where(mask, 0.6 * gx + 0.4 * side, dir_y)
+        self._mode(active, (c3, "dodge_static"), (c12, "dodge_flow"), (c1 | c2, "dodge"))
+
+        dir_x, dir_y = _norm(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class AgentM5M6Policy(AgentM6Policy):
+    # M6_Agent_M5upgrade.py (as run there, dodge_angle_deg=30)
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "goal_eps": 0.05, "avoid_radius": 0.5,
+              "dodge_angle_deg": 30.0}
+
+    def step(self, pos, peds):
+        p = self.p
+        gx, gy, dist_goal = self._goal(pos)
+        active = ~(dist_goal < p["goal_eps"])
+        ax, ay = pos[:, 0], pos[:, 1]
+        d = np.hypot(peds[..., 0] - ax[:, None], peds[..., 1] - ay[:, None])
+        d1, d2, d3 = d[:, 0], d[:, 1], d[:, 2]
+        vel = self._track(peds, active)
+
+        R = p["avoid_radius"]
+        c3 = d3 < R
+        c12 = ~c3 & (d1 < R) & (d2 < R)
+        c1 = ~c3 & ~c12 & (d1 < R)
+        c2 = ~c3 & ~c12 & ~c1 & (d2 < R)
+
+        dir_x, dir_y = gx, gy
+        side3 = _side(peds[:, 2, 1], ay)
+        dir_x = np.where(c3, 0.5 * gx + 0.5 * 0.0, dir_x)
+        dir_y = np.where(c3, 0.5 * gy + 0.5 * side3, dir_y)
+
+        # Both near: opposite flows pick the nearer one, otherwise biased velocity sum
+        v1x, v1y = _norm(vel[:, 0, 0], vel[:, 0, 1])
+        v2x, v2y = _norm(vel[:, 1, 0], vel[:, 1, 1])
+        opposite = c12 & (v1x * v2x + v1y * v2y < -0.5)
+        blended = c12 & ~opposite
+        near_y = np.where(d1 < d2, peds[:, 0, 1], peds[:, 1, 1])
+        side = _side(near_y, ay)
+        dir_x = np.where(opposite, 0.5 * gx + 0.5 * 0.0, dir_x)
+        dir_y = np.where(opposite, 0.5 * gy + 0.5 * side, dir_y)
+
+        w1 = 1.0 / np.maximum(d1, 1e-3)
+        w2 = 1.0 / np.maximum(d2, 1e-3)
+        sum_vx = w1 * vel[:, 0, 0] + w2 * vel[:, 1, 0]
+        sum_vy = w1 * vel[:, 0, 1] + w2 * vel[:, 1, 1]
+        avx, avy = _norm(-sum_vy, sum_vx)
+        theta = np.radians(p["dodge_angle_deg"])
+        cos_t, sin_t = np.cos(theta), np.sin(theta)
+        rx = avx * cos_t - avy * sin_t
+        ry = avx * sin_t + avy * cos_t
+        dir_x = np.where(blended, 0.5 * gx + 0.5 * rx, dir_x)
+        dir_y = np.where(blended, 0.5 * gy + 0.5 * ry, dir_y)
+
+        for mask, col in ((c1, 0), (c2, 1)):
+            side = _side(peds[:, col, 1], ay)
+            dir_x = np.where(mask, 0.6 * gx + 0.4 * 0.0, dir_x)
+            dir_y = np.where(mask, 0.6 * gy + 0.4 * side, dir_y)
+        self._mode(active, (c3, "dodge_static"), (opposite, "dodge"), (blended, "dodge_flow"), (c1 | c2, "dodge"))
+
+        dir_x, dir_y = _norm(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class AgentM7Policy(MPolicy):
+    # M7_Agent.py: Ped2 focus -> flee state machine, then Ped3 overtake, then Ped1 head-on
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "goal_eps": 0.05,
+              "avoid_radius": 0.35, "cross_radius": 0.6, "flee_shift": 0.07}
+
+    def __init__(self, n, params=None):
+        super().__init__(n, params)
+        self.focus = np.zeros(n, dtype=bool)
+        self.flee = np.zeros(n, dtype=bool)
+        self.start_y = np.zeros(n)
+        self.dodge_y = np.zeros(n)
+
+    def step(self, pos, peds):
+        p = self.p
+        gx, gy, dist_goal = self._goal(pos)
+        active = ~(dist_goal < p["goal_eps"])
+        ax, ay = pos[:, 0], pos[:, 1]
+        d = np.hypot(peds[..., 0] - ax[:, None], peds[..., 1] - ay[:, None])
+        d1, d2, d3 = d[:, 0], d[:, 1], d[:, 2]
+        R, C = p["avoid_radius"], p["cross_radius"]
+        dir_x, dir_y = gx, gy
+
+        # Priority 1: Ped2 crossing
+        crossing = active & ((d2 < C) | self.focus | self.flee)
+        enter = crossing & ~self.focus & ~self.flee
+        self.focus = self.focus | enter
+        self.start_y = np.where(enter, ay, self.start_y)
+        self.dodge_y = np.where(enter, _side(peds[:, 1, 1], ay), self.dodge_y)
+
+        focus = crossing & self.focus
+        dir_x = np.where(focus, 0.0, dir_x)
+        dir_y = np.where(focus, self.dodge_y, dir_y)
+        switch = focus & (np.abs(ay - self.start_y) >= p["flee_shift"])
+        self.focus = self.focus & ~switch
+        self.flee = self.flee | switch
+
+        fleeing = crossing & ~focus & self.flee
+        clear = fleeing & (d1 >= R) & (d3 >= R)
+        fx, fy = _norm(ax - peds[:, 1, 0], ay - peds[:, 1, 1])
+        dir_x = np.where(clear, fx, dir_x)
+        dir_y = np.where(clear, fy, dir_y)
+        self.flee = self.flee & ~(clear & (d2 > C)) & ~(fleeing & ~clear)
+
+        # Priority 2: Ped3 overtaking (only when ahead)
+        overtake = active & ~crossing & (d3 < R) & (peds[:, 2, 0] < ax)
+        dir_x = np.where(overtake, 0.4 * gx + 0.6 * 0.0, dir_x)
+        dir_y = np.where(overtake, 0.4 * gy + 0.6 * _side(peds[:, 2, 1], ay), dir_y)
+
+        # Priority 3: Ped1 head-on
+        headon = active & ~crossing & ~overtake & (d1 < R)
+        dir_x = np.where(headon, 0.5 * gx + 0.5 * 0.0, dir_x)
+        dir_y = np.where(headon, 0.5 * gy + 0.5 * _side(peds[:, 0, 1], ay), dir_y)
+        self._mode(active, (focus, "focus"), (clear, "flee"), (overtake, "overtake"), (headon, "dodge"))
+
+        dir_x, dir_y = _norm(dir_x, dir_y)
+        return dir_x, dir_y, active, active
+
+
+class RolloutPolicy(MPolicy):
+    # DWA_Agent.py; planner settings are passed through to rollout.RolloutPlanner
+    PARAMS = {"destination": (-2.0, 0.0), "speed": SPEED, "goal_eps": 0.05}
+    PLANNER = ("headings", "spread", "speed_fractions", "horizon", "body_radius", "clearance",
+               "progress_weight", "clearance_weight", "smooth_weight")
+
+    def __init__(self, n, params=None):
+        params = dict(params or {})
+        planner = {name: params.pop(name) for name in self.PLANNER if name in params}
+        super().__init__(n, params)
+        self.planner = RolloutPlanner(float(self.p["speed"]), **planner)
+        self.heading = np.full(n, scenarios.AGENT_ROTATION[3])
+
+    def step(self, pos, peds):
+        p = self.p
+        _, _, dist_goal = self._goal(pos)
+        active = ~(dist_goal < p["goal_eps"])
+        vel = self._track(peds, active)
+
+        dest = np.broadcast_to(p["destination"], pos.shape)
+        dir_x, dir_y, best = self.planner.plan(pos, dest, peds, vel, self.heading)
+        moving = active & (self.planner.speeds[best] > 0)
+        self.heading = np.where(moving, np.arctan2(dir_y, dir_x), self.heading)
+        speeds = self.planner.speeds[best]
+        straight = (np.abs(self.planner.offsets[best]) < 1e-9) & (speeds == self.planner.speed)
+        self._mode(active, (speeds == 0.0, "stop"), (~straight, "dodge"))
+        return dir_x, dir_y, active, moving
+
+
+# Agent script -> (policy, parameter overrides matching that script's literals)
+POLICIES = {
+    "S1.py": (PerpendicularDodge, {}),
+    "S2_Agent.py": (PerpendicularDodge, {"goal_weight": 0.45, "avoid_weight": 0.55}),
+    "S3_Agent.py": (PerpendicularDodge, {"goal_weight": 0.3, "avoid_weight": 0.8}),
+    "S4_Agent.py": (OvertakeDodge, {}),
+    "S5_Agent_FullVelocity.py": (VelocityDodge, {}),
+    "S5_Agent_Wait.py": (WaitDodge, {}),
+    "S5_Agent_Hybrid.py": (HybridDodge, {}),
+    "M6_Agent.py": (AgentM6Policy, {}),
+    "M6_Agent_M5upgrade.py": (AgentM5M6Policy, {}),
+    "M7_Agent.py": (AgentM7Policy, {}),
+    "DWA_Agent.py": (RolloutPolicy, {}),
+}
+
+
+def make_policy(agent, n, params=None):
+    cls, defaults = POLICIES[os.path.basename(agent)]
+    return cls(n, dict(defaults, **(params or {})))
+
+
+class BatchEngine:
+    def __init__(self, scenario, n, agent=None, params=None, agent_start=None,
+                 ped_starts=None, ped_overrides=None, peds=None):
+        self.scenario = scenario
+        self.n = n
+        self.agent = agent or scenarios.CONTROLLERS[scenario][-1][0]
+        self.policy = make_policy(self.agent, n, params)
+        start = scenarios.AGENT_START[:2] if agent_start is None else agent_start
+        self.pos = np.array(np.broadcast_to(np.asarray(start, dtype=float), (n, 2)))
+        self.yaw = np.full(n, scenarios.AGENT_ROTATION[3])
+        if peds is None:
+            peds = pedmotion.for_scenario(scenario, n, starts=ped_starts, overrides=ped_overrides)
+        self.peds = peds          # MotionTable, or a ped_cache.Replay of precomputed tracks
+        self.steps = 0
+        self.arrival_step = np.full(n, -1)
+        self.dir = np.zeros((n, 2))
+        # Collisions, clearance, mode time, path overhead (safety_metrics.py), always on
+        eps = self.policy.p.get("arrive_eps", self.policy.p.get("goal_eps", 0.0))
+        self.metrics = SafetyMetrics(n, self.peds.pos.shape[1], self.pos, self.policy.p["destination"],
+                                     arrive_eps=eps, dt=Policy.DT)
+
+    def step(self):
+        # Same order as cosim.py: pedestrians move, then the agent reacts
+        self.peds.step()
+        self.steps += 1
+        dir_x, dir_y, moved, turned = self.policy.step(self.pos, self.peds.pos)
+        speed = self.policy.p["speed"]
+        self.pos[:, 0] = np.where(moved, self.pos[:, 0] + dir_x * speed, self.pos[:, 0])
+        self.pos[:, 1] = np.where(moved, self.pos[:, 1] + dir_y * speed, self.pos[:, 1])
+        self.yaw = np.where(turned, np.arctan2(dir_y, dir_x), self.yaw)
+        self.dir[:, 0] = np.where(moved, dir_x, 0.0)
+        self.dir[:, 1] = np.where(moved, dir_y, 0.0)
+        self.arrival_step = np.where((self.arrival_step < 0) & ~moved, self.steps, self.arrival_step)
+        self.metrics.update(self.pos, self.peds.pos, self.policy.mode, self.arrival_step >= 0)
+
+    def run(self, steps, callback=None):
+        for _ in range(steps):
+            self.step()
+            if callback is not None:
+                callback(self)
+        return {"pos": self.pos.copy(), "yaw": self.yaw.copy(), "arrival_step": self.arrival_step.copy(),
+                "metrics": self.metrics.result()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many episodes of a scenario at once")
+    parser.add_argument("scenario", choices=sorted(scenarios.CONTROLLERS))
+    parser.add_argument("--agent", help="agent script, defaults to the scenario's agent")
+    parser.add_argument("--episodes", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = BatchEngine(args.scenario, args.episodes, agent=args.agent)
+    start = time.perf_counter()
+    result = engine.run(args.steps)
+    elapsed = time.perf_counter() - start
+
+    arrived = result["arrival_step"] >= 0
+    print(f"{engine.agent}: {arrived.sum()}/{args.episodes} arrived", end="")
+    if arrived.any():
+        print(f", mean arrival step {result['arrival_step'][arrived].mean():.1f}", end="")
+    print()
+    safety = engine.metrics.summary()
+    print(f"collisions in {safety['collision_rate']:.1%} of episodes, min distance {safety['min_distance']:.3f} m, "
+          f"mean path overhead {safety['mean_path_overhead']:.1%}")
+    total = args.episodes * args.steps
+    print(f"{total} episode-steps in {elapsed:.3f}s ({total / max(elapsed, 1e-9):.0f} episode-steps/s)")
+
+
+if __name__ == "__main__":
+    main()
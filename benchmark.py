@@ -0,0 +1,242 @@
+# benchmark.py
+# Per-step latency benchmark for every agent controller on the headless
+# backend. Each agent runs in its own subprocess (so peak memory is its own)
+# under cosim.py together with its pedestrians; only the agent's turn is
+# timed, split into sense (field/recognition reads), act (field writes) and
+# decide (the rest). Agents stop at arrival, so short episodes are repeated
+# until --steps agent steps have been timed; the sample count is reported.
+# Safety metrics (safety_metrics.py) of the same run are reported next to
+# the timings. Results go to a JSON file for review diffs:
+#   python benchmark.py --steps 1000 --out benchmark_results.json
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import batch
+import cosim
+import headless
+import scenarios
+from safety_metrics import SafetyMetrics
+
+BENCHMARKS = [
+    ("S1", "S1.py"),
+    ("S2", "S2_Agent.py"),
+    ("S3", "S3_Agent.py"),
+    ("S4", "S4_Agent.py"),
+    ("S5", "S5_Agent_FullVelocity.py"),
+    ("S5", "S5_Agent_Wait.py"),
+    ("S5", "S5_Agent_Hybrid.py"),
+    ("M6", "M6_Agent.py"),
+    ("M6", "M6_Agent_M5upgrade.py"),
+    ("M7", "M7_Agent.py"),
+    ("M7", "DWA_Agent.py"),
+    ("M7", "SpaceTime_Agent.py"),
+]
+
+SENSE = [(headless.Field, "getSFVec3f"), (headless.Field, "getSFRotation"),
+         (headless.Camera, "getImage"), (headless.Camera, "getRecognitionObjects")]
+ACT = [(headless.Field, "setSFVec3f"), (headless.Field, "setSFRotation")]
+
+
+class Probe:
+    # Accumulates time spent in API calls while the agent has the turn
+    def __init__(self):
+        self.active = False
+        self.sense = 0.0
+        self.act = 0.0
+        self._saved = []
+
+    def _wrap(self, cls, name, bucket):
+        fn = getattr(cls, name)
+        clock = time.perf_counter
+        probe = self
+
+        def timed(*args):
+            if not probe.active:
+                return fn(*args)
+            t = clock()
+            try:
+                return fn(*args)
+            finally:
+                setattr(probe, bucket, getattr(probe, bucket) + clock() - t)
+
+        self._saved.append((cls, name, fn))
+        setattr(cls, name, timed)
+
+    def install(self):
+        for cls, name in SENSE:
+            self._wrap(cls, name, "sense")
+        for cls, name in ACT:
+            self._wrap(cls, name, "act")
+
+    def uninstall(self):
+        for cls, name, fn in reversed(self._saved):
+            setattr(cls, name, fn)
+        self._saved = []
+
+
+class TimedScheduler(cosim.Scheduler):
+    def __init__(self, world, controllers, steps):
+        super().__init__(world, controllers)
+        self.agent_slot = self.slots[-1]
+        self.probe = Probe()
+        self.total = np.zeros(steps)
+        self.sense = np.zeros(steps)
+        self.act = np.zeros(steps)
+        self.count = 0
+        self._t0 = None
+
+    def _sync(self, supervisor, duration):
+        timed = cosim._local.slot is self.agent_slot
+        if timed and self._t0 is not None and self.count < len(self.total):
+            self.total[self.count] = time.perf_counter() - self._t0
+            self.sense[self.count] = self.probe.sense
+            self.act[self.count] = self.probe.act
+            self.count += 1
+        self.probe.active = False
+        reply = super()._sync(supervisor, duration)
+        if timed:
+            self.probe.sense = self.probe.act = 0.0
+            self.probe.active = True
+            self._t0 = time.perf_counter()
+        return reply
+
+    def step(self):
+        super().step()
+        if self.agent_slot.done:
+            # Nothing is timed after the agent returns, so the episode ends with it
+            self.world.max_steps = self.world.steps
+
+
+def _percentiles(samples):
+    us = samples * 1e6
+    return {"p50": float(np.percentile(us, 50)), "p99": float(np.percentile(us, 99)), "max": float(us.max())}
+
+
+def _destination(agent):
+    # From the agent's batch policy; the space-time agent defaults to (-2, 0) like the rest
+    if agent in batch.POLICIES:
+        return batch.make_policy(agent, 1).p["destination"]
+    return (-2.0, 0.0)
+
+
+def _watch(scheduler, scenario, agent):
+    # SafetyMetrics fed from the world after every step; the agent has arrived
+    # once its controller has returned
+    world = scheduler.world
+    agent_field = world.by_def["Agent"].getField("translation")
+    ped_fields = [world.by_def[name].getField("translation") for name in scenarios.SCENARIOS[scenario]]
+    metrics = SafetyMetrics(1, len(ped_fields), agent_field.getSFVec3f(), _destination(agent),
+                            arrive_eps=0.05, dt=world.basic_time_step / 1000.0)
+
+    def update(world):
+        peds = [field.getSFVec3f()[:2] for field in ped_fields]
+        metrics.update([agent_field.getSFVec3f()], [peds], arrived=[scheduler.agent_slot.done])
+
+    scheduler.after_step.append(update)
+    return metrics
+
+
+def run_one(scenario, agent, steps):
+    os.environ["DETECTION_LOG"] = "off"
+    os.environ.pop("TRAJECTORY_DIR", None)
+    # Time every basic time step, and keep the agent's world position current for the metrics
+    os.environ["CRUISE"] = "0"
+
+    # Agents stop stepping once they arrive, so the episode is run again until
+    # `steps` agent steps have been timed; safety metrics are the first run's
+    timed = {"total": [], "sense": [], "act": []}
+    samples = world_steps = episodes = 0
+    elapsed = 0.0
+    safety = None
+    while samples < steps:
+        world = scenarios.build_world(scenario, max_steps=steps)
+        scheduler = TimedScheduler(world, scenarios.controllers(scenario, agent), steps - samples)
+        metrics = _watch(scheduler, scenario, agent) if safety is None else None
+        scheduler.probe.install()
+        start = time.perf_counter()
+        scheduler.run(quiet=True)
+        elapsed += time.perf_counter() - start
+        scheduler.probe.uninstall()
+
+        n = scheduler.count
+        for name in timed:
+            timed[name].append(getattr(scheduler, name)[:n])
+        samples += n
+        world_steps += world.steps
+        episodes += 1
+        if safety is None:
+            safety = metrics.summary()
+            del safety["mode_share"]      # modes are only known inside the controller
+        if n == 0:
+            break
+    total, sense, act = (np.concatenate(timed[name]) for name in ("total", "sense", "act"))
+    decide = np.maximum(total - sense - act, 0.0)
+
+    # Second, shorter pass under tracemalloc for the Python heap peak
+    tracemalloc.start()
+    world = scenarios.build_world(scenario, max_steps=min(steps, 2000))
+    cosim.Scheduler(world, scenarios.controllers(scenario, agent)).run(quiet=True)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "scenario": scenario,
+        "agent": agent,
+        "samples": int(samples),
+        "episodes": episodes,
+        "world_steps": int(world_steps),
+        "steps_per_s": world_steps / elapsed,
+        "latency_us": {"total": _percentiles(total), "sense": _percentiles(sense),
+                       "decide": _percentiles(decide), "act": _percentiles(act)},
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_traced_kb": traced_peak / 1024.0,
+        "safety": safety,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-step latency of every agent controller")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--agents", nargs="*", help="agent scripts to run (default: all)")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--one", nargs=2, metavar=("SCENARIO", "AGENT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        json.dump(run_one(args.one[0], args.one[1], args.steps), sys.stdout)
+        return
+
+    results = []
+    for scenario, agent in BENCHMARKS:
+        if args.agents and agent not in args.agents:
+            continue
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--steps", str(args.steps),
+                              "--one", scenario, agent], capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout)
+        results.append(result)
+        lat = result["latency_us"]["total"]
+        print(f"{agent:26s} {result['steps_per_s']:9.0f} steps/s  {result['samples']:6d} samples  p50 {lat['p50']:7.1f}us  "
+              f"p99 {lat['p99']:7.1f}us  max {lat['max']:8.1f}us  rss {result['peak_rss_kb'] / 1024:.1f}MB  "
+              f"collisions {result['safety']['collisions']}  min distance {result['safety']['min_distance']:.3f}m")
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "machine": platform.machine(), "steps": args.steps,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# camera_access.py
+# Decimated camera access for the agent controllers. The camera runs at its
+# own sampling period instead of every basic time step, recognition results
+# are read without pulling the image through the controller API, and frames
+# (only when asked for) come back as a NumPy view over the BGRA buffer.
+import numpy as np
+
+
+class CameraSampler:
+    def __init__(self, camera, timestep, period=None, frames=0):
+        # period: ms between samples, rounded to a multiple of timestep
+        # frames: size of the ring that capture() copies frames into (0 = none)
+        self.camera = camera
+        self.every = max(1, round((period or timestep) / timestep))
+        self.period = self.every * int(timestep)
+        self.step = 0
+        self.width = camera.getWidth()
+        self.height = camera.getHeight()
+        camera.enable(self.period)
+        camera.recognitionEnable(self.period)
+
+        self.ring = np.zeros((frames, self.height, self.width, 4), dtype=np.uint8) if frames else None
+        self.ring_steps = np.full(frames, -1, dtype=np.int64)
+        self.captured = 0
+
+    def due(self):
+        # Call once per control step; True on steps where the camera has a new sample
+        self.step += 1
+        return (self.step - 1) % self.every == 0
+
+    def skip(self, steps):
+        # Steps the agent slept through (cruise.py): no samples, schedule kept
+        self.step += steps
+
+    def recognition(self):
+        return self.camera.getRecognitionObjects()
+
+    def frame(self):
+        # (height, width, 4) uint8 BGRA view over the buffer getImage() returned; no copy
+        image = self.camera.getImage()
+        if not image:
+            return None
+        return np.frombuffer(image, dtype=np.uint8).reshape(self.height, self.width, 4)
+
+    def capture(self):
+        # Copy the current frame into the preallocated ring
+        view = self.frame()
+        if view is None or self.ring is None:
+            return None
+        slot = self.captured % len(self.ring)
+        np.copyto(self.ring[slot], view)
+        self.ring_steps[slot] = self.step
+        self.captured += 1
+        return self.ring[slot]
+
+    def frames(self):
+        # Captured frames oldest first, with the step each was taken at
+        if self.ring is None or not self.captured:
+            return np.zeros((0, self.height, self.width, 4), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+        n = min(self.captured, len(self.ring))
+        order = (np.arange(n) + self.captured - n) % len(self.ring)
+        return self.ring[order], self.ring_steps[order]
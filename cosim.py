@@ -0,0 +1,150 @@
+# cosim.py
+# Runs all controllers of a scenario in one process on a headless world.
+# Every controller script keeps its own `while robot.step(timestep) != -1`
+# loop; each one runs in a thread, but only one thread runs at a time and the
+# scheduler hands out turns in a fixed order, once per simulated step:
+#   python cosim.py M7 --steps 3000 --quiet
+import argparse
+import os
+import runpy
+import sys
+import threading
+import time
+
+import headless
+import scenarios
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_local = threading.local()
+
+
+class _Slot:
+    def __init__(self, script, self_def, args=()):
+        self.script = script
+        self.self_def = self_def
+        self.args = list(args)
+        self.resume = threading.Semaphore(0)
+        self.reply = 0
+        self.wake_step = 0
+        self.done = False
+        self.error = None
+        self.thread = None
+
+
+class Scheduler:
+    def __init__(self, world, controllers):
+        self.world = world
+        self.slots = [_Slot(os.path.join(HERE, entry[0]), *entry[1:]) for entry in controllers]
+        self._yielded = threading.Semaphore(0)
+        self.after_step = []      # callbacks(world) run once all controllers have moved
+
+    # === Controller side (runs in the controller thread) ===
+    def _sync(self, supervisor, duration):
+        slot = _local.slot
+        if self.world.finished():
+            return -1
+        slot.wake_step = self.world.steps + max(1, int(duration) // self.world.basic_time_step)
+        self._yielded.release()
+        slot.resume.acquire()
+        return slot.reply
+
+    def _main(self, slot):
+        _local.slot = slot
+        # Webots passes controllerArgs in sys.argv; scripts read it before their first step
+        sys.argv = [slot.script] + slot.args
+        try:
+            runpy.run_path(slot.script, run_name="__main__")
+        except SystemExit:
+            pass
+        except BaseException as exc:
+            slot.error = exc
+        finally:
+            slot.done = True
+            self._yielded.release()
+
+    # === Scheduler side ===
+    def _wait(self, slot):
+        self._yielded.acquire()
+        if slot.error is not None:
+            raise RuntimeError(f"controller {os.path.basename(slot.script)} failed") from slot.error
+
+    def _resume(self, slot, reply):
+        slot.reply = reply
+        slot.resume.release()
+        self._wait(slot)
+
+    def start(self):
+        headless.install()
+        self.world.sync = self._sync
+        for slot in self.slots:
+            # Run each script up to its first step() so Supervisor() binds to the right node
+            headless.bind(self.world, slot.self_def)
+            slot.thread = threading.Thread(target=self._main, args=(slot,), daemon=True,
+                                           name=os.path.basename(slot.script))
+            slot.thread.start()
+            self._wait(slot)
+
+    def step(self):
+        self.world.steps += 1
+        for slot in self.slots:
+            if not slot.done and slot.wake_step <= self.world.steps:
+                self._resume(slot, 0)
+        for callback in self.after_step:
+            callback(self.world)
+
+    def stop(self):
+        for slot in self.slots:
+            if not slot.done:
+                self._resume(slot, -1)
+        self.world.sync = None
+
+    def run(self, quiet=False):
+        # Each script gets its own sys.argv (_main); the caller's comes back at the end
+        argv = sys.argv
+        with headless.silenced(quiet):
+            try:
+                self.start()
+                while not self.world.finished() and not all(slot.done for slot in self.slots):
+                    self.step()
+            finally:
+                self.stop()
+                sys.argv = argv
+
+
+def run_scenario(name, steps, agent=None, quiet=True, crowd=False, step_ms=scenarios.BASIC_TIME_STEP):
+    world = scenarios.build_world(name, max_steps=steps, basic_time_step=step_ms)
+    scheduler = Scheduler(world, scenarios.controllers(name, agent, crowd=crowd))
+    scheduler.run(quiet=quiet)
+    return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a whole scenario in one process")
+    parser.add_argument("scenario", help="scenario name, or CROWD<n> for a generated crowd of n pedestrians")
+    parser.add_argument("--agent", help="agent script replacing the scenario default")
+    parser.add_argument("--crowd", action="store_true", help="drive all pedestrians from crowd_driver.py")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--step-ms", type=int, default=scenarios.BASIC_TIME_STEP,
+                        help="basicTimeStep of the world; coarser steps give the same motion (see units.py)")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    if args.scenario.startswith("CROWD") and args.scenario not in scenarios.CONTROLLERS:
+        scenarios.add_crowd(args.scenario, int(args.scenario[len("CROWD"):]))
+    if args.scenario not in scenarios.CONTROLLERS:
+        parser.error(f"unknown scenario {args.scenario}")
+
+    start = time.perf_counter()
+    world = run_scenario(args.scenario, args.steps, args.agent, quiet=args.quiet, crowd=args.crowd,
+                         step_ms=args.step_ms)
+    elapsed = time.perf_counter() - start
+
+    for node in world.nodes:
+        x, y, z = node.fields["translation"]._value
+        print(f"{node.def_name}: ({x:.3f}, {y:.3f}, {z:.3f})")
+    print(f"{world.steps} steps in {elapsed:.3f}s ({world.steps / max(elapsed, 1e-9):.0f} steps/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# cpa.py
+# Closest point of approach between the agent and every pedestrian, assuming
+# both keep their current velocity: TCPA (time until closest approach, 0 if
+# they are already separating) and DCPA (distance at that moment), for all
+# pedestrians in one NumPy pass.
+#
+# CpaTrigger turns them into an avoidance trigger that can replace the
+# `distance < radius` test of the agent scripts: a pedestrian is a threat if
+# it will pass within the radius in the next `horizon` seconds, or is already
+# inside the smaller contact radius. Agents enable it with AVOID_TRIGGER=cpa
+# (CPA_HORIZON=<seconds>, default 1.5); otherwise for_controller() returns
+# None and the scripts keep their distance test.
+import os
+
+import numpy as np
+
+from tracker import Tracker
+
+
+def closest_approach(rel_pos, rel_vel):
+    # rel_pos, rel_vel: (..., 2) pedestrian relative to the agent -> tcpa, dcpa (...)
+    rel_pos = np.asarray(rel_pos, dtype=float)
+    rel_vel = np.asarray(rel_vel, dtype=float)
+    vv = (rel_vel * rel_vel).sum(axis=-1)
+    rv = (rel_pos * rel_vel).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tcpa = np.where(vv > 1e-12, np.maximum(-rv / vv, 0.0), 0.0)
+    closest = rel_pos + rel_vel * tcpa[..., None]
+    return tcpa, np.hypot(closest[..., 0], closest[..., 1])
+
+
+def rank(tcpa, dcpa, radius):
+    # Indices of pedestrians that will pass within radius, soonest first
+    idx = np.flatnonzero(dcpa < radius)
+    return idx[np.argsort(tcpa[idx], kind="stable")]
+
+
+class CpaTrigger:
+    def __init__(self, radius, dt, horizon=1.5, contact=None):
+        self.radius = radius
+        self.horizon = horizon
+        self.contact = radius / 2 if contact is None else contact
+        self.dt = dt
+        # The agent's velocity is its last displacement; pedestrians are filtered
+        self.agent = Tracker((1,), dt, gains=(1.0, 1.0))
+        self.peds = None
+        self.tcpa = self.dcpa = self.dist = None
+
+    @classmethod
+    def for_controller(cls, name, radius, dt, **kwargs):
+        trigger = os.environ.get("AVOID_TRIGGER", "distance")
+        if trigger == "distance":
+            return None
+        if trigger != "cpa":
+            raise ValueError(f"{name}: unknown AVOID_TRIGGER {trigger!r} (distance or cpa)")
+        kwargs.setdefault("horizon", float(os.environ.get("CPA_HORIZON", 1.5)))
+        return cls(radius, dt, **kwargs)
+
+    def near(self, agent_pos, ped_pos, ped_vel=None):
+        # Threat mask over pedestrians; ped_vel (m/s) if the caller already tracks them
+        ped_pos = np.asarray(ped_pos, dtype=float)[..., :2]
+        self.agent.update(np.asarray(agent_pos, dtype=float)[None, :2])
+        if ped_vel is None:
+            if self.peds is None:
+                self.peds = Tracker(ped_pos.shape[:-1], self.dt)
+            ped_vel = self.peds.update(ped_pos)[1]
+
+        rel_pos = ped_pos - self.agent.pos[0]
+        self.dist = np.hypot(rel_pos[..., 0], rel_pos[..., 1])
+        self.tcpa, self.dcpa = closest_approach(rel_pos, ped_vel - self.agent.vel[0])
+        approaching = (self.tcpa > 0) & (self.tcpa <= self.horizon)
+        return (self.dist < self.contact) | (approaching & (self.dcpa < self.radius))
+
+    def ranking(self):
+        # Pedestrians on a close pass from the last near() call, soonest first
+        return rank(self.tcpa, self.dcpa, self.radius)
@@ -0,0 +1,48 @@
+# crowd_driver.py
+# One supervisor controller that moves every pedestrian of a world, replacing
+# the per-pedestrian Ped*.py controllers. Attach it to DEF WorldSupervisor and
+# give the scenario name as controllerArgs (or CROWD_SCENARIO); the motion of
+# each pedestrian comes from scenarios.PED_MOTION and is stepped for all of
+# them at once by pedmotion.MotionTable. Static pedestrians are never written.
+from controller import Supervisor
+import os
+import sys
+
+import pedmotion
+import scenarios
+
+class CrowdDriver(Supervisor):
+    def __init__(self, scenario):
+        super().__init__()
+        self.dt = int(self.getBasicTimeStep())
+
+        motion = scenarios.PED_MOTION[scenario]
+        self.defs = list(motion)
+        self.fields = []
+        starts = []
+        for def_name in self.defs:
+            node = self.getFromDef(def_name)
+            if node is None:
+                raise RuntimeError(f"Could not find DEF {def_name}. Make sure the pedestrian has `DEF {def_name}` in the world.")
+            field = node.getField("translation")
+            self.fields.append(field)
+            starts.append(field.getSFVec3f())
+
+        # Heights stay where the world file put them; only X/Y are driven
+        self.z = [p[2] for p in starts]
+        self.table = pedmotion.MotionTable([motion[d] for d in self.defs], [p[:2] for p in starts], step_ms=self.dt)
+        self.moving = [c for c, d in enumerate(self.defs) if motion[d]["kind"] != "static"]
+
+    def run(self):
+        while self.step(self.dt) != -1:
+            self.table.step()
+            pos = self.table.pos[0].tolist()
+            for c in self.moving:
+                x, y = pos[c]
+                self.fields[c].setSFVec3f([x, y, self.z[c]])
+
+scenario = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("CROWD_SCENARIO")
+if scenario is None:
+    raise RuntimeError("crowd_driver needs the scenario name as controllerArgs or CROWD_SCENARIO")
+controller = CrowdDriver(scenario)
+controller.run()
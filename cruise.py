@@ -0,0 +1,55 @@
+# cruise.py
+# Idle/cruise mode for the agents. With the distance trigger an agent only
+# leaves goal mode once a pedestrian is inside its radius, and no gap closes
+# faster than the agent's own speed plus MAX_PED_SPEED. So while the nearest
+# pedestrian is far away the next k steps are straight goal moves whatever the
+# pedestrians do: the agent sleeps through them with one step((1 + k) * dt)
+# call and replays the moves when it wakes, landing exactly where stepping
+# every basic time step would have put it. k also stops short of the arrival
+# radius. Nothing is sensed, recognised or logged while coasting; camera and
+# trajectory step counters skip over the gap.
+# Off by default, so the 3D view stays smooth (a coasting agent stands still
+# and then jumps); CRUISE=1 turns it on.
+import math
+import os
+
+from units import per_step
+
+MAX_PED_SPEED = 2.5   # m/s; no pedestrian in scenarios.py or fleet.py walks faster
+
+
+def enabled():
+    return os.environ.get("CRUISE", "0") == "1"
+
+
+def coast_steps(pos, destination, arrive_eps, clearance, radius, step_len, step_ms):
+    # Basic time steps the agent can sleep through. clearance: distance to the
+    # nearest pedestrian (inf if none); step_len: agent metres per basic time step
+    closing = step_len + per_step(MAX_PED_SPEED, step_ms)
+    dist_goal = math.hypot(destination[0] - pos[0], destination[1] - pos[1])
+    k = min((clearance - radius) / closing, (dist_goal - arrive_eps) / step_len - 1)
+    return max(0, math.floor(k - 1e-9))
+
+
+def replay(pos, destination, speed, moves, t_field, r_field):
+    # Apply `moves` goal moves of `speed` metres to pos, normalised the way the
+    # agents' goal mode does it, and put the agent there; returns the yaw
+    for _ in range(moves):
+        dx, dy = destination[0] - pos[0], destination[1] - pos[1]
+        dist = math.hypot(dx, dy)
+        dir_x, dir_y = dx / dist, dy / dist
+        norm = math.hypot(dir_x, dir_y)
+        dir_x, dir_y = dir_x / norm, dir_y / norm
+        pos[0] += dir_x * speed
+        pos[1] += dir_y * speed
+    yaw = math.atan2(dir_y, dir_x)
+    t_field.setSFVec3f(pos)
+    r_field.setSFRotation([0, 0, 1, yaw])
+    return yaw
+
+
+def skip(steps, *counters):
+    # Advance CameraSampler / TrajectoryRecorder step counters past a coast
+    for counter in counters:
+        if counter is not None:
+            counter.skip(steps)
@@ -0,0 +1,91 @@
+# detection_log.py
+# Buffered camera recognition log. Rows (step, id, cx, cy, w, h) go into a
+# preallocated structured array and are appended to a flat binary file once
+# the buffer fills up, instead of one print() per detected object per step.
+# Read a log back with detection_log.load(path). Off unless DETECTION_LOG asks
+# for a file or a summary; controllers close() their recorder when they finish.
+import atexit
+import os
+
+import numpy as np
+
+DTYPE = np.dtype([("step", "<u4"), ("id", "<i4"),
+                  ("cx", "<f4"), ("cy", "<f4"), ("w", "<f4"), ("h", "<f4")])
+
+
+class DetectionRecorder:
+    def __init__(self, path, capacity=4096, sample_every=1, summary=False):
+        self.path = path
+        self.sample_every = max(1, int(sample_every))
+        self.summary = summary
+        self.step = 0
+        self.calls = 0
+        self.buffer = np.zeros(capacity, dtype=DTYPE)
+        self.count = 0
+        self.stats = {}           # id -> [detections, first step, last step, sum w, sum h]
+        # Off recorders keep nothing; controllers skip reading recognition for them
+        self.enabled = path is not None or summary
+        if path is not None and not summary:
+            open(path, "wb").close()
+        if self.enabled:
+            # Fallback for runs cut short; a recorder with nothing to write needs none
+            atexit.register(self.close)
+
+    @classmethod
+    def for_controller(cls, name, **kwargs):
+        # DETECTION_LOG=<dir>, "summary" or "off" (default); DETECTION_LOG_EVERY=<n>
+        setting = os.environ.get("DETECTION_LOG", "off") or "off"
+        if "DETECTION_LOG_EVERY" in os.environ:
+            kwargs["sample_every"] = int(os.environ["DETECTION_LOG_EVERY"])
+        if setting == "off":
+            return cls(None, capacity=1, **kwargs)
+        if setting == "summary":
+            return cls(None, summary=True, **kwargs)
+        return cls(os.path.join(setting, f"{name}_detections.bin"), **kwargs)
+
+    def record(self, objects, step=None):
+        # Called with camera.getRecognitionObjects(), once per step unless step is given
+        self.calls += 1
+        self.step = self.step + 1 if step is None else step
+        if (self.calls - 1) % self.sample_every:
+            return
+        if self.summary:
+            for obj in objects:
+                w, h = obj.getSizeOnImage()
+                entry = self.stats.get(obj.getId())
+                if entry is None:
+                    self.stats[obj.getId()] = [1, self.step, self.step, w, h]
+                else:
+                    entry[0] += 1
+                    entry[2] = self.step
+                    entry[3] += w
+                    entry[4] += h
+            return
+        if self.path is None:
+            return
+        for obj in objects:
+            if self.count == len(self.buffer):
+                self.flush()
+            cx, cy = obj.getPositionOnImage()
+            w, h = obj.getSizeOnImage()
+            self.buffer[self.count] = (self.step, obj.getId(), cx, cy, w, h)
+            self.count += 1
+
+    def flush(self):
+        if self.count and self.path is not None:
+            with open(self.path, "ab") as f:
+                self.buffer[:self.count].tofile(f)
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        if self.summary and self.stats:
+            for obj_id, (n, first, last, sum_w, sum_h) in sorted(self.stats.items()):
+                print(f"[CAM] ID {obj_id}: {n} detections in steps {first}-{last}, "
+                      f"mean size=({sum_w / n:.1f},{sum_h / n:.1f})")
+            self.stats = {}
+        atexit.unregister(self.close)
+
+
+def load(path):
+    return np.fromfile(path, dtype=DTYPE)
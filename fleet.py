@@ -0,0 +1,175 @@
+# fleet.py
+# Many agents in one corridor, avoiding pedestrians and each other. Agent
+# state lives in (N, 2) arrays and one step moves every agent at once; all
+# neighbours within avoid_radius come from one spatial_index.UniformGrid
+# query for all agents at once, so a step costs about the same per agent for
+# 10 or 10 000 agents, and pedestrians only cost their own grid update.
+#
+# Each agent uses the M-series rules over all its close neighbours at once:
+# the side dodge (step sideways, away from the neighbour) summed with 1/distance
+# weights the way M6 weights a crossing flow, blended half-and-half with the
+# goal, and M7's flee (straight away) from anyone inside contact distance.
+# Avoidance is reciprocal: another agent dodges too, so agents carry half the
+# weight of a pedestrian (agent_weight). Agents walk the corridor end to end
+# and are sent back the other way on arrival; arrivals per minute is the
+# throughput.
+#   python fleet.py --agents 1000 --steps 1000
+import argparse
+import time
+
+import numpy as np
+
+import pedmotion
+import scenarios
+from spatial_index import UniformGrid
+from units import AGENT_SPEED, per_step, substeps
+
+
+def corridor_crowd(k, length, width, seed=0, step_ms=scenarios.BASIC_TIME_STEP):
+    # k pedestrians walking the corridor lengthwise (wrapping at the ends) or
+    # crossing it (bouncing off the walls), one episode
+    rng = np.random.default_rng(seed)
+    specs = []
+    for _ in range(k):
+        speed = rng.uniform(0.25, 1.5)      # m/s
+        if rng.random() < 0.7:
+            specs.append({"kind": "wrap", "axis": 0, "speed": speed, "lo": 0.0, "hi": length,
+                          "direction": rng.choice((-1, 1))})
+        else:
+            specs.append({"kind": "bounce", "axis": 1, "speed": speed, "lo": -width / 2, "hi": width / 2,
+                          "direction": rng.choice((-1, 1))})
+    starts = np.stack([rng.uniform(0.0, length, k), rng.uniform(-width / 2, width / 2, k)], axis=1)
+    return pedmotion.MotionTable(specs, starts, step_ms=step_ms)
+
+
+class Fleet:
+    def __init__(self, n, length=100.0, width=10.0, peds=200, speed=AGENT_SPEED, avoid_radius=0.6,
+                 agent_weight=0.5, body_radius=0.15, seed=0, step_ms=scenarios.BASIC_TIME_STEP):
+        self.n = n
+        self.length = length
+        self.half_width = width / 2
+        # Coarse steps run as substeps of at most the reference step (units.py)
+        self.step_ms = step_ms
+        self.n_sub = substeps(step_ms)
+        self.speed = per_step(speed, step_ms / self.n_sub)
+        self.avoid_radius = avoid_radius
+        self.agent_weight = agent_weight
+        self.body_radius = body_radius
+        self.rng = np.random.default_rng(seed)
+
+        # Agents spread along the corridor one per cell of a jittered grid, half
+        # of them heading each way
+        rows = max(1, int(round(np.sqrt(n * width / length))))
+        cols = -(-n // rows)
+        cell = np.array([length / cols, width / rows])
+        slots = self.rng.permutation(rows * cols)[:n]
+        self.pos = (np.stack([slots // rows, slots % rows], axis=1) + self.rng.uniform(0.25, 0.75, (n, 2))) * cell
+        self.pos[:, 1] -= self.half_width
+        self.heading = np.where(np.arange(n) % 2 == 0, 1.0, -1.0)       # +X or -X
+        self.goal = np.stack([np.where(self.heading > 0, length, 0.0), self.pos[:, 1]], axis=1)
+        self.dir = np.zeros((n, 2))
+
+        self.peds = corridor_crowd(peds, length, width, seed, step_ms / self.n_sub) if peds else None
+        self.grid = UniformGrid(avoid_radius)       # agents and pedestrians
+        self.steps = 0
+        self.arrivals = 0
+        # Pair-steps closer than two body radii, agent-agent (each pair once) and agent-pedestrian
+        self.contacts = 0
+        self.ped_contacts = 0
+        self.min_separation = np.inf        # between agents
+
+    def _neighbours(self):
+        # Pairs (agent i, neighbour j) within avoid_radius; j >= n are pedestrians
+        points = self.pos if self.peds is None else np.concatenate([self.pos, self.peds.pos[0]])
+        self.grid.move(points)
+        i, j, d = self.grid.pairs(self.pos, self.avoid_radius)
+        other = i != j
+        return i[other], j[other], d[other], points
+
+    def step(self):
+        for _ in range(self.n_sub):
+            self._substep()
+        self.steps += 1
+
+    def _substep(self):
+        # Pedestrians move first, then every agent reacts to the same snapshot
+        if self.peds is not None:
+            self.peds.step()
+
+        to_goal = self.goal - self.pos
+        dist_goal = np.hypot(to_goal[:, 0], to_goal[:, 1])
+        gx, gy = to_goal[:, 0] / dist_goal, to_goal[:, 1] / dist_goal
+
+        # Side dodge from every close neighbour, 1/d weighted (agents count
+        # agent_weight, pedestrians 1); flee from those inside contact distance
+        i, j, d, points = self._neighbours()
+        rel = self.pos[i] - points[j]
+        w = np.where(j < self.n, self.agent_weight, 1.0) / np.maximum(d, 1e-3)
+        side = np.where(rel[:, 1] >= 0, 1.0, -1.0)
+        contact = d < 2 * self.body_radius
+        flee = np.where(contact, w / np.maximum(d, 1e-3), 0.0)
+        avoid = np.zeros((self.n, 2))
+        np.add.at(avoid, i, np.stack([rel[:, 0] * flee, side * w + rel[:, 1] * flee], axis=1))
+        norm = np.hypot(avoid[:, 0], avoid[:, 1])
+        near = norm > 1e-9
+        safe = np.where(near, norm, 1.0)
+        dir_x = np.where(near, 0.5 * gx + 0.5 * avoid[:, 0] / safe, gx)
+        dir_y = np.where(near, 0.5 * gy + 0.5 * avoid[:, 1] / safe, gy)
+        n = np.maximum(np.hypot(dir_x, dir_y), 1e-9)
+        self.dir[:, 0], self.dir[:, 1] = dir_x / n, dir_y / n
+
+        # Move, stay between the walls
+        self.pos += self.dir * self.speed
+        np.clip(self.pos[:, 1], -self.half_width, self.half_width, out=self.pos[:, 1])
+
+        agents = j < self.n
+        if agents.any():
+            self.min_separation = min(self.min_separation, float(d[agents].min()))
+        self.contacts += int((contact & agents).sum()) // 2
+        self.ped_contacts += int((contact & ~agents).sum())
+
+        # Arrived agents turn round and head for the other end
+        arrived = np.abs(self.goal[:, 0] - self.pos[:, 0]) < self.speed
+        if arrived.any():
+            self.arrivals += int(arrived.sum())
+            self.heading[arrived] *= -1
+            self.goal[arrived, 0] = np.where(self.heading[arrived] > 0, self.length, 0.0)
+            self.goal[arrived, 1] = self.rng.uniform(-self.half_width, self.half_width, int(arrived.sum()))
+
+    def run(self, steps, callback=None):
+        for _ in range(steps):
+            self.step()
+            if callback is not None:
+                callback(self)
+        minutes = self.steps * self.step_ms / 60000.0
+        return {"arrivals": self.arrivals, "throughput_per_min": self.arrivals / minutes,
+                "contacts": self.contacts, "ped_contacts": self.ped_contacts,
+                "min_separation": self.min_separation}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fleet of mutually avoiding agents in a corridor")
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--peds", type=int, default=200)
+    parser.add_argument("--length", type=float, default=100.0, help="corridor length in m")
+    parser.add_argument("--width", type=float, default=10.0, help="corridor width in m")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--step-ms", type=int, default=scenarios.BASIC_TIME_STEP, help="basic time step")
+    args = parser.parse_args()
+
+    fleet = Fleet(args.agents, args.length, args.width, peds=args.peds, seed=args.seed, step_ms=args.step_ms)
+    start = time.perf_counter()
+    result = fleet.run(args.steps)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.agents} agents, {args.peds} pedestrians, {args.steps} steps: "
+          f"{result['arrivals']} arrivals ({result['throughput_per_min']:.1f}/min), "
+          f"contact pair-steps {result['contacts']} agent-agent / {result['ped_contacts']} agent-pedestrian, "
+          f"min agent separation {result['min_separation']:.3f} m")
+    print(f"{args.steps} steps in {elapsed:.3f}s ({args.steps / max(elapsed, 1e-9):.0f} steps/s, "
+          f"{args.agents * args.steps / max(elapsed, 1e-9):.0f} agent-steps/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# headless.py
+# Kinematic stand-in for the Webots `controller` module.
+# Implements only the Supervisor surface the S*/M* controllers use, so the
+# scripts run unmodified without a Webots world:
+#   python headless.py S2 S2_Agent.py --steps 2000
+import argparse
+import contextlib
+import math
+import os
+import runpy
+import sys
+import time
+
+
+class Field:
+    def __init__(self, name, value):
+        self.name = name
+        self._value = [float(v) for v in value]
+
+    def getSFVec3f(self):
+        return list(self._value)
+
+    def setSFVec3f(self, value):
+        self._value = [float(value[0]), float(value[1]), float(value[2])]
+
+    def getSFRotation(self):
+        return list(self._value)
+
+    def setSFRotation(self, value):
+        self._value = [float(value[0]), float(value[1]), float(value[2]), float(value[3])]
+
+
+class Node:
+    def __init__(self, node_id, def_name, translation, rotation=(0.0, 0.0, 1.0, 0.0),
+                 recognizable=True, size=(0.5, 1.8)):
+        self.id = node_id
+        self.def_name = def_name
+        self.fields = {
+            "translation": Field("translation", translation),
+            "rotation": Field("rotation", rotation),
+        }
+        self.recognizable = recognizable
+        self.size = size          # (width, height) seen by recognition cameras
+        self.devices = {}
+
+    def getId(self):
+        return self.id
+
+    def getDef(self):
+        return self.def_name
+
+    def getField(self, name):
+        return self.fields.get(name)
+
+
+class RecognitionObject:
+    def __init__(self, node_id, position, position_on_image, size_on_image):
+        self._id = node_id
+        self._position = position
+        self._position_on_image = position_on_image
+        self._size_on_image = size_on_image
+
+    def getId(self):
+        return self._id
+
+    def getPosition(self):
+        return list(self._position)
+
+    def getPositionOnImage(self):
+        return self._position_on_image
+
+    def getSizeOnImage(self):
+        return self._size_on_image
+
+
+class Camera:
+    def __init__(self, name, world, owner, width=128, height=64, fov=1.0, max_range=10.0):
+        self.name = name
+        self.world = world
+        self.owner = owner
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.max_range = max_range
+        self.sampling_period = 0
+        self.recognition_period = 0
+        # Blank BGRA frame, allocated once and handed out on every getImage()
+        self._image = bytes(width * height * 4)
+
+    def enable(self, sampling_period):
+        self.sampling_period = int(sampling_period)
+
+    def disable(self):
+        self.sampling_period = 0
+
+    def getSamplingPeriod(self):
+        return self.sampling_period
+
+    def recognitionEnable(self, sampling_period):
+        self.recognition_period = int(sampling_period)
+
+    def recognitionDisable(self):
+        self.recognition_period = 0
+
+    def getRecognitionSamplingPeriod(self):
+        return self.recognition_period
+
+    def hasRecognition(self):
+        return True
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+    def getFov(self):
+        return self.fov
+
+    def getImage(self):
+        if self.sampling_period <= 0:
+            return None
+        return self._image
+
+    def getRecognitionObjects(self):
+        if self.recognition_period <= 0:
+            return []
+        ox, oy, _ = self.owner.fields["translation"]._value
+        yaw = self.owner.fields["rotation"]._value[3]
+        fx, fy = math.cos(yaw), math.sin(yaw)
+        half_fov = 0.5 * self.fov
+        focal = 0.5 * self.width / math.tan(half_fov)
+
+        objects = []
+        for node in self.world.nodes:
+            if node is self.owner or not node.recognizable:
+                continue
+            nx, ny, nz = node.fields["translation"]._value
+            rx, ry = nx - ox, ny - oy
+            depth = rx * fx + ry * fy           # along the optical axis
+            lateral = -rx * fy + ry * fx        # positive to the left
+            if depth <= 1e-3 or depth > self.max_range:
+                continue
+            if abs(math.atan2(lateral, depth)) > half_fov:
+                continue
+            cx = 0.5 * self.width - focal * lateral / depth
+            cy = 0.5 * self.height
+            w = focal * node.size[0] / depth
+            h = focal * node.size[1] / depth
+            objects.append(RecognitionObject(node.id, (depth, lateral, nz), (cx, cy), (w, h)))
+        return objects
+
+
+class World:
+    def __init__(self, basic_time_step=20, max_steps=None):
+        self.basic_time_step = basic_time_step
+        self.max_steps = max_steps
+        self.steps = 0
+        self.nodes = []
+        self.by_def = {}
+        self.sync = None          # set by cosim.Scheduler to interleave controllers
+
+    def add_node(self, def_name, translation, **kwargs):
+        node = Node(len(self.nodes) + 1, def_name, translation, **kwargs)
+        self.nodes.append(node)
+        if def_name:
+            self.by_def[def_name] = node
+        return node
+
+    def add_camera(self, def_name, name="CAM", **kwargs):
+        owner = self.by_def[def_name]
+        owner.devices[name] = Camera(name, self, owner, **kwargs)
+        return owner.devices[name]
+
+    @property
+    def time(self):
+        return self.steps * self.basic_time_step / 1000.0
+
+    def finished(self):
+        return self.max_steps is not None and self.steps >= self.max_steps
+
+    def step(self, supervisor, duration):
+        if self.sync is not None:
+            return self.sync(supervisor, duration)
+        # Single-controller mode: the calling controller owns the clock
+        if self.finished():
+            return -1
+        self.steps += max(1, int(duration) // self.basic_time_step)
+        return 0
+
+
+# === Controller binding ===
+# Supervisor() takes no arguments, so the runner tells it which world and
+# node it belongs to before the controller script is executed.
+_binding = None
+
+
+def bind(world, self_def):
+    global _binding
+    _binding = (world, self_def)
+
+
+class Supervisor:
+    def __init__(self):
+        if _binding is None:
+            raise RuntimeError("headless.Supervisor created outside headless.run_controller()")
+        self._world, self_def = _binding
+        self._self = self._world.by_def.get(self_def)
+
+    def getBasicTimeStep(self):
+        return float(self._world.basic_time_step)
+
+    def getTime(self):
+        return self._world.time
+
+    def step(self, duration):
+        return self._world.step(self, duration)
+
+    def getSelf(self):
+        return self._self
+
+    def getFromDef(self, name):
+        return self._world.by_def.get(name)
+
+    def getDevice(self, name):
+        if self._self is None:
+            return None
+        return self._self.devices.get(name)
+
+
+def install():
+    # Make `from controller import Supervisor` resolve to this module
+    sys.modules["controller"] = sys.modules[__name__]
+
+
+@contextlib.contextmanager
+def silenced(enabled=True):
+    # Controllers print every step; bulk runs drop that output
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+def run_controller(path, world, self_def="Agent", quiet=False):
+    install()
+    bind(world, self_def)
+    with silenced(quiet):
+        runpy.run_path(path, run_name="__main__")
+
+
+def main():
+    import scenarios
+
+    parser = argparse.ArgumentParser(description="Run one controller script on a headless world")
+    parser.add_argument("scenario", choices=sorted(scenarios.SCENARIOS))
+    parser.add_argument("script")
+    parser.add_argument("--self", dest="self_def", default="Agent")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    world = scenarios.build_world(args.scenario, max_steps=args.steps)
+    start = time.perf_counter()
+    run_controller(args.script, world, args.self_def, quiet=args.quiet)
+    elapsed = time.perf_counter() - start
+
+    for node in world.nodes:
+        x, y, z = node.fields["translation"]._value
+        print(f"{node.def_name}: ({x:.3f}, {y:.3f}, {z:.3f})")
+    print(f"{world.steps} steps in {elapsed:.3f}s ({world.steps / max(elapsed, 1e-9):.0f} steps/s)")
+
+
+if __name__ == "__main__":
+    sys.modules.setdefault("headless", sys.modules[__name__])
+    main()
@@ -0,0 +1,220 @@
+# monte_carlo.py
+# Monte Carlo evaluation of a scenario under randomised initial conditions.
+# Each episode draws, from its own seed, offsets to the pedestrian starts, the
+# agent start and the destination, a scale on every pedestrian speed and a
+# turn of the heading of pedestrians walking a free line (S4/S5, "linear" in
+# scenarios.PED_MOTION; the others keep their track and direction). A
+# distribution is a constant, ("uniform", lo, hi) or ("normal", mean, sd):
+#   --dist ped_speed=normal:1:0.15 --dist ped_heading=uniform:-20:20
+#
+# Episodes run in batches on batch.BatchEngine, and after every batch a
+# sequential test decides whether the collision rate is known well enough:
+# a Wilson interval at the requested confidence, with the error split evenly
+# over every batch the budget allows, so the interval holds whenever the
+# evaluation stops. A configuration stops as soon as the interval lies below
+# --threshold (safe), above it (unsafe) or is narrower than 2 * --precision,
+# or when --max-episodes is spent. Clearly safe and clearly unsafe
+# configurations stop after a batch or two.
+#   python monte_carlo.py S2 M7 --threshold 0.05 --confidence 0.95
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+
+import batch
+import pedmotion
+import scenarios
+
+DISTRIBUTIONS = {
+    "ped_start": ("uniform", -0.2, 0.2),      # m, per coordinate
+    "ped_speed": ("uniform", 0.8, 1.2),       # factor on speed and velocity
+    "ped_heading": ("uniform", -15.0, 15.0),  # degrees, linear walkers
+    "agent_start": ("uniform", -0.05, 0.05),  # m, per coordinate
+    "destination": ("uniform", -0.1, 0.1),    # m, per coordinate
+}
+
+
+def draw(dist, rng, shape=()):
+    if isinstance(dist, (int, float)):
+        return np.full(shape, float(dist))
+    kind, a, b = dist
+    if kind == "uniform":
+        return rng.uniform(a, b, shape)
+    if kind == "normal":
+        return rng.normal(a, b, shape)
+    raise ValueError(f"unknown distribution {kind!r}")
+
+
+def sample(scenario, agent, first, n, dists, seed):
+    # BatchEngine arguments for episodes first .. first + n - 1; each episode
+    # has its own seed, so every configuration sees the same draws
+    layout = scenarios.SCENARIOS[scenario]
+    motion = scenarios.PED_MOTION[scenario]
+    base = np.array([layout[name][:2] for name in motion])
+    cls, defaults = batch.POLICIES[os.path.basename(agent)]
+    destination = np.asarray(defaults.get("destination", cls.PARAMS["destination"]), dtype=float)
+
+    ped_starts = np.empty((n,) + base.shape)
+    agent_start = np.empty((n, 2))
+    dest = np.empty((n, 2))
+    speed = np.empty((n, len(motion)))
+    heading = np.empty((n, len(motion)))
+    for i in range(n):
+        rng = np.random.default_rng([seed, first + i])
+        ped_starts[i] = base + draw(dists["ped_start"], rng, base.shape)
+        agent_start[i] = np.asarray(scenarios.AGENT_START[:2]) + draw(dists["agent_start"], rng, (2,))
+        dest[i] = destination + draw(dists["destination"], rng, (2,))
+        speed[i] = draw(dists["ped_speed"], rng, (len(motion),))
+        heading[i] = np.radians(draw(dists["ped_heading"], rng, (len(motion),)))
+
+    overrides = {}
+    for col, (name, spec) in enumerate(motion.items()):
+        if "speed" in spec:
+            overrides[name] = {"speed": spec["speed"] * speed[:, col]}
+        elif "velocity" in spec:
+            vx, vy = spec["velocity"]
+            c, s = np.cos(heading[:, col]), np.sin(heading[:, col])
+            overrides[name] = {"velocity": np.stack([vx * c - vy * s, vx * s + vy * c], axis=1) * speed[:, col, None]}
+    peds = pedmotion.for_scenario(scenario, n, starts=ped_starts, overrides=overrides)
+    return {"agent_start": agent_start, "peds": peds, "params": {"destination": dest}}
+
+
+def wilson(hits, n, z):
+    # Score interval for a binomial proportion
+    if n == 0:
+        return 0.0, 1.0
+    p = hits / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(centre - half, 0.0), min(centre + half, 1.0)
+
+
+def decide(collided, episodes, z, threshold, precision):
+    # -> (verdict or None to keep sampling, interval)
+    lo, hi = wilson(collided, episodes, z)
+    if hi < threshold:
+        return "safe", (lo, hi)
+    if lo > threshold:
+        return "unsafe", (lo, hi)
+    if (hi - lo) / 2 <= precision:
+        return "estimated", (lo, hi)
+    return None, (lo, hi)
+
+
+def run_batch(scenario, agent, params, first, n, steps, dists, seed):
+    # Per-episode collisions and arrival of one batch; stops stepping once all arrived
+    drawn = sample(scenario, agent, first, n, dists, seed)
+    engine = batch.BatchEngine(scenario, n, agent=agent, params=dict(params or {}, **drawn["params"]),
+                               agent_start=drawn["agent_start"], peds=drawn["peds"])
+    for _ in range(steps):
+        engine.step()
+        if (engine.arrival_step >= 0).all():
+            break
+    metrics = engine.metrics.result()
+    return metrics["collisions"] > 0, engine.arrival_step >= 0, metrics["min_distance"], engine.steps
+
+
+def evaluate(scenario, agent=None, params=None, threshold=0.05, confidence=0.95, precision=0.02,
+             batch_size=64, max_episodes=4096, steps=500, dists=None, seed=0):
+    # Sample batches of episodes until the collision rate is decided
+    if batch_size < 1 or max_episodes < 1:
+        raise ValueError(f"batch_size and max_episodes must be at least 1, got {batch_size} and {max_episodes}")
+    agent = agent or scenarios.CONTROLLERS[scenario][-1][0]
+    dists = dict(DISTRIBUTIONS, **(dists or {}))
+    looks = math.ceil(max_episodes / batch_size)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * looks))
+    start = time.perf_counter()
+    collided = arrived = episodes = episode_steps = 0
+    min_distance = math.inf
+    verdict = "budget"
+    while episodes < max_episodes:
+        n = min(batch_size, max_episodes - episodes)
+        hit, done, closest, ran = run_batch(scenario, agent, params, episodes, n, steps, dists, seed)
+        episodes += n
+        collided += int(hit.sum())
+        arrived += int(done.sum())
+        episode_steps += n * ran
+        min_distance = min(min_distance, float(closest.min()))
+        decided, (lo, hi) = decide(collided, episodes, z, threshold, precision)
+        if decided is not None:
+            verdict = decided
+            break
+    return {"scenario": scenario, "agent": os.path.basename(agent), "params": params or {}, "verdict": verdict,
+            "episodes": episodes, "collision_rate": collided / episodes, "interval": [lo, hi],
+            "arrival_rate": arrived / episodes, "min_distance": min_distance, "episode_steps": episode_steps,
+            "seconds": time.perf_counter() - start}
+
+
+def run(configs, workers=None, quiet=False, **options):
+    # configs: (scenario, agent, params) triples, one evaluation each on a process pool
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate, scenario, agent, params, **options) for scenario, agent, params in configs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if not quiet:
+                lo, hi = result["interval"]
+                print(f"{result['scenario']} {result['agent']}: {result['verdict']} after {result['episodes']} "
+                      f"episodes, collision rate {result['collision_rate']:.1%} [{lo:.1%}, {hi:.1%}], "
+                      f"arrived {result['arrival_rate']:.0%}, min distance {result['min_distance']:.3f} m "
+                      f"({result['seconds']:.1f}s)")
+    return results
+
+
+def _dist(text):
+    name, spec = text.split("=", 1)
+    parts = spec.split(":")
+    if len(parts) == 1:
+        return name, float(parts[0])
+    return name, (parts[0], float(parts[1]), float(parts[2]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo collision rates under randomised initial conditions")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to evaluate, of {sorted(scenarios.CONTROLLERS)} (default: all)")
+    parser.add_argument("--agent", help="agent script for a single scenario, defaults to the scenario's agent")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="policy parameter")
+    parser.add_argument("--dist", action="append", default=[], metavar="NAME=KIND:A:B",
+                        help=f"distribution of one of {sorted(DISTRIBUTIONS)}: a constant, uniform:lo:hi or "
+                             "normal:mean:sd")
+    parser.add_argument("--threshold", type=float, default=0.05, help="acceptable collision rate")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--precision", type=float, default=0.02, help="interval half-width that ends sampling")
+    parser.add_argument("--batch", type=int, default=64, help="episodes per sequential look")
+    parser.add_argument("--max-episodes", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="monte_carlo_results.json")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(scenarios.CONTROLLERS)
+    if unknown:
+        parser.error(f"unknown scenario(s) {sorted(unknown)}")
+    if args.agent and len(args.scenarios) != 1:
+        parser.error("--agent replaces the agent of one scenario; name exactly one")
+    if args.batch < 1 or args.max_episodes < 1:
+        parser.error("--batch and --max-episodes must be at least 1")
+    dists = dict(_dist(text) for text in args.dist)
+    unknown = set(dists) - set(DISTRIBUTIONS)
+    if unknown:
+        parser.error(f"unknown distribution(s) {sorted(unknown)}; choose from {sorted(DISTRIBUTIONS)}")
+    params = {name: float(value) for name, value in (item.split("=", 1) for item in args.param)}
+    configs = [(scenario, args.agent, params) for scenario in args.scenarios or sorted(scenarios.CONTROLLERS)]
+    results = run(configs, args.workers, threshold=args.threshold, confidence=args.confidence,
+                  precision=args.precision, batch_size=args.batch, max_episodes=args.max_episodes,
+                  steps=args.steps, dists=dists, seed=args.seed)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"{sum(r['episodes'] for r in results)} episodes in total, results in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
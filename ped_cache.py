@@ -0,0 +1,80 @@
+# ped_cache.py
+# Pedestrians never react to the agent, so their motion over a chunk of
+# episodes is the same for every point of a sweep: sweep.py runs each point on
+# the same per-episode starts. The tracks are evaluated once with
+# pedmotion.MotionTable.position_at, stored as a .npy keyed by a hash of
+# everything the motion depends on (specs, per-episode starts, step_ms and
+# pedmotion.py itself) and replayed as arrays to every point:
+#   peds = ped_cache.replay("M6", 500, starts)      # starts: (n, k, 2)
+#   engine = batch.BatchEngine("M6", len(starts), peds=peds)
+# Recent tracks also stay in memory, up to MEMORY_BYTES per process.
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+import pedmotion
+
+CACHE_DIR = os.environ.get("PED_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ped_cache"))
+MEMORY_BYTES = 256 * 2 ** 20
+
+_memory = OrderedDict()       # key -> positions, least recently used first
+
+
+def cache_key(table):
+    # Hash of what a MotionTable's positions depend on
+    h = hashlib.sha1()
+    with open(pedmotion.__file__, "rb") as f:
+        h.update(f.read())
+    h.update(repr(([spec["kind"] for spec in table.specs], table.axis.tolist(), table.step_ms)).encode())
+    for values in (table.start, table.speed, table.lo, table.hi, table.eps, table.distance, table.direction,
+                   table.velocity):
+        h.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _remember(key, positions):
+    _memory[key] = positions
+    _memory.move_to_end(key)
+    while len(_memory) > 1 and sum(p.nbytes for p in _memory.values()) > MEMORY_BYTES:
+        _memory.popitem(last=False)
+
+
+def track(scenario, steps, starts=None, overrides=None):
+    # (steps + 1, n, k, 2) positions; row 0 is the start, row t the positions after t steps
+    table = pedmotion.for_scenario(scenario, starts=starts, overrides=overrides)
+    key = cache_key(table)
+    cached = _memory.get(key)
+    path = os.path.join(CACHE_DIR, f"{scenario}_{key}.npy")
+    if cached is None and os.path.exists(path):
+        cached = np.load(path, mmap_mode="r")
+    if cached is not None and len(cached) > steps:
+        _remember(key, cached)
+        return cached[:steps + 1]
+
+    positions = table.position_at(np.arange(steps + 1))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.save(path + ".tmp.npy", positions)
+    os.replace(path + ".tmp.npy", path)
+    _remember(key, positions)
+    return positions
+
+
+class Replay:
+    # Drop-in for pedmotion.MotionTable in batch.BatchEngine
+    def __init__(self, positions):
+        self.positions = positions
+        self.n, self.k = positions.shape[1], positions.shape[2]
+        self.t = 0
+        self.pos = positions[0]
+
+    def step(self):
+        self.t += 1
+        if self.t >= len(self.positions):
+            raise IndexError(f"pedestrian replay only covers {len(self.positions) - 1} steps")
+        self.pos = self.positions[self.t]
+
+
+def replay(scenario, steps, starts=None, overrides=None):
+    return Replay(track(scenario, steps, starts, overrides))
@@ -0,0 +1,200 @@
+# pedmotion.py
+# Pedestrian motion as closed-form functions of the step count t.
+# Each behaviour of the Ped*.py scripts (see scenarios.PED_MOTION) is written
+# as position(t) from its start: clamped linear for crossing/seek, a triangle
+# wave for bounce, a sawtooth for wrap. They take scalars or arrays, so any
+# step, or a whole horizon of steps, costs one evaluation and long runs carry
+# no accumulated rounding. MotionTable applies them to one column per
+# pedestrian and one row per episode.
+#
+# t and speeds are in reference steps (units.REFERENCE_STEP_MS). Worlds with
+# another basicTimeStep pass units.reference_steps(t, step_ms), which may be
+# fractional; interpolate() then goes straight between the whole reference
+# steps around it, so a pedestrian is in the same place at the same time
+# whatever the step.
+import numpy as np
+
+from units import REFERENCE_STEP_MS, per_step, reference_steps
+
+KINDS = ("static", "linear", "seek", "bounce", "wrap")
+
+
+# Step counts from ratios of lengths and speeds; the slack absorbs the
+# rounding of exact multiples such as 3.0 / 0.03
+def _floor(x):
+    return np.floor(x + 1e-9)
+
+
+def _ceil(x):
+    return np.ceil(x - 1e-9)
+
+
+def linear_at(p0, velocity, t):
+    return p0 + t * velocity
+
+
+def seek_at(p0, distance, speed, eps, t):
+    # Walks min(remaining, speed) per step while more than eps from p0 + distance
+    remaining = np.abs(distance)
+    moves = np.where(remaining > eps, np.maximum(_ceil((remaining - eps) / speed), 1), 0)
+    return p0 + np.copysign(np.minimum(np.minimum(t, moves) * speed, remaining), distance)
+
+
+def _cycle(p0, speed, lo, hi, direction):
+    # Steps until the first clamp/restart and steps per leg between lo and hi
+    up = np.asarray(direction) > 0
+    first = np.maximum(_floor(np.where(up, hi - p0, p0 - lo) / speed) + 1, 1)
+    leg = _floor((hi - lo) / speed) + 1
+    return up, first, leg
+
+
+def _enter(p0, speed, lo, hi, direction):
+    # A bouncing walker outside [lo, hi] and heading back in is clamped onto
+    # the near end on its first step: the same as starting one step short of it
+    up = np.asarray(direction) > 0
+    return np.where(up, np.maximum(p0, lo - speed), np.minimum(p0, hi + speed))
+
+
+def _bounce(p0, start, speed, lo, hi, up, first, leg, t):
+    # start: _enter(p0, ...), where the straight run comes from
+    m = np.mod(t - first, 2 * leg)
+    back = m >= leg
+    m = np.where(back, m - leg, m)
+    turned = up != back                      # heading down from hi
+    wave = np.where(turned, hi - m * speed, lo + m * speed)
+    straight = np.where(t > 0, start + np.where(up, t, -t) * speed, p0)
+    return np.where(t < first, straight, wave)
+
+
+def _wrap(p0, speed, lo, hi, up, first, leg, t):
+    m = np.mod(t - first, leg)
+    wave = np.where(up, lo + m * speed, hi - m * speed)
+    straight = p0 + np.where(up, t, -t) * speed
+    return np.where(t < first, straight, wave)
+
+
+def interpolate(fn, t, *args):
+    # fn(*args, t) at a possibly fractional reference step count t
+    t = np.asarray(t, dtype=float)
+    whole = _floor(t)
+    frac = t - whole
+    at = fn(*args, whole)
+    if not np.any(frac > 1e-9):
+        return at
+    return at + (fn(*args, whole + 1) - at) * np.where(frac > 1e-9, frac, 0.0)
+
+
+def bounce_at(p0, speed, lo, hi, direction, t):
+    # Moves speed per step and is clamped to lo/hi, reversing, when it would pass them:
+    # a straight run up to the first clamp, then a triangle wave of period 2 * leg
+    start = _enter(p0, speed, lo, hi, direction)
+    return _bounce(p0, start, speed, lo, hi, *_cycle(start, speed, lo, hi, direction), t)
+
+
+def wrap_at(p0, speed, lo, hi, direction, t):
+    # Moves speed per step and restarts at the other end once it passes lo/hi:
+    # a straight run up to the first restart, then a sawtooth of period leg
+    return _wrap(p0, speed, lo, hi, *_cycle(p0, speed, lo, hi, direction), t)
+
+
+class MotionTable:
+    # specs give speeds and velocities in m/s; step() advances one step of step_ms
+    def __init__(self, specs, starts, n=1, step_ms=REFERENCE_STEP_MS):
+        starts = np.asarray(starts, dtype=float)
+        if starts.ndim == 2:
+            starts = np.broadcast_to(starts[None], (n,) + starts.shape)
+        self.n, self.k = starts.shape[0], starts.shape[1]
+        self.specs = list(specs)
+        self.start = np.array(starts[..., :2])          # (n, k, 2)
+        self.pos = self.start.copy()
+        self.t = 0
+        self.step_ms = step_ms
+
+        self.axis = np.array([spec.get("axis", 0) for spec in self.specs], dtype=int)
+        self.speed = per_step(self._param("speed", 0.0), REFERENCE_STEP_MS)     # (n, k), per reference step
+        self.lo = self._param("lo", -np.inf)
+        self.hi = self._param("hi", np.inf)
+        self.eps = self._param("eps", 0.0)
+        self.distance = self._param("distance", 0.0)
+        self.direction = self._param("direction", 1.0)
+        self.velocity = np.zeros((self.n, self.k, 2))
+        for col, spec in enumerate(self.specs):
+            if "velocity" in spec:
+                velocity = per_step(np.asarray(spec["velocity"], dtype=float), REFERENCE_STEP_MS)
+                self.velocity[:, col] = np.broadcast_to(velocity, (self.n, 2))
+
+        self.cols = {kind: np.array([c for c, spec in enumerate(self.specs) if spec["kind"] == kind], dtype=int)
+                     for kind in KINDS}
+        unknown = {spec["kind"] for spec in self.specs} - set(KINDS)
+        if unknown:
+            raise ValueError(f"unknown pedestrian motion kind(s): {sorted(unknown)}")
+
+        # Per-column constants of position_at, fixed by the start and the spec
+        self._periodic = []
+        for kind, fn in (("bounce", _bounce), ("wrap", _wrap)):
+            c = self.cols[kind]
+            if len(c):
+                a = self.axis[c]
+                p0, direction = self.start[:, c, a], self.direction[:, c]
+                args = (self.speed[:, c], self.lo[:, c], self.hi[:, c])
+                if kind == "bounce":
+                    start = _enter(p0, *args, direction)
+                    self._periodic.append((fn, c, a, (p0, start) + args + _cycle(start, *args, direction)))
+                else:
+                    self._periodic.append((fn, c, a, (p0,) + args + _cycle(p0, *args, direction)))
+
+    def _param(self, name, default):
+        columns = [np.broadcast_to(np.asarray(spec.get(name, default), dtype=float), (self.n,))
+                   for spec in self.specs]
+        return np.stack(columns, axis=1) if columns else np.zeros((self.n, 0))
+
+    def position_at(self, t):
+        # Positions after t steps of step_ms, (..., n, k, 2) for t of shape (...)
+        if self.step_ms == REFERENCE_STEP_MS:
+            return self._reference_position(t)
+        t = reference_steps(np.asarray(t, dtype=float), self.step_ms)
+        whole = _floor(t)
+        at = self._reference_position(whole)
+        return at + (self._reference_position(whole + 1) - at) * (t - whole)[..., None, None, None]
+
+    def _reference_position(self, t):
+        t = np.asarray(t)
+        shape = t.shape
+        t = t.reshape(-1, 1, 1).astype(float)           # against (n, k) parameters
+        out = np.broadcast_to(self.start, (len(t),) + self.start.shape).copy()
+
+        c = self.cols["linear"]
+        if len(c):
+            out[:, :, c] = linear_at(self.start[:, c], self.velocity[:, c], t[..., None])
+
+        c = self.cols["seek"]
+        if len(c):
+            a = self.axis[c]
+            out[:, :, c, a] = seek_at(self.start[:, c, a], self.distance[:, c], self.speed[:, c], self.eps[:, c], t)
+
+        for fn, c, a, args in self._periodic:
+            out[:, :, c, a] = fn(*args, t)
+
+        return out.reshape(shape + self.start.shape)
+
+    def future(self, steps):
+        # Positions 1..steps ahead of the current step, (steps, n, k, 2)
+        return self.position_at(self.t + np.arange(1, steps + 1))
+
+    def step(self):
+        self.t += 1
+        self.pos = self.position_at(self.t)
+
+
+def for_scenario(name, n=1, starts=None, overrides=None):
+    import scenarios
+
+    motion = scenarios.PED_MOTION[name]
+    specs = []
+    for def_name, spec in motion.items():
+        spec = dict(spec)
+        spec.update((overrides or {}).get(def_name, {}))
+        specs.append(spec)
+    if starts is None:
+        starts = [scenarios.SCENARIOS[name][def_name][:2] for def_name in motion]
+    return MotionTable(specs, starts, n=n)
@@ -0,0 +1,192 @@
+# result_store.py
+# On-disk store of per-episode results (SQLite, local file), so sweeps never
+# simulate the same configuration twice. A configuration is keyed by a hash
+# of what decides its outcome: the agent script and the source of every
+# module of this directory that it, the batch engine or the sweep imports,
+# the scenario layout and pedestrian motion, the full parameter set (policy
+# defaults included), steps and start jitter. Episodes are stored
+# under (key, seed, episode), with the path of the episode's trajectory shard
+# when the sweep recorded one (sweep.py --trajectories).
+# Every numeric parameter also goes into an indexed (name, value) table, so
+# ranges can be queried:
+#   store = ResultStore("sweep_store.sqlite")
+#   store.query(agent="M7_Agent.py", cross_radius=(0.4, 0.8))
+#   python result_store.py sweep_store.sqlite --agent M7_Agent.py --where cross_radius=0.4:0.8
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+import batch
+import scenarios
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    key TEXT PRIMARY KEY, scenario TEXT, agent TEXT, params TEXT, steps INTEGER, jitter REAL);
+CREATE TABLE IF NOT EXISTS params (
+    key TEXT, name TEXT, value REAL, PRIMARY KEY (key, name));
+CREATE INDEX IF NOT EXISTS params_by_value ON params (name, value);
+CREATE INDEX IF NOT EXISTS configs_by_agent ON configs (agent, scenario);
+CREATE TABLE IF NOT EXISTS episodes (
+    key TEXT, seed INTEGER, episode INTEGER, arrival_step INTEGER, min_distance REAL,
+    path_length REAL, path_overhead REAL, collisions INTEGER, trajectory TEXT,
+    PRIMARY KEY (key, seed, episode));
+"""
+
+METRICS = ("arrival_step", "min_distance", "path_length", "path_overhead", "collisions")   # safety_metrics.py
+
+
+def policy_params(agent, params=None):
+    # The full parameter set a policy runs with: its defaults, the script's, then params
+    cls, defaults = batch.POLICIES[os.path.basename(agent)]
+    merged = dict(cls.PARAMS, **defaults, **(params or {}))
+    return {name: np.asarray(value).tolist() for name, value in merged.items()}
+
+
+def _local_modules(name, seen):
+    # name and every module of this directory it imports, at any depth
+    path = os.path.join(HERE, name + ".py")
+    if name in seen or not os.path.exists(path):
+        return seen
+    seen.add(name)
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imported = [node.module]
+        else:
+            continue
+        for module in imported:
+            _local_modules(module.split(".")[0], seen)
+    return seen
+
+
+def source_hash(agent):
+    # Agent script plus every module an episode's outcome can depend on: the
+    # batch engine and policies, pedestrian motion, units, trackers, safety
+    # metrics and collision checks, and the sweep's episode seeding
+    names = set()
+    for root in (os.path.splitext(os.path.basename(agent))[0], "batch", "sweep"):
+        _local_modules(root, names)
+    h = hashlib.sha256()
+    for name in sorted(names):
+        with open(os.path.join(HERE, name + ".py"), "rb") as f:
+            h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+
+def config_key(scenario, agent, params, steps, jitter):
+    spec = {"source": source_hash(agent), "scenario": scenarios.SCENARIOS[scenario],
+            "motion": scenarios.PED_MOTION[scenario], "step_ms": scenarios.BASIC_TIME_STEP,
+            "params": policy_params(agent, params), "steps": steps, "jitter": jitter}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def register(self, scenario, agent, params, steps, jitter):
+        # -> key of the configuration, recording it (and its parameters) once
+        key = config_key(scenario, agent, params, steps, jitter)
+        full = policy_params(agent, params)
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO configs VALUES (?, ?, ?, ?, ?, ?)",
+                            (key, scenario, os.path.basename(agent), json.dumps(full, sort_keys=True), steps, jitter))
+            self.db.executemany("INSERT OR IGNORE INTO params VALUES (?, ?, ?)",
+                                [(key, name, float(value)) for name, value in full.items()
+                                 if isinstance(value, (int, float))])
+        return key
+
+    def get(self, key, seed, first, n):
+        # Metrics of episodes first .. first + n - 1 as lists, or None unless all are stored
+        rows = self.db.execute(
+            f"SELECT {', '.join(METRICS)} FROM episodes "
+            "WHERE key = ? AND seed = ? AND episode >= ? AND episode < ? ORDER BY episode",
+            (key, seed, first, first + n)).fetchall()
+        if len(rows) < n:
+            return None
+        return {name: [row[i] for row in rows] for i, name in enumerate(METRICS)}
+
+    def put(self, key, seed, first, metrics, trajectories=None):
+        # metrics: {name: per-episode values} for episodes first, first + 1, ...;
+        # trajectories: per-episode trajectory shard paths (or None)
+        n = len(metrics["arrival_step"])
+        trajectories = trajectories or [None] * n
+        rows = [(key, seed, first + i, int(metrics["arrival_step"][i]), float(metrics["min_distance"][i]),
+                 float(metrics["path_length"][i]), float(metrics["path_overhead"][i]), int(metrics["collisions"][i]),
+                 trajectories[i]) for i in range(n)]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def query(self, agent=None, scenario=None, **ranges):
+        # Episodes of matching configurations; ranges: name=(lo, hi), inclusive
+        sql = ("SELECT c.key, c.scenario, c.agent, c.params, e.seed, e.episode, "
+               f"{', '.join('e.' + name for name in METRICS)}, e.trajectory "
+               "FROM configs c JOIN episodes e ON e.key = c.key")
+        where, args = [], []
+        if agent is not None:
+            where.append("c.agent = ?")
+            args.append(os.path.basename(agent))
+        if scenario is not None:
+            where.append("c.scenario = ?")
+            args.append(scenario)
+        for name, (lo, hi) in ranges.items():
+            where.append("c.key IN (SELECT key FROM params WHERE name = ? AND value BETWEEN ? AND ?)")
+            args += [name, lo, hi]
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.key, e.seed, e.episode"
+        columns = ("key", "scenario", "agent", "params", "seed", "episode") + METRICS + ("trajectory",)
+        rows = []
+        for values in self.db.execute(sql, args):
+            row = dict(zip(columns, values))
+            row["params"] = json.loads(row["params"])
+            rows.append(row)
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a sweep result store")
+    parser.add_argument("path")
+    parser.add_argument("--agent")
+    parser.add_argument("--scenario")
+    parser.add_argument("--where", action="append", default=[], metavar="NAME=LO:HI")
+    args = parser.parse_args()
+
+    ranges = {}
+    for item in args.where:
+        name, text = item.split("=", 1)
+        lo, hi = text.split(":")
+        ranges[name] = (float(lo), float(hi))
+    store = ResultStore(args.path)
+    rows = store.query(args.agent, args.scenario, **ranges)
+
+    configs = {}
+    for row in rows:
+        configs.setdefault(row["key"], []).append(row)
+    for key, episodes in configs.items():
+        first = episodes[0]
+        arrival = np.array([row["arrival_step"] for row in episodes])
+        tuned = {name: first["params"][name] for name in ranges} or first["params"]
+        print(f"{key[:12]} {first['scenario']} {first['agent']} {tuned}: {len(episodes)} episodes, "
+              f"arrived {np.mean(arrival >= 0):.0%}, collisions {np.mean([row['collisions'] > 0 for row in episodes]):.0%}, "
+              f"min distance {min(row['min_distance'] for row in episodes):.3f} m")
+    print(f"{len(rows)} episodes in {len(configs)} configurations")
+
+
+if __name__ == "__main__":
+    main()
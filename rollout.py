@@ -0,0 +1,105 @@
+# rollout.py
+# Sampling-based local planner (dynamic-window style). Each step it samples
+# candidate headings around the goal direction at a few speeds, rolls every
+# candidate out H steps in a straight line against the predicted pedestrian
+# positions, and scores all of them in one (..., K, H, P) array computation:
+# clearance to the nearest pedestrian, progress toward the destination and
+# how far the heading turns from the last one. Leading dimensions are batched
+# episodes (batch.py); the agent script uses none.
+#
+# Units are the agents' own: metres and metres per step.
+import numpy as np
+
+
+class RolloutPlanner:
+    def __init__(self, speed, headings=15, spread=np.radians(120), speed_fractions=(1.0, 0.5),
+                 horizon=30, body_radius=0.15, clearance=0.6,
+                 progress_weight=1.0, clearance_weight=1.0, smooth_weight=0.2, max_cells=None):
+        self.speed = speed
+        self.horizon = horizon
+        self.body_radius = body_radius      # closer than this anywhere in the rollout is a collision
+        self.clearance = clearance          # clearance beyond this earns nothing more
+        self.weights = (progress_weight, clearance_weight, smooth_weight)
+
+        # Candidate (heading offset from the goal, speed) pairs, plus standing still
+        offsets = np.linspace(-spread / 2, spread / 2, headings)
+        fractions = np.asarray(speed_fractions, dtype=float)
+        self.offsets = np.concatenate([np.repeat(offsets, len(fractions)), [0.0]])
+        self.speeds = np.concatenate([np.tile(fractions * speed, headings), [0.0]])
+        self.steps = np.arange(1, horizon + 1, dtype=float)
+
+        # Work cap: at most max_cells (K, H, P) gaps per plan, so the nearest
+        # max_peds pedestrians are kept; the same on every machine
+        self.max_cells = max_cells
+        self.max_peds = None if max_cells is None else max(1, max_cells // (len(self.speeds) * horizon))
+
+    def _prune(self, rel, ped_vel):
+        d = np.hypot(rel[..., 0], rel[..., 1])
+        if rel.ndim == 2:
+            # Pedestrians that cannot get within the clearance cap during the
+            # horizon do not change any score
+            reach = (self.speed + np.hypot(ped_vel[:, 0], ped_vel[:, 1])) * self.horizon + self.clearance
+            inside = d < reach
+            if not inside.all():
+                rel, ped_vel, d = rel[inside], ped_vel[inside], d[inside]
+        # Keep the nearest max_peds pedestrians (only ever binds in large crowds)
+        if self.max_peds is None or rel.shape[-2] <= self.max_peds:
+            return rel, ped_vel
+        keep = np.argpartition(d, self.max_peds - 1, axis=-1)[..., :self.max_peds]
+        keep = keep[..., None]
+        return np.take_along_axis(rel, keep, axis=-2), np.take_along_axis(ped_vel, keep, axis=-2)
+
+    def plan(self, pos, goal, ped_pos, ped_vel, prev_heading):
+        # pos, goal: (..., 2); ped_pos, ped_vel: (..., P, 2); prev_heading: (...)
+        # -> dir_x, dir_y (length = fraction of full speed), best candidate index
+        pos = np.asarray(pos, dtype=float)
+        to_goal = np.asarray(goal, dtype=float) - pos
+        goal_heading = np.arctan2(to_goal[..., 1], to_goal[..., 0])
+        dist_goal = np.hypot(to_goal[..., 0], to_goal[..., 1])
+
+        heading = goal_heading[..., None] + self.offsets                  # (..., K)
+        vx = np.cos(heading) * self.speeds
+        vy = np.sin(heading) * self.speeds
+
+        # Pedestrian positions relative to the agent along the horizon
+        rel, ped_vel = self._prune(np.asarray(ped_pos, dtype=float) - pos[..., None, :],
+                                   np.asarray(ped_vel, dtype=float))
+        t = self.steps[:, None]                                           # (H, 1)
+        ped_x = rel[..., None, :, 0] + ped_vel[..., None, :, 0] * t       # (..., H, P)
+        ped_y = rel[..., None, :, 1] + ped_vel[..., None, :, 1] * t
+        agent_x = vx[..., :, None] * self.steps                           # (..., K, H)
+        agent_y = vy[..., :, None] * self.steps
+        if rel.shape[-2]:
+            gap = np.hypot(ped_x[..., None, :, :] - agent_x[..., None],
+                           ped_y[..., None, :, :] - agent_y[..., None])   # (..., K, H, P)
+            closest = gap.min(axis=(-2, -1))
+        else:
+            closest = np.full(heading.shape, np.inf)
+
+        # Scores: progress (closest the rollout gets to the destination, in units
+        # of a full-speed rollout), clearance up to the cap, turning
+        left = np.hypot(to_goal[..., 0, None, None] - agent_x, to_goal[..., 1, None, None] - agent_y)
+        progress = (dist_goal[..., None] - left.min(axis=-1)) / (self.speed * self.horizon)
+        clear = np.minimum(closest, self.clearance) / self.clearance
+        turn = np.abs(np.angle(np.exp(1j * (heading - np.asarray(prev_heading)[..., None])))) / np.pi
+        wp, wc, ws = self.weights
+        score = wp * progress + wc * clear - ws * turn
+        # Candidates that touch a pedestrian only win if every candidate does,
+        # and then the one keeping the most distance does
+        safe = closest > self.body_radius
+        score = np.where(safe, score, -1e9 + closest)
+
+        best = score.argmax(axis=-1)
+        best_heading = np.take_along_axis(heading, best[..., None], axis=-1)[..., 0]
+        fraction = self.speeds[best] / self.speed
+        dir_x = np.cos(best_heading) * fraction
+        dir_y = np.sin(best_heading) * fraction
+        return dir_x, dir_y, best
+
+    def mode(self, best):
+        # Trajectory-log mode of a chosen candidate
+        if self.speeds[best] == 0.0:
+            return "stop"
+        if abs(self.offsets[best]) < 1e-9 and self.speeds[best] == self.speed:
+            return "goal"
+        return "dodge"
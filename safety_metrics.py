@@ -0,0 +1,117 @@
+# safety_metrics.py
+# Per-episode safety and efficiency numbers, accumulated step by step in
+# fixed-size arrays over any number of batched episodes:
+#   collisions      times the agent came inside a pedestrian's body radius
+#                   (each entry counts once; contact_steps counts the steps),
+#                   and first_collision, the (fractional) step of the first
+#   min_separation  closest approach to each pedestrian, (n, k)
+#   mode_steps      steps spent in each trajectory.MODES avoidance mode
+#   path_length     distance walked, and path_overhead relative to the
+#                   straight line from the start to the arrival radius
+#   arrival_step    first step the agent counted as arrived, -1 if never
+# Contact and separation are continuous (ccd.py): both bodies move in a
+# straight line through each step, so a pedestrian passing through the agent
+# between two step boundaries still counts, whatever the step length.
+# Memory does not grow with the episode length, and one update() is a few
+# (n, k) array operations, so it can stay on in every run. Each episode stops
+# accumulating once it has arrived.
+#   metrics = SafetyMetrics(n, k, start, destination)
+#   metrics.update(pos, peds, mode=codes, arrived=done)   # every step
+#   metrics.result()
+import numpy as np
+
+import ccd
+from cruise import MAX_PED_SPEED
+from trajectory import MODES
+
+
+class SafetyMetrics:
+    def __init__(self, n, n_peds, start, destination, arrive_eps=0.0, body_radius=0.15, dt=None):
+        # start, destination: (2,) or (n, 2); arrive_eps: the agent's arrival
+        # radius; body_radius: pedestrian body radius in m (rollout.py's
+        # collision distance); dt: seconds per step
+        self.n = n
+        self.body_radius = body_radius
+        self.dt = dt
+        # A pedestrian that moved further than this in one step wrapped round
+        # its track; that step is measured at the end only
+        self.jump = None if dt is None else 2.0 * MAX_PED_SPEED * dt
+        self.last_peds = None
+        self.last = np.array(np.broadcast_to(np.asarray(start, dtype=float)[..., :2], (n, 2)))
+        destination = np.broadcast_to(np.asarray(destination, dtype=float)[..., :2], (n, 2))
+        self.straight = np.maximum(np.hypot(destination[:, 0] - self.last[:, 0],
+                                            destination[:, 1] - self.last[:, 1]) - arrive_eps, 0.0)
+
+        self.steps = 0
+        self.collisions = np.zeros(n, dtype=np.int64)
+        self.contact_steps = np.zeros(n, dtype=np.int64)
+        self.first_collision = np.full(n, np.nan)
+        self.in_contact = np.zeros((n, n_peds), dtype=bool)
+        self.min_separation = np.full((n, n_peds), np.inf)
+        self.mode_steps = np.zeros((n, len(MODES)), dtype=np.int64)
+        self.path_length = np.zeros(n)
+        self.arrival_step = np.full(n, -1)
+
+    def update(self, pos, peds, mode=None, arrived=None):
+        # pos: (n, 2) agent positions after this step; peds: (n, k, 2);
+        # mode: (n,) trajectory.MODE_CODES; arrived: (n,) bool
+        self.steps += 1
+        going = self.arrival_step < 0
+        pos = np.asarray(pos, dtype=float)[:, :2]
+        peds = np.asarray(peds, dtype=float)
+
+        before = peds if self.last_peds is None else self.last_peds
+        d = ccd.swept_distance(self.last[:, None], pos[:, None], before, peds, jump=self.jump)
+        np.minimum(self.min_separation, np.where(going[:, None], d, np.inf), out=self.min_separation)
+        contact = (d < self.body_radius) & going[:, None]
+        entered = contact & ~self.in_contact
+        self.collisions += entered.sum(axis=1)
+        self.contact_steps += contact.any(axis=1)
+        first = entered.any(axis=1) & np.isnan(self.first_collision)
+        if first.any():
+            t = ccd.first_contact(self.last[first, None], pos[first, None], before[first], peds[first],
+                                  self.body_radius)
+            t = np.where(entered[first], np.nan_to_num(t, nan=1.0), np.inf).min(axis=1)
+            self.first_collision[first] = self.steps - 1 + t
+        end = np.hypot(peds[..., 0] - pos[:, None, 0], peds[..., 1] - pos[:, None, 1])
+        self.in_contact = (end < self.body_radius) & going[:, None]
+        self.last_peds = peds.copy()
+
+        self.path_length += np.where(going, np.hypot(pos[:, 0] - self.last[:, 0], pos[:, 1] - self.last[:, 1]), 0.0)
+        self.last[:] = pos
+        if mode is not None:
+            rows = np.flatnonzero(going)
+            self.mode_steps[rows, np.asarray(mode)[rows]] += 1
+        if arrived is not None:
+            self.arrival_step = np.where(going & np.asarray(arrived, dtype=bool), self.steps, self.arrival_step)
+
+    @property
+    def path_overhead(self):
+        # Extra distance walked as a fraction of the straight line
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.path_length / self.straight - 1.0
+
+    def result(self):
+        # Per-episode arrays; times in seconds as well when dt is known
+        out = {"collisions": self.collisions, "contact_steps": self.contact_steps,
+               "first_collision": self.first_collision,
+               "min_separation": self.min_separation, "min_distance": self.min_separation.min(axis=1, initial=np.inf),
+               "mode_steps": {name: self.mode_steps[:, code] for code, name in enumerate(MODES)},
+               "path_length": self.path_length, "path_overhead": self.path_overhead,
+               "arrival_step": self.arrival_step}
+        if self.dt is not None:
+            out["time_to_goal"] = np.where(self.arrival_step >= 0, self.arrival_step * self.dt, np.nan)
+            out["time_to_collision"] = self.first_collision * self.dt
+        return out
+
+    def summary(self):
+        # Scalars over all episodes
+        arrived = self.arrival_step >= 0
+        return {"episodes": self.n, "arrival_rate": float(arrived.mean()) if self.n else 0.0,
+                "collision_rate": float((self.collisions > 0).mean()) if self.n else 0.0,
+                "collisions": int(self.collisions.sum()),
+                "min_distance": float(self.min_separation.min(initial=np.inf)),
+                "mean_arrival_step": float(self.arrival_step[arrived].mean()) if arrived.any() else None,
+                "mean_path_overhead": float(np.nanmean(self.path_overhead)) if self.n else None,
+                "mode_share": {name: float(self.mode_steps[:, code].sum() / max(self.mode_steps.sum(), 1))
+                               for code, name in enumerate(MODES)}}
@@ -0,0 +1,120 @@
+# scenarios.py
+# Headless layouts of the S*/M* Webots worlds (see the table in README.md).
+# The Agent starts at the origin facing -X; destinations live in the agent scripts.
+import random
+
+from headless import World
+from units import REFERENCE_STEP_MS
+
+BASIC_TIME_STEP = REFERENCE_STEP_MS   # ms; worlds may use any step (see units.py)
+
+AGENT_START = (0.0, 0.0, 0.0)
+AGENT_ROTATION = (0.0, 0.0, 1.0, 3.141592653589793)
+
+SCENARIOS = {
+    "S1": {"Ped1": (-1.0, 0.05, 0.0)},                       # static
+    "S2": {"Ped1": (-1.0, -0.5, 0.0)},                       # crossing +Y
+    "S3": {"Ped1": (-2.5, 0.02, 0.0)},                       # head-on +X
+    "S4": {"Ped1": (-0.4, 0.0, 0.0)},                        # same direction, slower
+    "S5": {"Ped1": (-0.6, -1.0, 0.0)},                       # diagonal (-X, +Y)
+    "M6": {"Ped1": (-0.8, -1.0, 0.0),                        # crossing, bounces on Y
+           "Ped2": (-1.4, 1.0, 0.0),                         # crossing, opposite
+           "Ped3": (-0.5, 0.1, 0.0)},                        # static
+    "M7": {"Ped1": (-4.0, 0.1, 0.0),                         # head-on, wraps on X
+           "Ped2": (-1.0, -1.5, 0.0),                        # crossing, bounces on Y
+           "Ped3": (-0.3, -0.05, 0.0)},                      # overtaking, wraps on X
+}
+
+# Motion of each pedestrian as written in its Ped*.py script (speeds in m/s, lengths in m)
+PED_MOTION = {
+    "S1": {"Ped1": {"kind": "static"}},
+    "S2": {"Ped1": {"kind": "seek", "axis": 1, "speed": 0.5, "distance": 2.0, "eps": 0.01}},
+    "S3": {"Ped1": {"kind": "seek", "axis": 0, "speed": 0.75, "distance": 4.0, "eps": 1e-2}},
+    "S4": {"Ped1": {"kind": "linear", "velocity": (-0.5, 0.0)}},
+    "S5": {"Ped1": {"kind": "linear", "velocity": (-0.75, 0.75)}},
+    "M6": {"Ped1": {"kind": "bounce", "axis": 1, "speed": 1.5, "lo": -2.0, "hi": 2.0, "direction": 1},
+           "Ped2": {"kind": "bounce", "axis": 1, "speed": 1.5, "lo": -2.0, "hi": 2.0, "direction": -1},
+           "Ped3": {"kind": "static"}},
+    "M7": {"Ped1": {"kind": "wrap", "axis": 0, "speed": 0.75, "lo": -4.0, "hi": 2.0, "direction": 1},
+           "Ped2": {"kind": "bounce", "axis": 1, "speed": 1.25, "lo": -1.5, "hi": 1.5, "direction": 1},
+           "Ped3": {"kind": "wrap", "axis": 0, "speed": 0.5, "lo": -4.0, "hi": 0.0, "direction": -1}},
+}
+
+# Controller scripts per scenario and the DEF each one is attached to, in the
+# order they are stepped: pedestrians first, so the agent reads the positions
+# written in the same step. The agent is always the last entry.
+CONTROLLERS = {
+    "S1": [("S1.py", "Agent")],
+    "S2": [("S2_Ped1.py", "WorldSupervisor"), ("S2_Agent.py", "Agent")],
+    "S3": [("S3_Ped1.py", "WorldSupervisor"), ("S3_Agent.py", "Agent")],
+    "S4": [("S4_Ped1.py", "Ped1"), ("S4_Agent.py", "Agent")],
+    "S5": [("S5_Ped1.py", "Ped1"), ("S5_Agent_Hybrid.py", "Agent")],
+    "M6": [("M6_Ped1.py", "Ped1"), ("M6_Ped2.py", "Ped2"), ("M6_Ped3.py", "Ped3"),
+           ("M6_Agent.py", "Agent")],
+    "M7": [("M7_Ped1.py", "Ped1"), ("M7_Ped2.py", "Ped2"), ("M7_Ped3.py", "Ped3"),
+           ("M7_Agent.py", "Agent")],
+}
+
+# Alternative agent scripts that run on the same world
+AGENT_VARIANTS = {
+    "S5": ["S5_Agent_Hybrid.py", "S5_Agent_Wait.py", "S5_Agent_FullVelocity.py"],
+    "M6": ["M6_Agent.py", "M6_Agent_M5upgrade.py"],
+}
+
+
+# Single controller driving every pedestrian of a world (see crowd_driver.py)
+CROWD_DRIVER = "crowd_driver.py"
+
+
+def controllers(name, agent=None, crowd=False):
+    # Entries are (script, self_def) or (script, self_def, args)
+    entries = list(CONTROLLERS[name])
+    if crowd:
+        entries = [(CROWD_DRIVER, "WorldSupervisor", (name,)), entries[-1]]
+    if agent is not None:
+        # "script.py arg ..." passes controllerArgs to the agent
+        script, *args = agent.split()
+        entries[-1] = (script, "Agent", tuple(args))
+    return entries
+
+
+def add_crowd(name, n, seed=0, agent="M6_Agent.py"):
+    # Registers a generated world of n pedestrians Ped1..PedN in a 6 m x 4 m
+    # corridor ahead of the agent, with a mix of the motions used by S*/M*.
+    # The agent script keeps its own pedestrian roles; the crowd is there to
+    # load the simulation.
+    rng = random.Random(seed)
+    layout, motion = {}, {}
+    for i in range(1, n + 1):
+        def_name = f"Ped{i}"
+        x, y = rng.uniform(-5.0, 1.0), rng.uniform(-2.0, 2.0)
+        kind = rng.choice(("static", "linear", "bounce", "wrap"))
+        speed = rng.uniform(0.25, 1.5)      # m/s
+        if kind == "static":
+            spec = {"kind": "static"}
+        elif kind == "linear":
+            heading = rng.choice((-1.0, 1.0))
+            spec = {"kind": "linear", "velocity": (speed * heading, speed * rng.uniform(-1.0, 1.0))}
+        elif kind == "bounce":
+            spec = {"kind": "bounce", "axis": 1, "speed": speed, "lo": -2.0, "hi": 2.0,
+                    "direction": rng.choice((-1, 1))}
+        else:
+            spec = {"kind": "wrap", "axis": 0, "speed": speed, "lo": -5.0, "hi": 1.0,
+                    "direction": rng.choice((-1, 1))}
+        layout[def_name] = (x, y, 0.0)
+        motion[def_name] = spec
+    SCENARIOS[name] = layout
+    PED_MOTION[name] = motion
+    CONTROLLERS[name] = [(CROWD_DRIVER, "WorldSupervisor", (name,)), (agent, "Agent")]
+    return name
+
+
+def build_world(name, max_steps=None, basic_time_step=BASIC_TIME_STEP):
+    world = World(basic_time_step=basic_time_step, max_steps=max_steps)
+    world.add_node("Agent", AGENT_START, rotation=AGENT_ROTATION, recognizable=False)
+    world.add_camera("Agent", "CAM")
+    for def_name, translation in SCENARIOS[name].items():
+        world.add_node(def_name, translation)
+    # Ped scripts such as S2_Ped1/S3_Ped1 run on a separate supervisor robot
+    world.add_node("WorldSupervisor", (0.0, 0.0, 0.0), recognizable=False)
+    return world
@@ -0,0 +1,165 @@
+# spacetime.py
+# Space-time A* over (x, y, t) against predicted pedestrian trajectories.
+# The lattice moves the agent one `stride` of steps at a time, in one of 8
+# headings at full speed or waiting in place; a move is blocked if any
+# pedestrian (extrapolated at its tracked velocity) comes within `clearance`
+# during it. Cost is time plus a small penalty for passing close.
+#
+# SpaceTimePlanner.follow() keeps the plan and the pedestrian prediction it was
+# made against, and only searches again when an observed pedestrian strays
+# more than `tolerance` from that prediction, the agent strays from the plan,
+# or the plan runs out - so most steps cost a lookup.
+# Units are the agents' own: metres and metres per step.
+import heapq
+import math
+import time
+
+import numpy as np
+
+HEADINGS = np.array([(math.cos(a), math.sin(a)) for a in np.arange(8) * math.pi / 4] + [(0.0, 0.0)])
+
+
+class SpaceTimePlanner:
+    def __init__(self, speed, stride=5, clearance=0.3, soft_clearance=0.5, proximity_weight=2.0,
+                 horizon=80, max_expansions=4000, budget_ms=None, greed=1.5, tolerance=0.1, goal_eps=0.05):
+        self.speed = speed
+        self.stride = stride
+        self.step_len = speed * stride
+        self.clearance = clearance
+        self.soft_clearance = soft_clearance
+        self.proximity_weight = proximity_weight
+        self.horizon = horizon              # lattice steps pedestrians are predicted for
+        self.max_expansions = max_expansions    # cap on one search; the best partial path is kept
+        self.budget_ms = budget_ms          # optional wall-clock cap on top (machine-dependent plans)
+        self.greed = greed                  # heuristic weight; > 1 trades optimality for fewer expansions
+        self.tolerance = tolerance
+        self.goal_eps = goal_eps
+
+        self.moves = HEADINGS * self.step_len                        # (9, 2)
+        self.sub = np.arange(1, stride + 1) / stride                 # fractions of a move per step
+        self.cell = self.step_len / 2                                # lattice points closer than this merge
+
+        # Cached plan: waypoints one stride apart, and what it assumed
+        self.path = None
+        self.plan_step = 0
+        self.ped_pos = None
+        self.ped_vel = None
+        self.searches = 0
+        self.expansions = 0
+
+    # === Search ===
+    def search(self, start, goal, ped_pos, ped_vel):
+        # -> (n + 1, 2) waypoints from start, one stride apart; the last is the
+        # goal or, if the search is cut short, the node closest to it
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        ped_pos = np.asarray(ped_pos, dtype=float).reshape(-1, 2)
+        ped_vel = np.asarray(ped_vel, dtype=float).reshape(-1, 2)
+        self.searches += 1
+        deadline = None if self.budget_ms is None else time.perf_counter() + self.budget_ms / 1000.0
+
+        clearance = self.clearance
+        if len(ped_pos):
+            # Already too close: plan against the current gap so moving away stays possible
+            now = np.hypot(*(ped_pos - start).T).min()
+            clearance = min(clearance, 0.9 * now)
+
+        # Heuristic: steps to the goal at full speed
+        to_steps = self.stride / self.step_len
+        start_key = (int(round(start[0] / self.cell)), int(round(start[1] / self.cell)), 0)
+        start_h = math.hypot(goal[0] - start[0], goal[1] - start[1]) * to_steps
+        parents = {start_key: None}
+        points = {start_key: start}
+        g_best = {start_key: 0.0}
+        heap = [(self.greed * start_h, 0, 0.0, start_key)]
+        counter = 1
+        best_key, best_h = start_key, start_h
+        expansions = 0
+
+        while heap and expansions < self.max_expansions:
+            _, _, g, key = heapq.heappop(heap)
+            if g > g_best[key]:
+                continue
+            p, k = points[key], key[2]
+            expansions += 1
+            if deadline is not None and expansions % 32 == 0 and time.perf_counter() > deadline:
+                break
+
+            remaining = math.hypot(goal[0] - p[0], goal[1] - p[1])
+            if remaining <= self.goal_eps:
+                best_key = key
+                break
+            if remaining * to_steps < best_h:
+                best_key, best_h = key, remaining * to_steps
+
+            # All successors and their sampled positions during the move: (9, stride, 2)
+            moves = self.moves.copy()
+            if remaining <= self.step_len:
+                moves[0] = goal - p      # the last move lands on the goal
+            samples = p + moves[:, None, :] * self.sub[None, :, None]
+            cost = np.full(len(moves), float(self.stride))
+            if len(ped_pos) and k < self.horizon:
+                t = (k * self.stride + np.arange(1, self.stride + 1))[:, None, None]
+                peds = ped_pos + ped_vel * t                                      # (stride, P, 2)
+                gap = np.hypot(samples[:, :, None, 0] - peds[None, ..., 0],
+                               samples[:, :, None, 1] - peds[None, ..., 1])      # (9, stride, P)
+                closest = gap.min(axis=(1, 2))
+                cost += self.proximity_weight * np.maximum(self.soft_clearance - closest, 0.0) * self.stride
+                cost[closest < clearance] = np.inf
+
+            ends = samples[:, -1]
+            cells = np.rint(ends / self.cell).astype(int).tolist()
+            g_child = (g + cost).tolist()
+            f_child = (g + cost + self.greed * np.hypot(*(goal - ends).T) * to_steps).tolist()
+            for m in np.flatnonzero(np.isfinite(cost)).tolist():
+                child = (cells[m][0], cells[m][1], k + 1)
+                if g_child[m] < g_best.get(child, np.inf):
+                    g_best[child] = g_child[m]
+                    parents[child] = key
+                    points[child] = ends[m]
+                    heapq.heappush(heap, (f_child[m], counter, g_child[m], child))
+                    counter += 1
+
+        self.expansions += expansions
+        path = []
+        key = best_key
+        while key is not None:
+            path.append(points[key])
+            key = parents[key]
+        return np.array(path[::-1])
+
+    # === Plan cache ===
+    def _stale(self, pos, ped_pos, step):
+        if self.path is None or len(self.ped_pos) != len(ped_pos):
+            return True
+        elapsed = step - self.plan_step
+        i = elapsed // self.stride
+        if i >= len(self.path) - 1:
+            return True
+        # Agent off the plan (it only follows it, so this means it was moved)
+        expect = self.path[i] + (self.path[i + 1] - self.path[i]) * (elapsed % self.stride) / self.stride
+        if math.hypot(pos[0] - expect[0], pos[1] - expect[1]) > self.tolerance:
+            return True
+        if not len(ped_pos):
+            return False
+        predicted = self.ped_pos + self.ped_vel * elapsed
+        return np.hypot(*(np.asarray(ped_pos) - predicted).T).max() > self.tolerance
+
+    def follow(self, pos, goal, ped_pos, ped_vel, step):
+        # Direction to move this step (length = fraction of full speed) and whether it replanned
+        pos = np.asarray(pos, dtype=float)[:2]
+        ped_pos = np.asarray(ped_pos, dtype=float).reshape(-1, 2)
+        replanned = self._stale(pos, ped_pos, step)
+        if replanned:
+            self.path = self.search(pos, goal, ped_pos, ped_vel)
+            self.plan_step = step
+            self.ped_pos = ped_pos.copy()
+            self.ped_vel = np.asarray(ped_vel, dtype=float).reshape(-1, 2).copy()
+            if len(self.path) < 2:
+                self.path = None         # boxed in: stand still and search again next step
+                return 0.0, 0.0, True
+
+        elapsed = step - self.plan_step
+        i = elapsed // self.stride
+        move = (self.path[i + 1] - self.path[i]) / self.stride / self.speed
+        return float(move[0]), float(move[1]), replanned
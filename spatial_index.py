@@ -0,0 +1,100 @@
+# spatial_index.py
+# Uniform-grid neighbour index for avoid_radius / cross_radius / safe_distance
+# queries in dense crowds. Points are kept sorted by the key of their square
+# cell (side cell_size), so the points of one cell are one slice of the order,
+# found with searchsorted. pairs() answers a radius query for many query
+# points at once; neighbour_pairs() does it for every point against all the
+# others. A single query point is cheaper with one np.hypot over all points.
+import itertools
+
+import numpy as np
+
+
+def _keys(ix, iy):
+    # Pack signed cell coordinates into one int64 per cell
+    return (ix.astype(np.int64) << 32) + iy.astype(np.int64)
+
+
+class UniformGrid:
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self.pos = np.zeros((0, 2))
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=int)              # point indices sorted by cell key
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.pos)
+
+    def _cell_keys(self, pos):
+        ij = np.floor(pos / self.cell_size)
+        return _keys(ij[:, 0], ij[:, 1])
+
+    def _sort(self):
+        self.order = np.argsort(self.keys, kind="stable")
+        self.sorted_keys = self.keys[self.order]
+
+    def rebuild(self, positions):
+        # Bulk (re)insert of every point
+        self.pos = np.array(positions, dtype=float)[:, :2]
+        self.keys = self._cell_keys(self.pos)
+        self._sort()
+
+    def move(self, positions, ids=None):
+        # Per-step update; the order is only re-sorted when a point changed cell
+        positions = np.asarray(positions, dtype=float)[..., :2]
+        if ids is None:
+            if len(positions) != len(self.pos):
+                return self.rebuild(positions)
+            ids = slice(None)
+        else:
+            ids = np.asarray(ids, dtype=int)
+        self.pos[ids] = positions
+        keys = self._cell_keys(self.pos[ids])
+        if (keys != self.keys[ids]).any():
+            self.keys[ids] = keys
+            self._sort()
+
+    def pairs(self, points, radius):
+        # Every (query q, point j) strictly closer than radius, for all query
+        # points at once: the cells within radius of each query's cell are
+        # looked up with searchsorted. -> (q, j, distance)
+        points = np.asarray(points, dtype=float)[:, :2]
+        reach = max(1, int(np.ceil(radius / self.cell_size)))
+        ij = np.floor(points / self.cell_size).astype(np.int64)
+        rows = np.arange(len(points))
+        found_q, found_j = [], []
+        for dx, dy in itertools.product(range(-reach, reach + 1), repeat=2):
+            wanted = _keys(ij[:, 0] + dx, ij[:, 1] + dy)
+            lo = np.searchsorted(self.sorted_keys, wanted, side="left")
+            counts = np.searchsorted(self.sorted_keys, wanted, side="right") - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+            found_q.append(np.repeat(rows, counts))
+            found_j.append(self.order[starts + np.arange(total)])
+        if not found_q:
+            empty = np.zeros(0, dtype=int)
+            return empty, empty, np.zeros(0)
+        q = np.concatenate(found_q)
+        j = np.concatenate(found_j)
+        d = np.hypot(points[q, 0] - self.pos[j, 0], points[q, 1] - self.pos[j, 1])
+        keep = d < radius
+        return q[keep], j[keep], d[keep]
+
+    def query(self, point, radius):
+        # -> (indices, distances) of points strictly closer than radius
+        _, idx, d = self.pairs(np.asarray(point, dtype=float)[None, :2], radius)
+        return idx, d
+
+
+def neighbour_pairs(pos, radius):
+    # Every ordered pair (i, j), i != j, closer than radius -> (i, j, distance)
+    grid = UniformGrid(radius)
+    grid.rebuild(pos)
+    i, j, d = grid.pairs(grid.pos, radius)
+    keep = i != j
+    return i[keep], j[keep], d[keep]
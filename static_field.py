@@ -0,0 +1,144 @@
+# static_field.py
+# Distance field for pedestrians that stand still. Each obstacle is rasterised
+# once onto a grid of `resolution` metres around it; afterwards the distance
+# to the nearest static obstacle, its gradient and an avoidance cost are
+# bilinear lookups that cost the same for one obstacle or a thousand.
+#
+# Values are only kept up to `reach` (the largest radius the agent compares
+# against) plus a few cells. nearest() refines the lookup with an exact
+# distance once it could be inside `reach`, so `d < radius` tests give the same
+# answer as measuring the obstacle directly.
+#
+# If an obstacle turns out to move, watch()/invalidate() drop it and
+# re-rasterise only the cells it covered; the caller handles it as a dynamic
+# pedestrian from then on.
+import math
+
+import numpy as np
+
+
+class StaticField:
+    def __init__(self, obstacles, reach, resolution=0.02):
+        self.points = np.array(obstacles, dtype=float).reshape(-1, 2)[:, :2]
+        self.active = np.ones(len(self.points), dtype=bool)
+        self.reach = float(reach)
+        self.h = float(resolution)
+        # Bilinear values are within h*sqrt(2) of the true distance; store a
+        # little beyond that so nothing inside reach is ever clipped
+        self.slack = self.h * math.sqrt(2)
+        self.limit = self.reach + 3 * self.h
+
+        pad = self.limit + self.h
+        if len(self.points):
+            lo = self.points.min(axis=0) - pad
+            hi = self.points.max(axis=0) + pad
+        else:
+            lo = hi = np.zeros(2)
+        self.origin = lo
+        self.shape = tuple((np.ceil((hi - lo) / self.h).astype(int) + 1).tolist())
+        self.dist = np.full(self.shape, self.limit)          # [ix, iy]
+        self.owner = np.full(self.shape, -1, dtype=int)      # nearest obstacle per node
+        self.rasterised = 0                                  # nodes written, for profiling
+        self._rasterise(0, self.shape[0], 0, self.shape[1])
+
+    def __len__(self):
+        return len(self.points)
+
+    # === Rasterisation ===
+    def _window(self, p):
+        # Node index ranges covered by an obstacle's disk of radius limit
+        lo = np.floor((p - self.limit - self.origin) / self.h).astype(int)
+        hi = np.ceil((p + self.limit - self.origin) / self.h).astype(int) + 1
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, self.shape)
+        return lo[0], hi[0], lo[1], hi[1]
+
+    def _rasterise(self, x0, x1, y0, y1):
+        # Recompute nodes [x0, x1) x [y0, y1) from every active obstacle touching them
+        dist = self.dist[x0:x1, y0:y1]
+        owner = self.owner[x0:x1, y0:y1]
+        dist.fill(self.limit)
+        owner.fill(-1)
+        for i in np.flatnonzero(self.active).tolist():
+            a0, a1, b0, b1 = self._window(self.points[i])
+            a0, a1, b0, b1 = max(a0, x0), min(a1, x1), max(b0, y0), min(b1, y1)
+            if a0 >= a1 or b0 >= b1:
+                continue
+            gx = self.origin[0] + np.arange(a0, a1) * self.h - self.points[i, 0]
+            gy = self.origin[1] + np.arange(b0, b1) * self.h - self.points[i, 1]
+            d = np.hypot(gx[:, None], gy[None, :])
+            sub = dist[a0 - x0:a1 - x0, b0 - y0:b1 - y0]
+            closer = d < sub
+            sub[closer] = d[closer]
+            owner[a0 - x0:a1 - x0, b0 - y0:b1 - y0][closer] = i
+        self.rasterised += dist.size
+
+    def invalidate(self, i):
+        # Obstacle i is no longer static: drop it and redo only the cells it covered
+        if not self.active[i]:
+            return
+        self.active[i] = False
+        self._rasterise(*self._window(self.points[i]))
+
+    def watch(self, positions, tol=1e-6):
+        # Compare observed positions (one per obstacle) with the rasterised
+        # ones; invalidate and return the indices of obstacles that moved
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        off = np.hypot(positions[:, 0] - self.points[:, 0], positions[:, 1] - self.points[:, 1])
+        moved = np.flatnonzero(self.active & (off > tol))
+        for i in moved.tolist():
+            self.invalidate(i)
+        return moved
+
+    # === Lookups ===
+    def _cell(self, pos):
+        # Lower-left node index and fractional offsets; inside is False off the grid
+        u = (np.asarray(pos, dtype=float)[..., :2] - self.origin) / self.h
+        ij = np.floor(u).astype(int)
+        inside = ((ij >= 0) & (ij < np.array(self.shape) - 1)).all(axis=-1)
+        ij = np.where(inside[..., None], ij, 0)
+        return ij[..., 0], ij[..., 1], u[..., 0] - ij[..., 0], u[..., 1] - ij[..., 1], inside
+
+    def sample(self, pos):
+        # Distance to the nearest static obstacle, capped at limit: (..., 2) -> (...)
+        i, j, fx, fy, inside = self._cell(pos)
+        d = self.dist
+        value = ((1 - fx) * (1 - fy) * d[i, j] + fx * (1 - fy) * d[i + 1, j]
+                 + (1 - fx) * fy * d[i, j + 1] + fx * fy * d[i + 1, j + 1])
+        return np.where(inside, value, self.limit)
+
+    def gradient(self, pos):
+        # Bilinear gradient of the distance (points away from the nearest obstacle)
+        i, j, fx, fy, inside = self._cell(pos)
+        d = self.dist
+        gx = ((1 - fy) * (d[i + 1, j] - d[i, j]) + fy * (d[i + 1, j + 1] - d[i, j + 1])) / self.h
+        gy = ((1 - fx) * (d[i, j + 1] - d[i, j]) + fx * (d[i + 1, j + 1] - d[i + 1, j])) / self.h
+        return np.stack([np.where(inside, gx, 0.0), np.where(inside, gy, 0.0)], axis=-1)
+
+    def cost(self, pos):
+        # Potential: 1 on an obstacle falling quadratically to 0 at reach
+        return np.maximum(1.0 - self.sample(pos) / self.reach, 0.0) ** 2
+
+    def nearest(self, pos):
+        # (index, distance) of the nearest static obstacle to one point, or
+        # (-1, inf) when none can be inside reach. Close ones are measured exactly
+        # against the obstacles owning the four surrounding nodes.
+        # Scalar path: this runs every agent step
+        x, y = float(pos[0]), float(pos[1])
+        u = (x - self.origin[0]) / self.h
+        v = (y - self.origin[1]) / self.h
+        i, j = math.floor(u), math.floor(v)
+        if not (0 <= i < self.shape[0] - 1 and 0 <= j < self.shape[1] - 1):
+            return -1, math.inf
+        fx, fy = u - i, v - j
+        (d00, d01), (d10, d11) = self.dist[i:i + 2, j:j + 2].tolist()
+        if ((1 - fx) * ((1 - fy) * d00 + fy * d01) + fx * ((1 - fy) * d10 + fy * d11)
+                >= self.reach + self.slack):
+            return -1, math.inf
+        best, best_d = -1, math.inf
+        for k in set(self.owner[i:i + 2, j:j + 2].ravel().tolist()):
+            if k >= 0 and self.active[k]:
+                d = math.hypot(x - self.points[k, 0], y - self.points[k, 1])
+                if d < best_d:
+                    best, best_d = k, d
+        return best, best_d
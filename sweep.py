@@ -0,0 +1,303 @@
+# sweep.py
+# Parameter sweeps over the batch policies. The tunables the agent scripts
+# hard-code (speed, avoid_radius, goal/avoid weights, stop_duration,
+# dodge_angle_deg, cross_radius, flee_shift, ...) are the PARAMS of their policy
+# in batch.py. A design is a full grid (--grid name=v1,v2,...) or random points
+# drawn uniformly from ranges (--random name=lo:hi --points n).
+#
+# Every point runs the same episodes: the pedestrians start jittered from the
+# scenario layout by a seed per episode, so points differ only in parameters.
+# Episodes are cut into chunks, and each (point, chunk) is one task for a
+# process pool running batch.BatchEngine headless. Per-episode safety metrics
+# (safety_metrics.py) stream back as tasks finish and are appended to a JSONL
+# file line by line, with the per-point summary rewritten next to it, so a
+# sweep stopped part way is still usable and rerunning it with the same --out
+# only runs the missing chunks. Every line carries its configuration key
+# (result_store.config_key) and seed; lines of another configuration or
+# chunking are left out of the summary and their episodes run again.
+# Finished episodes also go into a result_store.ResultStore; chunks it already
+# holds (same scripts, scenario, parameters and seed) are read from it instead
+# of being simulated, whatever sweep they were first run in. With
+# --trajectories DIR every simulated episode also logs its trajectory there,
+# one shard per episode, and the store keeps the shard's path. Pedestrian
+# tracks do not depend on the point, so with more than one point each
+# chunk's are computed once and replayed from ped_cache.py.
+#   python sweep.py S2 --grid avoid_radius=0.2,0.25,0.3 --grid goal_weight=0.3,0.45,0.6
+#   python sweep.py M7 --random cross_radius=0.4:0.8 --random flee_shift=0.03:0.15 --points 50
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import batch
+import ped_cache
+import scenarios
+from result_store import ResultStore, config_key
+from trajectory import MODES, TrajectoryRecorder
+
+
+def grid(axes):
+    # {name: [values]} -> every combination, as a list of {name: value}
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_design(ranges, n, seed=0):
+    # {name: (lo, hi)} -> n points drawn uniformly
+    rng = np.random.default_rng(seed)
+    return [{name: float(rng.uniform(lo, hi)) for name, (lo, hi) in ranges.items()} for _ in range(n)]
+
+
+def tunables(agent):
+    # Parameter names the agent's batch policy accepts
+    cls, _ = batch.POLICIES[os.path.basename(agent)]
+    return set(cls.PARAMS) | set(getattr(cls, "PLANNER", ()))
+
+
+def ped_starts(scenario, first, n, jitter, seed):
+    # Pedestrian starts of episodes first .. first + n - 1, (n, k, 2); each
+    # episode has its own seed, so every point and chunking sees the same ones
+    base = np.array([start[:2] for start in scenarios.SCENARIOS[scenario].values()])
+    starts = np.empty((n,) + base.shape)
+    for i in range(n):
+        rng = np.random.default_rng([seed, first + i])
+        starts[i] = base + rng.uniform(-jitter, jitter, base.shape)
+    return starts
+
+
+def _recorders(task):
+    # One single-shard TrajectoryRecorder per episode of the task, if asked for
+    out_dir = task.get("trajectory_dir")
+    if not out_dir:
+        return None
+    stem = os.path.splitext(os.path.basename(task["agent"]))[0]
+    tag = hashlib.sha1(task["point"].encode()).hexdigest()[:12]
+    k = len(scenarios.SCENARIOS[task["scenario"]])
+    return [TrajectoryRecorder(out_dir, k, shard_steps=task["steps"],
+                               prefix=f"{task['scenario']}_{stem}_{tag}_s{task['seed']}_e{task['first'] + i:06d}")
+            for i in range(task["episodes"])]
+
+
+def run_task(task):
+    # One chunk of episodes at one point, in a worker process
+    start = time.perf_counter()
+    n = task["episodes"]
+    starts = ped_starts(task["scenario"], task["first"], n, task["jitter"], task["seed"])
+    peds = ped_cache.replay(task["scenario"], task["steps"], starts) if task.get("ped_cache") else None
+    engine = batch.BatchEngine(task["scenario"], n, agent=task["agent"], params=task["params"], ped_starts=starts,
+                               peds=peds)
+    recorders = _recorders(task)
+
+    def log(engine):
+        # Every episode up to and including the step it arrived
+        for i, recorder in enumerate(recorders):
+            if engine.arrival_step[i] < 0 or engine.arrival_step[i] == engine.steps:
+                recorder.log(engine.pos[i], engine.yaw[i], engine.peds.pos[i], engine.dir[i, 0], engine.dir[i, 1],
+                             MODES[engine.policy.mode[i]])
+
+    metrics = engine.run(task["steps"], log if recorders else None)["metrics"]
+    trajectories = None
+    if recorders:
+        for recorder in recorders:
+            recorder.close()
+        trajectories = [os.path.abspath(recorder.paths[0]) if recorder.paths else None for recorder in recorders]
+    return {"key": task["key"], "seed": task["seed"], "point": task["point"], "params": task["params"],
+            "first": task["first"],
+            "arrival_step": metrics["arrival_step"].tolist(), "min_distance": metrics["min_distance"].tolist(),
+            "path_length": metrics["path_length"].tolist(), "path_overhead": metrics["path_overhead"].tolist(),
+            "collisions": metrics["collisions"].tolist(), "trajectory": trajectories,
+            "seconds": time.perf_counter() - start}
+
+
+class Summary:
+    # Per-point aggregates, updated one chunk at a time
+    def __init__(self):
+        self.points = {}
+
+    def add(self, chunk):
+        arrival = np.array(chunk["arrival_step"])
+        arrived = arrival >= 0
+        entry = self.points.setdefault(chunk["point"], {
+            "params": chunk["params"], "episodes": 0, "arrived": 0, "arrival_step_sum": 0.0, "collided": 0,
+            "min_distance": np.inf, "min_distance_sum": 0.0, "path_length_sum": 0.0, "overhead_sum": 0.0})
+        entry["episodes"] += len(arrival)
+        entry["arrived"] += int(arrived.sum())
+        entry["arrival_step_sum"] += float(arrival[arrived].sum())
+        entry["collided"] += int(np.count_nonzero(chunk["collisions"]))
+        entry["min_distance"] = min(entry["min_distance"], min(chunk["min_distance"]))
+        entry["min_distance_sum"] += float(np.sum(chunk["min_distance"]))
+        entry["path_length_sum"] += float(np.sum(chunk["path_length"]))
+        entry["overhead_sum"] += float(np.sum(chunk["path_overhead"]))
+
+    def rows(self):
+        rows = []
+        for entry in self.points.values():
+            n, arrived = entry["episodes"], entry["arrived"]
+            rows.append(dict(entry["params"], episodes=n, arrival_rate=arrived / n,
+                             mean_arrival_step=entry["arrival_step_sum"] / arrived if arrived else None,
+                             collision_rate=entry["collided"] / n,
+                             min_distance=entry["min_distance"], mean_min_distance=entry["min_distance_sum"] / n,
+                             mean_path_length=entry["path_length_sum"] / n,
+                             mean_path_overhead=entry["overhead_sum"] / n))
+        return rows
+
+    def save(self, path):
+        # Written whole and renamed over the old copy, so it is never half written
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.rows(), f, indent=1)
+        os.replace(path + ".tmp", path)
+
+
+def chunk_id(chunk):
+    # (configuration key, seed, first episode, episodes) of a task or result line
+    n = chunk["episodes"] if "episodes" in chunk else len(chunk["arrival_step"])
+    return chunk.get("key"), chunk.get("seed"), chunk["first"], n
+
+
+def load(path, wanted):
+    # Chunks of `wanted` (chunk ids) already in a (possibly partial) results
+    # file, their Summary and the number of other lines, which are skipped
+    done, summary, stale = set(), Summary(), 0
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    chunk = json.loads(line)
+                    if chunk_id(chunk) not in wanted or chunk_id(chunk) in done:
+                        stale += 1
+                        continue
+                    done.add(chunk_id(chunk))
+                    summary.add(chunk)
+    return done, summary, stale
+
+
+def point_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def run(scenario, agent, design, episodes=100, steps=500, chunk=None, jitter=0.1, seed=0,
+        out="sweep_results.jsonl", workers=None, quiet=False, store=None, trajectory_dir=None, ped_tracks=True):
+    # Run every point of the design and return the summary rows; chunks
+    # already in `out` are skipped, chunks in `store` (a ResultStore path) are
+    # read back; trajectory_dir: record every simulated episode's trajectory;
+    # ped_tracks: replay pedestrian tracks from ped_cache.py across points
+    store = ResultStore(store) if store else None
+    register = config_key if store is None else store.register
+    keys = {point_key(params): register(scenario, agent, params, steps, jitter) for params in design}
+    chunk = chunk or episodes
+    tasks = [{"scenario": scenario, "agent": agent, "params": params, "point": point_key(params),
+              "key": keys[point_key(params)], "first": first, "episodes": min(chunk, episodes - first),
+              "steps": steps, "jitter": jitter, "seed": seed, "trajectory_dir": trajectory_dir,
+              "ped_cache": ped_tracks and len(design) > 1}
+             for params in design for first in range(0, episodes, chunk)]
+    done, summary, stale = load(out, {chunk_id(task) for task in tasks})
+    if stale and not quiet:
+        print(f"{out}: skipping {stale} line(s) of another configuration or chunking")
+    tasks = [task for task in tasks if chunk_id(task) not in done]
+    summary_path = os.path.splitext(out)[0] + "_summary.json"
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out, "a") as f:
+        def finish(result, count):
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            summary.add(result)
+            summary.save(summary_path)
+            if not quiet:
+                source = "cached" if result["seconds"] is None else f"in {result['seconds']:.2f}s"
+                print(f"[{count}/{len(tasks)}] {result['point']} episodes {result['first']}+"
+                      f"{len(result['arrival_step'])} {source} ({time.perf_counter() - start:.1f}s elapsed)")
+
+        count = 0
+        futures = []
+        for task in tasks:
+            cached = None if store is None else store.get(task["key"], seed, task["first"], task["episodes"])
+            if cached is None:
+                futures.append(pool.submit(run_task, task))
+            else:
+                count += 1
+                finish(dict(cached, key=task["key"], seed=seed, point=task["point"], params=task["params"],
+                            first=task["first"], seconds=None), count)
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if store is not None:
+                    store.put(result["key"], seed, result["first"], result, result["trajectory"])
+                count += 1
+                finish(result, count)
+        except KeyboardInterrupt:
+            # Keep what finished; the rest runs on a rerun with the same --out
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            if store is not None:
+                store.close()
+    return summary.rows()
+
+
+def _values(text):
+    return [float(value) for value in text.split(",")]
+
+
+def _range(text):
+    lo, hi = text.split(":")
+    return float(lo), float(hi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep agent parameters over batched episodes on a process pool")
+    parser.add_argument("scenario", choices=sorted(scenarios.CONTROLLERS))
+    parser.add_argument("--agent", help="agent script, defaults to the scenario's agent")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="grid axis; repeat for more axes")
+    parser.add_argument("--random", action="append", default=[], metavar="NAME=LO:HI",
+                        help="uniform range for a random design; repeat for more parameters")
+    parser.add_argument("--points", type=int, default=20, help="points of a random design")
+    parser.add_argument("--episodes", type=int, default=100, help="episodes per point")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--chunk", type=int, help="episodes per task (default: all of a point's)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="pedestrian start jitter in m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="sweep_results.jsonl")
+    parser.add_argument("--store", default="sweep_store.sqlite",
+                        help="result store shared across sweeps; empty to run everything")
+    parser.add_argument("--trajectories", metavar="DIR",
+                        help="record each simulated episode's trajectory (trajectory.py) under DIR")
+    parser.add_argument("--no-ped-cache", action="store_true",
+                        help="step the pedestrians for every point instead of replaying cached tracks")
+    args = parser.parse_args()
+
+    agent = args.agent or scenarios.CONTROLLERS[args.scenario][-1][0]
+    if os.path.basename(agent) not in batch.POLICIES:
+        parser.error(f"{agent} has no batch policy to sweep")
+    if bool(args.grid) == bool(args.random):
+        parser.error("give either --grid or --random axes")
+    axes = dict(item.split("=", 1) for item in args.grid + args.random)
+    unknown = set(axes) - tunables(agent)
+    if unknown:
+        parser.error(f"{agent} has no parameter(s) {sorted(unknown)}; choose from {sorted(tunables(agent))}")
+    if args.grid:
+        design = grid({name: _values(text) for name, text in axes.items()})
+    else:
+        design = random_design({name: _range(text) for name, text in axes.items()}, args.points, args.seed)
+
+    rows = run(args.scenario, agent, design, args.episodes, args.steps, args.chunk, args.jitter, args.seed,
+               args.out, args.workers, store=args.store, trajectory_dir=args.trajectories,
+               ped_tracks=not args.no_ped_cache)
+    for row in sorted(rows, key=lambda row: (row["collision_rate"], -row["arrival_rate"], -row["mean_min_distance"])):
+        params = ", ".join(f"{name}={row[name]:g}" for name in axes)
+        arrival = "-" if row["mean_arrival_step"] is None else f"{row['mean_arrival_step']:.1f}"
+        print(f"{params}: arrived {row['arrival_rate']:.0%}, mean arrival step {arrival}, "
+              f"collisions {row['collision_rate']:.0%}, min distance {row['min_distance']:.3f} m "
+              f"(mean {row['mean_min_distance']:.3f}), path overhead {row['mean_path_overhead']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
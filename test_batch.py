@@ -0,0 +1,54 @@
+# test_batch.py
+# Batch policies against the agent scripts they replicate, run under cosim.py
+import numpy as np
+import pytest
+
+import batch
+import cosim
+import scenarios
+import trajectory
+
+STEPS = 400
+
+# Agent script -> scenario it runs on
+AGENTS = {agent: scenario for scenario, entries in scenarios.CONTROLLERS.items() for agent, _ in entries[-1:]}
+AGENTS.update({agent: scenario for scenario, agents in scenarios.AGENT_VARIANTS.items() for agent in agents})
+AGENTS["DWA_Agent.py"] = "M7"
+
+
+def _script_run(tmp_path, monkeypatch, scenario, agent):
+    monkeypatch.setenv("TRAJECTORY_DIR", str(tmp_path))
+    monkeypatch.setenv("CRUISE", "0")
+    cosim.run_scenario(scenario, STEPS, agent)
+    (rows,) = trajectory.load(str(tmp_path), agent[:-3])
+    return rows
+
+
+@pytest.mark.parametrize("agent", sorted(AGENTS))
+def test_batch_follows_the_script(tmp_path, monkeypatch, agent):
+    scenario = AGENTS[agent]
+    rows = _script_run(tmp_path, monkeypatch, scenario, agent)
+    engine = batch.BatchEngine(scenario, 3, agent=agent)
+    for row in rows:
+        engine.step()
+        np.testing.assert_allclose(engine.pos, np.broadcast_to([row["x"], row["y"]], (3, 2)), atol=1e-5)
+        assert (engine.policy.mode == row["mode"]).all()
+        if row["mode"] != trajectory.MODE_CODES["arrived"]:
+            # The M-series agents stop sensing once arrived, so that row keeps the last positions
+            np.testing.assert_allclose(engine.peds.pos[0], row["peds"], atol=1e-5)
+
+
+def test_policy_requires_step():
+    with pytest.raises(TypeError):
+        batch.Policy(1)
+
+
+@pytest.mark.parametrize("scenario", ["S2", "S5", "M6", "M7"])
+@pytest.mark.parametrize("step_ms", [40, 100])
+def test_coarse_steps_end_in_the_same_place(scenario, step_ms):
+    # Substepping (units.substeps) keeps the motion of the reference step
+    agent = scenarios.CONTROLLERS[scenario][-1][0]
+    reference = cosim.run_scenario(scenario, STEPS, agent, quiet=True)
+    coarse = cosim.run_scenario(scenario, STEPS * scenarios.BASIC_TIME_STEP // step_ms, agent, step_ms=step_ms)
+    end = reference.by_def["Agent"].getField("translation").getSFVec3f()
+    np.testing.assert_allclose(coarse.by_def["Agent"].getField("translation").getSFVec3f(), end, atol=1e-3)
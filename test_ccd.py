@@ -0,0 +1,58 @@
+# test_ccd.py
+# Closed forms against densely sampled straight-line motion
+import numpy as np
+import pytest
+
+import ccd
+from safety_metrics import SafetyMetrics
+
+T = np.linspace(0.0, 1.0, 20001)[:, None, None, None]
+
+
+@pytest.fixture
+def segments():
+    rng = np.random.default_rng(1)
+    return tuple(rng.uniform(-1.0, 1.0, (200, 5, 2)) for _ in range(4))
+
+
+def _sampled(a0, a1, p0, p1):
+    rel = (p0 + T * (p1 - p0)) - (a0 + T * (a1 - a0))
+    return np.hypot(rel[..., 0], rel[..., 1])
+
+
+def test_swept_distance_is_the_closest_approach(segments):
+    np.testing.assert_allclose(ccd.swept_distance(*segments), _sampled(*segments).min(axis=0), atol=1e-5)
+
+
+def test_first_contact_is_the_first_sample_inside(segments):
+    radius = 0.3
+    d = _sampled(*segments)
+    inside = d < radius
+    t = ccd.first_contact(*segments, radius)
+    assert (np.isnan(t) == ~inside.any(axis=0)).all()
+    first = np.argmax(inside, axis=0) / (len(T) - 1)
+    np.testing.assert_allclose(t[inside.any(axis=0)], first[inside.any(axis=0)], atol=1e-4)
+
+
+def test_still_and_touching():
+    assert ccd.swept_distance([0, 0], [0, 0], [1, 0], [1, 0]) == 1.0
+    assert np.isnan(ccd.first_contact([0, 0], [0, 0], [1, 0], [1, 0], 0.5))
+    assert ccd.first_contact([0, 0], [0, 0], [0.2, 0], [1, 0], 0.5) == 0.0
+
+
+def test_jumps_are_measured_at_the_end():
+    # A wrap-around teleport through the agent is no contact
+    assert ccd.swept_distance([0, 0], [0, 0], [1, 0], [-5, 0]) == 0.0
+    assert ccd.swept_distance([0, 0], [0, 0], [1, 0], [-5, 0], jump=2.0) == 5.0
+
+
+def test_metrics_catch_a_pass_between_steps():
+    # The pedestrian crosses the agent's line within one 0.2 s step: 0.4 m
+    # away before and after, straight through the agent in between
+    metrics = SafetyMetrics(1, 1, [0.0, 0.0], [-2.0, 0.0], dt=0.2)
+    metrics.update([[0.0, 0.0]], [[[0.0, -0.4]]])
+    metrics.update([[0.0, 0.0]], [[[0.0, 0.4]]])
+    result = metrics.result()
+    assert result["collisions"][0] == 1
+    assert result["min_distance"][0] == pytest.approx(0.0)
+    assert result["first_collision"][0] == pytest.approx(1 + 0.25 / 0.8)
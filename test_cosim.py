@@ -0,0 +1,20 @@
+# test_cosim.py
+import math
+import sys
+
+import batch
+import cosim
+
+
+def test_scenario_runs_to_arrival_and_keeps_argv(monkeypatch):
+    monkeypatch.setenv("CRUISE", "0")
+    monkeypatch.setenv("DETECTION_LOG", "off")
+    monkeypatch.delenv("TRAJECTORY_DIR", raising=False)
+    argv = list(sys.argv)
+    world = cosim.run_scenario("S2", 400)
+    assert sys.argv == argv
+    agent = next(node for node in world.nodes if node.def_name == "Agent")
+    x, y = agent.fields["translation"]._value[:2]
+    cls, overrides = batch.POLICIES["S2_Agent.py"]
+    gx, gy = overrides.get("destination", cls.PARAMS["destination"])
+    assert math.hypot(x - gx, y - gy) < 0.1
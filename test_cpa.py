@@ -0,0 +1,64 @@
+# test_cpa.py
+import math
+
+import numpy as np
+import pytest
+
+from cpa import CpaTrigger, closest_approach, rank
+
+
+def test_crossing_matches_closed_form():
+    # Pedestrian at (1, -2) walking +Y at 1 m/s, agent walking -X at 0.5 m/s:
+    # relative velocity (0.5, 1), closest after 1.2 s at (1.6, -0.8)
+    tcpa, dcpa = closest_approach([1.0, -2.0], np.subtract([0.0, 1.0], [-0.5, 0.0]))
+    assert tcpa == pytest.approx(1.2)
+    assert dcpa == pytest.approx(math.hypot(1.6, -0.8))
+
+
+def test_separating_or_still_is_now():
+    tcpa, dcpa = closest_approach([[1.0, 0.0], [0.0, 2.0]], [[1.0, 0.0], [0.0, 0.0]])
+    np.testing.assert_allclose(tcpa, [0.0, 0.0])
+    np.testing.assert_allclose(dcpa, [1.0, 2.0])
+
+
+def test_batched_shapes():
+    rng = np.random.default_rng(0)
+    rel_pos, rel_vel = rng.normal(size=(4, 3, 2)), rng.normal(size=(4, 3, 2))
+    tcpa, dcpa = closest_approach(rel_pos, rel_vel)
+    assert tcpa.shape == dcpa.shape == (4, 3)
+    for t, d, p, v in zip(tcpa.ravel(), dcpa.ravel(), rel_pos.reshape(-1, 2), rel_vel.reshape(-1, 2)):
+        # Brute force over a fine time grid
+        times = np.linspace(0.0, 10.0, 100001)
+        gaps = np.hypot(p[0] + v[0] * times, p[1] + v[1] * times)
+        assert d == pytest.approx(gaps.min(), abs=1e-6)
+        assert t == pytest.approx(times[gaps.argmin()], abs=1e-3)
+
+
+def test_contact_radius_triggers_immediately():
+    # Both pedestrians walk away; only the one inside radius / 2 is a threat
+    trigger = CpaTrigger(radius=0.4, dt=0.02)
+    near = trigger.near([0.0, 0.0], [[0.15, 0.0], [0.3, 0.0]], ped_vel=[[1.0, 0.0], [1.0, 0.0]])
+    assert near.tolist() == [True, False]
+
+
+def test_horizon_cuts_off_later_passes():
+    # Head-on at 1 m/s from 2 m: closest approach (a hit) in 2 s
+    ped, vel = [[2.0, 0.0]], [[-1.0, 0.0]]
+    assert not CpaTrigger(radius=0.4, dt=0.02, horizon=1.5).near([0.0, 0.0], ped, vel)[0]
+    assert CpaTrigger(radius=0.4, dt=0.02, horizon=2.5).near([0.0, 0.0], ped, vel)[0]
+
+
+def test_miss_outside_radius_is_no_threat():
+    trigger = CpaTrigger(radius=0.4, dt=0.02)
+    assert not trigger.near([0.0, 0.0], [[1.0, 0.5]], [[-1.0, 0.0]])[0]
+    assert trigger.dcpa[0] == pytest.approx(0.5)
+
+
+def test_rank_soonest_close_pass_first():
+    tcpa = np.array([2.0, 0.5, 1.0, 0.1, 1.0])
+    dcpa = np.array([0.1, 0.2, 0.3, 0.9, 0.0])
+    assert rank(tcpa, dcpa, 0.4).tolist() == [1, 2, 4, 0]
+
+    trigger = CpaTrigger(radius=0.4, dt=0.02, horizon=5.0)
+    trigger.near([0.0, 0.0], [[3.0, 0.0], [1.0, 0.1], [0.0, 2.0]], [[-1.0, 0.0], [-1.0, 0.0], [1.0, 0.0]])
+    assert trigger.ranking().tolist() == [1, 0]
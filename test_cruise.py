@@ -0,0 +1,69 @@
+# test_cruise.py
+# Cruise mode sleeps through pedestrian-free stretches but must end where
+# stepping every basic time step does
+import numpy as np
+import pytest
+
+import cosim
+import cruise
+import headless
+import scenarios
+from agent_core import PedestrianArray
+
+AGENTS = [(scenario, entries[-1][0]) for scenario, entries in scenarios.CONTROLLERS.items()]
+AGENTS += [(scenario, agent) for scenario, agents in scenarios.AGENT_VARIANTS.items() for agent in agents[1:]]
+
+
+def _end(monkeypatch, scenario, agent, setting, steps=600):
+    monkeypatch.setenv("CRUISE", setting)
+    world = cosim.run_scenario(scenario, steps, agent)
+    return world.by_def["Agent"].getField("translation").getSFVec3f()
+
+
+@pytest.mark.parametrize("scenario, agent", AGENTS)
+def test_cruise_ends_in_the_same_place(monkeypatch, scenario, agent):
+    np.testing.assert_allclose(_end(monkeypatch, scenario, agent, "1"), _end(monkeypatch, scenario, agent, "0"),
+                               atol=1e-9)
+
+
+@pytest.mark.parametrize("scenario, agent", AGENTS)
+def test_cruise_with_substeps_ends_in_the_same_place(monkeypatch, scenario, agent):
+    # 40 ms steps run two substeps each, the first one after a coast spanning the gap
+    ends = []
+    for setting in ("1", "0"):
+        monkeypatch.setenv("CRUISE", setting)
+        world = cosim.run_scenario(scenario, 300, agent, step_ms=40)
+        ends.append(world.by_def["Agent"].getField("translation").getSFVec3f())
+    np.testing.assert_allclose(ends[0], ends[1], atol=1e-9)
+
+
+def test_off_unless_asked_for(monkeypatch):
+    monkeypatch.delenv("CRUISE", raising=False)
+    assert not cruise.enabled()
+    monkeypatch.setenv("CRUISE", "1")
+    assert cruise.enabled()
+
+
+def test_velocity_after_a_coast_spans_the_gap():
+    # Ped1 walks at constant velocity; the finite-difference tracker must see
+    # the same velocity after a coast as stepping every step, on every substep
+    world = scenarios.build_world("M7", basic_time_step=40)
+    headless.bind(world, "Agent")
+    peds = PedestrianArray(headless.Supervisor(), {"Ped1": "moving"}, gains=(1.0, 1.0))
+    ped = world.by_def["Ped1"].getField("translation")
+    step = np.array([0.03, -0.01])    # m per basic time step
+
+    def walk(steps):
+        ped.setSFVec3f(list(np.asarray(ped.getSFVec3f()[:2]) + step * steps) + [0.0])
+        peds.read()
+
+    walk(0)
+    for coast in (0, 3, 0, 5):
+        walk(1 + coast)
+        if coast:
+            peds.skip(coast)
+        for k in range(1, peds.n_sub + 1):
+            peds.sense([0.0, 0.0], k, peds.n_sub)
+            vel = peds.update_velocity()
+            if peds.tracker.ready[0]:
+                np.testing.assert_allclose(vel[0], step / peds.n_sub, atol=1e-12)
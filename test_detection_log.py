@@ -0,0 +1,76 @@
+# test_detection_log.py
+import gc
+import os
+import weakref
+
+import cosim
+import detection_log
+import headless
+from detection_log import DetectionRecorder
+
+
+class Obj:
+    def __init__(self, obj_id):
+        self.obj_id = obj_id
+
+    def getId(self):
+        return self.obj_id
+
+    def getPositionOnImage(self):
+        return 10, 20
+
+    def getSizeOnImage(self):
+        return 3, 4
+
+
+def test_off_by_default_and_not_kept_alive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DETECTION_LOG", raising=False)
+    recorder = DetectionRecorder.for_controller("S2_Agent")
+    recorder.record([Obj(1)])
+    ref = weakref.ref(recorder)
+    del recorder
+    gc.collect()
+    assert ref() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_file_log_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("DETECTION_LOG", str(tmp_path))
+    recorder = DetectionRecorder.for_controller("S2_Agent", capacity=2)
+    for step in range(1, 4):
+        recorder.record([Obj(1), Obj(2)], step=step)
+    recorder.close()
+    rows = detection_log.load(str(tmp_path / "S2_Agent_detections.bin"))
+    assert rows["step"].tolist() == [1, 1, 2, 2, 3, 3]
+    assert rows["id"].tolist() == [1, 2] * 3
+
+
+def test_summary_printed_on_close(monkeypatch, capsys):
+    monkeypatch.setenv("DETECTION_LOG", "summary")
+    recorder = DetectionRecorder.for_controller("S2_Agent")
+    recorder.record([Obj(7)], step=3)
+    recorder.record([Obj(7)], step=5)
+    recorder.close()
+    assert "ID 7: 2 detections in steps 3-5" in capsys.readouterr().out
+
+
+def test_agents_close_their_log_when_the_run_ends(tmp_path, monkeypatch):
+    monkeypatch.setenv("DETECTION_LOG", str(tmp_path))
+    monkeypatch.setenv("CRUISE", "0")
+    cosim.run_scenario("S2", 300)
+    rows = detection_log.load(str(tmp_path / "S2_Agent_detections.bin"))
+    assert len(rows) and (rows["id"] >= 0).all()
+
+
+def test_agents_skip_recognition_when_off(monkeypatch):
+    calls = []
+    read = headless.Camera.getRecognitionObjects
+    monkeypatch.setattr(headless.Camera, "getRecognitionObjects", lambda self: calls.append(1) or read(self))
+    monkeypatch.setenv("CRUISE", "0")
+    monkeypatch.setenv("DETECTION_LOG", "off")
+    cosim.run_scenario("S2", 100)
+    assert calls == []
+    monkeypatch.setenv("DETECTION_LOG", "summary")
+    cosim.run_scenario("S2", 100)
+    assert calls
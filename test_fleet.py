@@ -0,0 +1,53 @@
+# test_fleet.py
+import numpy as np
+import pytest
+
+from fleet import Fleet
+
+
+def _head_on(agent_weight):
+    # Two agents walking at each other, 0.1 m apart sideways, no pedestrians
+    fleet = Fleet(2, length=10.0, width=2.0, peds=0, agent_weight=agent_weight)
+    fleet.pos[:] = [[4.0, -0.05], [6.0, 0.05]]
+    fleet.heading[:] = [1.0, -1.0]
+    fleet.goal[:] = [[10.0, -0.05], [0.0, 0.05]]
+    return fleet, fleet.run(150)
+
+
+def test_agents_that_ignore_each_other_touch():
+    fleet, result = _head_on(0.0)
+    assert result["min_separation"] == pytest.approx(0.1)
+    assert result["contacts"] > 0
+    np.testing.assert_allclose(fleet.pos[:, 1], [-0.05, 0.05])
+
+
+def test_agents_dodge_each_other():
+    fleet, result = _head_on(0.5)
+    assert result["contacts"] == 0
+    assert result["min_separation"] > 2 * fleet.body_radius
+    # Each stepped to its own side and both got past
+    assert fleet.pos[0, 1] < -0.05 and fleet.pos[1, 1] > 0.05
+    assert fleet.pos[0, 0] > 6.0 and fleet.pos[1, 0] < 4.0
+
+
+def test_arrivals_turn_round():
+    fleet = Fleet(1, length=10.0, width=2.0, peds=0)
+    fleet.pos[:] = [[9.9, 0.0]]
+    fleet.heading[:] = [1.0]
+    fleet.goal[:] = [[10.0, 0.0]]
+    result = fleet.run(10)
+    assert result["arrivals"] == 1
+    assert fleet.heading[0] == -1.0
+    assert fleet.goal[0, 0] == 0.0
+    assert fleet.pos[0, 0] < 10.0
+
+
+def test_neighbours_match_brute_force():
+    fleet = Fleet(300, length=20.0, width=4.0, peds=600, seed=1)
+    fleet.run(5)
+    i, j, d, points = fleet._neighbours()
+    gap = np.hypot(fleet.pos[:, None, 0] - points[None, :, 0], fleet.pos[:, None, 1] - points[None, :, 1])
+    gap[np.arange(fleet.n), np.arange(fleet.n)] = np.inf
+    expected = set(zip(*(index.tolist() for index in np.nonzero(gap < fleet.avoid_radius))))
+    assert set(zip(i.tolist(), j.tolist())) == expected
+    np.testing.assert_allclose(d, gap[i, j])
@@ -0,0 +1,78 @@
+# test_monte_carlo.py
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+import monte_carlo
+from monte_carlo import decide, evaluate, wilson
+
+Z95 = NormalDist().inv_cdf(0.975)
+
+
+def test_wilson_interval():
+    lo, hi = wilson(0, 100, Z95)
+    assert lo == 0.0 and hi == pytest.approx(Z95 ** 2 / (100 + Z95 ** 2))
+    lo, hi = wilson(50, 100, Z95)
+    assert (lo + hi) / 2 == pytest.approx(0.5) and hi - lo == pytest.approx(0.192, abs=1e-3)
+    assert wilson(0, 0, Z95) == (0.0, 1.0)
+
+
+@pytest.mark.parametrize("collided, episodes, verdict", [
+    (0, 200, "safe"), (60, 100, "unsafe"), (5, 100, None), (500, 10000, "estimated")])
+def test_decide(collided, episodes, verdict):
+    assert decide(collided, episodes, Z95, 0.05, 0.005)[0] == verdict
+
+
+def _fake_batches(monkeypatch, rate):
+    # Every batch collides in a fixed share of its episodes
+    def run_batch(scenario, agent, params, first, n, steps, dists, seed):
+        hit = (np.arange(first, first + n) % 100) < rate * 100
+        return hit, np.ones(n, dtype=bool), np.full(n, 0.5), 10
+    monkeypatch.setattr(monte_carlo, "run_batch", run_batch)
+
+
+@pytest.mark.parametrize("rate, verdict, batches", [(0.0, "safe", 4), (0.5, "unsafe", 1)])
+def test_clear_configurations_stop_early(monkeypatch, rate, verdict, batches):
+    _fake_batches(monkeypatch, rate)
+    result = evaluate("S2", batch_size=64, max_episodes=4096)
+    assert result["verdict"] == verdict
+    assert result["episodes"] == 64 * batches
+
+
+def test_borderline_configuration_runs_to_the_budget(monkeypatch):
+    _fake_batches(monkeypatch, 0.05)
+    result = evaluate("S2", batch_size=64, max_episodes=256, precision=0.0)
+    assert result["verdict"] == "budget" and result["episodes"] == 256
+    lo, hi = result["interval"]
+    assert lo < 0.05 < hi
+
+
+def test_error_is_split_over_every_look(monkeypatch):
+    # 64 looks at 95%: each interval is a 1 - 0.05 / 64 one
+    _fake_batches(monkeypatch, 0.0)
+    result = evaluate("S2", batch_size=64, max_episodes=4096, threshold=0.0, precision=0.0)
+    z = NormalDist().inv_cdf(1 - 0.05 / (2 * math.ceil(4096 / 64)))
+    assert result["interval"][1] == pytest.approx(wilson(0, 4096, z)[1])
+
+
+@pytest.mark.parametrize("batch_size, max_episodes", [(0, 10), (10, 0), (-1, -1)])
+def test_rejects_empty_budgets(batch_size, max_episodes):
+    with pytest.raises(ValueError):
+        evaluate("S2", batch_size=batch_size, max_episodes=max_episodes)
+
+
+def test_draws_do_not_depend_on_batching():
+    dists = monte_carlo.DISTRIBUTIONS
+    whole = monte_carlo.sample("M7", "M7_Agent.py", 0, 8, dists, 3)
+    parts = [monte_carlo.sample("M7", "M7_Agent.py", first, 4, dists, 3) for first in (0, 4)]
+    np.testing.assert_array_equal(whole["agent_start"], np.concatenate([p["agent_start"] for p in parts]))
+    np.testing.assert_array_equal(whole["peds"].start, np.concatenate([p["peds"].start for p in parts]))
+
+
+def test_real_batch_runs():
+    hit, done, closest, steps = monte_carlo.run_batch("S5", "S5_Agent_Hybrid.py", None, 0, 8, 500,
+                                                      monte_carlo.DISTRIBUTIONS, 0)
+    assert hit.shape == done.shape == closest.shape == (8,)
+    assert done.all() and steps < 500
@@ -0,0 +1,85 @@
+# test_ped_cache.py
+import os
+
+import numpy as np
+import pytest
+
+import batch
+import ped_cache
+import pedmotion
+import sweep
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ped_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("PED_CACHE_DIR", str(tmp_path))       # for spawned sweep workers
+    monkeypatch.setattr(ped_cache, "_memory", ped_cache.OrderedDict())
+    return tmp_path
+
+
+def test_replay_matches_stepping_every_episode():
+    starts = sweep.ped_starts("M7", 0, 8, 0.2, 0)
+    replay = ped_cache.replay("M7", 300, starts)
+    table = pedmotion.for_scenario("M7", 8, starts=starts)
+    np.testing.assert_array_equal(replay.pos, table.pos)
+    for _ in range(300):
+        replay.step()
+        table.step()
+        np.testing.assert_array_equal(replay.pos, table.pos)
+    # Episodes keep their own starts
+    assert not np.array_equal(replay.pos[0], replay.pos[1])
+    with pytest.raises(IndexError):
+        replay.step()
+
+
+def test_key_covers_starts_overrides_and_step():
+    starts = sweep.ped_starts("M7", 0, 4, 0.1, 0)
+    key = ped_cache.cache_key(pedmotion.for_scenario("M7", starts=starts))
+    assert key == ped_cache.cache_key(pedmotion.for_scenario("M7", starts=starts.copy()))
+    assert key != ped_cache.cache_key(pedmotion.for_scenario("M7", starts=sweep.ped_starts("M7", 4, 4, 0.1, 0)))
+    assert key != ped_cache.cache_key(pedmotion.for_scenario("M7", starts=starts,
+                                                             overrides={"Ped2": {"speed": 1.0}}))
+    table = pedmotion.for_scenario("M7", starts=starts)
+    coarse = pedmotion.MotionTable(table.specs, starts, step_ms=40)
+    assert key != ped_cache.cache_key(coarse)
+
+
+def test_disk_copy_is_reused_and_extended(cache):
+    starts = sweep.ped_starts("M6", 0, 3, 0.1, 0)
+    first = ped_cache.track("M6", 100, starts)
+    (name,) = os.listdir(cache)
+    ped_cache._memory.clear()
+    again = ped_cache.track("M6", 50, starts)
+    assert isinstance(again, np.memmap)
+    np.testing.assert_array_equal(again, first[:51])
+    longer = ped_cache.track("M6", 200, starts)
+    assert longer.shape == (201, 3, 3, 2)
+    np.testing.assert_array_equal(longer[:101], first)
+    assert os.listdir(cache) == [name]
+
+
+def test_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr(ped_cache, "MEMORY_BYTES", 3 * 101 * 4 * 3 * 2 * 8)
+    for first in range(0, 24, 4):
+        ped_cache.track("M7", 100, sweep.ped_starts("M7", first, 4, 0.1, 0))
+    assert len(ped_cache._memory) == 3
+    assert sum(p.nbytes for p in ped_cache._memory.values()) <= ped_cache.MEMORY_BYTES
+
+
+def test_engine_on_a_replay_matches_the_motion_table():
+    starts = sweep.ped_starts("M7", 0, 16, 0.1, 0)
+    direct = batch.BatchEngine("M7", 16, ped_starts=starts).run(300)
+    replayed = batch.BatchEngine("M7", 16, peds=ped_cache.replay("M7", 300, starts)).run(300)
+    np.testing.assert_array_equal(direct["pos"], replayed["pos"])
+    np.testing.assert_array_equal(direct["arrival_step"], replayed["arrival_step"])
+
+
+def test_sweep_points_share_tracks(cache, tmp_path):
+    design = [{"cross_radius": 0.5}, {"cross_radius": 0.7}]
+    kwargs = dict(episodes=6, chunk=3, steps=200, workers=1, quiet=True, store=None)
+    cached = sweep.run("M7", "M7_Agent.py", design, out=str(tmp_path / "a.jsonl"), **kwargs)
+    # One track file per chunk, shared by both points
+    assert len([name for name in os.listdir(cache) if name.endswith(".npy")]) == 2
+    direct = sweep.run("M7", "M7_Agent.py", design, out=str(tmp_path / "b.jsonl"), ped_tracks=False, **kwargs)
+    assert cached == direct
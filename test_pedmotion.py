@@ -0,0 +1,105 @@
+# test_pedmotion.py
+# The closed forms against the per-step rules of the original Ped*.py scripts,
+# stepped in exact arithmetic
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from pedmotion import MotionTable, bounce_at, interpolate, seek_at, wrap_at
+
+
+def _exact(*values):
+    return [Fraction(str(value)) for value in values]
+
+
+def bounce_steps(p0, speed, lo, hi, direction, steps):
+    p, speed, lo, hi = _exact(p0, speed, lo, hi)
+    out = [p]
+    for _ in range(steps):
+        p += speed * direction
+        if p > hi:
+            p, direction = hi, -1
+        elif p < lo:
+            p, direction = lo, 1
+        out.append(p)
+    return np.array(out, dtype=float)
+
+
+def wrap_steps(p0, speed, lo, hi, direction, steps):
+    p, speed, lo, hi = _exact(p0, speed, lo, hi)
+    out = [p]
+    for _ in range(steps):
+        p += speed * direction
+        if direction > 0 and p > hi:
+            p = lo
+        elif direction < 0 and p < lo:
+            p = hi
+        out.append(p)
+    return np.array(out, dtype=float)
+
+
+def seek_steps(p0, distance, speed, eps, steps):
+    p, target, speed, eps = _exact(p0, p0 + distance, speed, eps)
+    out = [p]
+    for _ in range(steps):
+        d = target - p
+        if abs(d) > eps:
+            p += min(abs(d), speed) * (1 if d > 0 else -1)
+        out.append(p)
+    return np.array(out, dtype=float)
+
+
+T = np.arange(400)
+
+# Starts inside, on the ends and outside [lo, hi], heading either way
+BOUNCE = [(p0, speed, -1.5, 1.5, direction)
+          for p0 in (-1.7, -1.52, -1.5, -1.49, 0.0, 1.5, 1.53, 2.4)
+          for speed in (0.025, 0.03, 0.07)
+          for direction in (1, -1)]
+
+
+@pytest.mark.parametrize("p0, speed, lo, hi, direction", BOUNCE)
+def test_bounce_matches_steps(p0, speed, lo, hi, direction):
+    expected = bounce_steps(p0, speed, lo, hi, direction, len(T) - 1)
+    np.testing.assert_allclose(bounce_at(p0, speed, lo, hi, direction, T), expected, atol=1e-9)
+
+
+def test_bounce_out_of_range_start_is_clamped_on_first_step():
+    np.testing.assert_allclose(bounce_at(-1.7, 0.025, -1.5, 1.5, 1, np.arange(4)), [-1.7, -1.5, -1.475, -1.45])
+
+
+@pytest.mark.parametrize("p0, speed, lo, hi, direction", [
+    (p0, speed, -4.0, 2.0, direction)
+    for p0 in (-4.5, -4.0, -1.0, 2.0, 2.3)
+    for speed in (0.015, 0.01, 0.05)
+    for direction in (1, -1)])
+def test_wrap_matches_steps(p0, speed, lo, hi, direction):
+    expected = wrap_steps(p0, speed, lo, hi, direction, len(T) - 1)
+    np.testing.assert_allclose(wrap_at(p0, speed, lo, hi, direction, T), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("p0, distance, speed, eps", [
+    (-0.5, 2.0, 0.01, 0.01), (-2.5, 4.0, 0.015, 0.01), (1.0, -0.3, 0.04, 0.0), (0.0, 0.005, 0.01, 0.01)])
+def test_seek_matches_steps(p0, distance, speed, eps):
+    expected = seek_steps(p0, distance, speed, eps, len(T) - 1)
+    np.testing.assert_allclose(seek_at(p0, distance, speed, eps, T), expected, atol=1e-9)
+
+
+def test_interpolate_between_whole_steps():
+    at = interpolate(bounce_at, 2.5, 0.0, 0.1, -1.0, 1.0, 1)
+    assert at == pytest.approx(0.25)
+
+
+def test_motion_table_matches_scalar_forms():
+    # Batched rows with jittered starts, some outside the bounce range
+    specs = [{"kind": "bounce", "axis": 1, "speed": 1.25, "lo": -1.5, "hi": 1.5, "direction": 1},
+             {"kind": "wrap", "axis": 0, "speed": 0.75, "lo": -4.0, "hi": 2.0, "direction": 1}]
+    rng = np.random.default_rng(0)
+    starts = np.array([[-1.0, -1.5], [-4.0, 0.1]]) + rng.uniform(-0.2, 0.2, (16, 2, 2))
+    table = MotionTable(specs, starts)
+    for t in range(1, 200):
+        table.step()
+        for row in range(len(starts)):
+            assert table.pos[row, 0, 1] == pytest.approx(bounce_at(starts[row, 0, 1], 0.025, -1.5, 1.5, 1, t))
+            assert table.pos[row, 1, 0] == pytest.approx(wrap_at(starts[row, 1, 0], 0.015, -4.0, 2.0, 1, t))
@@ -0,0 +1,71 @@
+# test_result_store.py
+import glob
+import os
+import shutil
+
+import result_store
+from result_store import ResultStore, config_key, source_hash
+
+METRICS = {"arrival_step": [10, 12, -1], "min_distance": [0.3, 0.2, 0.1], "path_length": [2.0, 2.1, 1.0],
+           "path_overhead": [0.0, 0.05, 0.0], "collisions": [0, 0, 1]}
+
+
+def test_key_covers_every_module_an_episode_depends_on():
+    names = set()
+    for root in ("M7_Agent", "batch", "sweep"):
+        result_store._local_modules(root, names)
+    assert {"batch", "pedmotion", "units", "tracker", "safety_metrics", "ccd", "rollout", "sweep"} <= names
+
+
+def test_editing_a_dependency_changes_the_key(tmp_path, monkeypatch):
+    for path in glob.glob(os.path.join(result_store.HERE, "*.py")):
+        shutil.copy(path, tmp_path)
+    monkeypatch.setattr(result_store, "HERE", str(tmp_path))
+    before = source_hash("S2_Agent.py")
+    with open(tmp_path / "ccd.py", "a") as f:
+        f.write("# changed\n")
+    assert source_hash("S2_Agent.py") != before
+
+
+def test_key_depends_on_configuration():
+    key = config_key("S2", "S2_Agent.py", {"avoid_radius": 0.2}, 300, 0.1)
+    assert key == config_key("S2", "S2_Agent.py", {"avoid_radius": 0.2}, 300, 0.1)
+    assert key != config_key("S2", "S2_Agent.py", {"avoid_radius": 0.3}, 300, 0.1)
+    assert key != config_key("S2", "S2_Agent.py", {"avoid_radius": 0.2}, 400, 0.1)
+    assert key != config_key("S2", "S2_Agent.py", {"avoid_radius": 0.2}, 300, 0.2)
+    # Spelling out a default is the same configuration
+    assert config_key("S2", "S2_Agent.py", {}, 300, 0.1) == config_key("S2", "S2_Agent.py", {"speed": 0.02}, 300, 0.1)
+
+
+def test_round_trip_and_range_query(tmp_path):
+    store = ResultStore(str(tmp_path / "store.sqlite"))
+    key = store.register("S2", "S2_Agent.py", {"avoid_radius": 0.2}, 300, 0.1)
+    other = store.register("S2", "S2_Agent.py", {"avoid_radius": 0.4}, 300, 0.1)
+    assert store.get(key, 0, 0, 3) is None
+    store.put(key, 0, 0, METRICS, ["a.npy", "b.npy", None])
+    store.put(other, 0, 0, METRICS)
+    assert store.get(key, 0, 0, 3) == METRICS
+    assert store.get(key, 0, 0, 4) is None          # episode 3 never ran
+    assert store.get(key, 1, 0, 3) is None          # other seed
+
+    rows = store.query(agent="S2_Agent.py", avoid_radius=(0.1, 0.3))
+    assert [row["episode"] for row in rows] == [0, 1, 2]
+    assert [row["trajectory"] for row in rows] == ["a.npy", "b.npy", None]
+    assert len(store.query(scenario="S2")) == 6
+    store.close()
+
+
+def test_sweep_reads_cached_chunks_and_stores_trajectories(tmp_path):
+    import sweep
+
+    path = str(tmp_path / "store.sqlite")
+    out = str(tmp_path / "r.jsonl")
+    kwargs = dict(episodes=2, steps=200, out=out, workers=1, quiet=True, store=path)
+    rows = sweep.run("S2", "S2_Agent.py", [{"avoid_radius": 0.2}], trajectory_dir=str(tmp_path / "traj"), **kwargs)
+    store = ResultStore(path)
+    stored = store.query(agent="S2_Agent.py")
+    assert all(os.path.exists(row["trajectory"]) for row in stored)
+    store.close()
+
+    again = sweep.run("S2", "S2_Agent.py", [{"avoid_radius": 0.2}], **dict(kwargs, out=str(tmp_path / "r2.jsonl")))
+    assert again == rows
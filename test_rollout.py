@@ -0,0 +1,88 @@
+# test_rollout.py
+import numpy as np
+
+from rollout import RolloutPlanner
+
+SPEED = 0.02      # m per step
+GOAL = [-2.0, 0.0]
+
+
+def _plan(planner, ped_pos, ped_vel=None, pos=(0.0, 0.0), heading=np.pi):
+    ped_pos = np.asarray(ped_pos, dtype=float).reshape(-1, 2)
+    ped_vel = np.zeros_like(ped_pos) if ped_vel is None else np.asarray(ped_vel, dtype=float)
+    dir_x, dir_y, best = planner.plan(np.asarray(pos), GOAL, ped_pos, ped_vel, heading)
+    return float(dir_x), float(dir_y), int(best)
+
+
+def test_open_floor_heads_for_the_goal():
+    planner = RolloutPlanner(SPEED)
+    dir_x, dir_y, best = _plan(planner, np.zeros((0, 2)))
+    assert planner.mode(best) == "goal"
+    np.testing.assert_allclose([dir_x, dir_y], [-1.0, 0.0], atol=1e-12)
+
+
+def test_stands_still_when_every_move_runs_into_someone():
+    # A ring of standing pedestrians 0.3 m out: any move passes within a body radius of one
+    angles = np.linspace(0.0, 2 * np.pi, 48, endpoint=False)
+    ring = 0.3 * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    planner = RolloutPlanner(SPEED)
+    dir_x, dir_y, best = _plan(planner, ring)
+    assert planner.mode(best) == "stop"
+    assert (dir_x, dir_y) == (0.0, 0.0)
+
+
+def test_clearance_steers_away_from_a_pedestrian():
+    planner = RolloutPlanner(SPEED)
+    # Standing just left of the straight path (goal is -X, so left is -Y)
+    dir_x, dir_y, best = _plan(planner, [[-0.4, -0.05]])
+    assert planner.mode(best) == "dodge"
+    assert dir_x < 0.0 and dir_y > 0.0
+    # The chosen rollout keeps more than a body radius from it
+    t = planner.steps
+    path = np.stack([dir_x * SPEED * t, dir_y * SPEED * t], axis=1)
+    assert np.hypot(path[:, 0] + 0.4, path[:, 1] + 0.05).min() > planner.body_radius
+
+
+def test_unsafe_candidates_only_win_by_distance():
+    # Standing on top of someone: nothing is safe, so the best escape wins
+    planner = RolloutPlanner(SPEED)
+    dir_x, dir_y, best = _plan(planner, [[0.05, 0.0]])
+    assert dir_x < 0.0
+
+
+def test_out_of_reach_pedestrians_are_pruned():
+    planner = RolloutPlanner(SPEED)
+    near = [[-0.4, -0.05]]
+    far = near + [[30.0, 30.0], [-40.0, 5.0]]
+    assert _plan(planner, far) == _plan(planner, near)
+    rel, _ = planner._prune(np.array(far), np.zeros((3, 2)))
+    assert len(rel) == 1
+
+
+def test_cell_cap_keeps_the_nearest_pedestrians():
+    rng = np.random.default_rng(0)
+    peds = rng.uniform(-1.0, 1.0, (40, 2))
+    vel = rng.uniform(-0.01, 0.01, (40, 2))
+    k, h = len(RolloutPlanner(SPEED).speeds), 30
+    capped = RolloutPlanner(SPEED, max_cells=5 * k * h)
+    assert capped.max_peds == 5
+    nearest = np.argsort(np.hypot(peds[:, 0], peds[:, 1]))[:5]
+    expected = _plan(RolloutPlanner(SPEED), peds[nearest], vel[nearest])
+    # Deterministic: the same plan every call, however long the calls take
+    for _ in range(3):
+        assert _plan(capped, peds, vel) == expected
+    assert capped.max_peds == 5
+
+
+def test_batched_rows_match_single_plans():
+    rng = np.random.default_rng(1)
+    pos = rng.uniform(-0.5, 0.5, (6, 2))
+    peds = rng.uniform(-1.5, 1.0, (6, 4, 2))
+    vel = rng.uniform(-0.02, 0.02, (6, 4, 2))
+    heading = rng.uniform(-np.pi, np.pi, 6)
+    planner = RolloutPlanner(SPEED)
+    dir_x, dir_y, best = planner.plan(pos, np.tile(GOAL, (6, 1)), peds, vel, heading)
+    for i in range(6):
+        single = planner.plan(pos[i], GOAL, peds[i], vel[i], heading[i])
+        np.testing.assert_allclose([dir_x[i], dir_y[i]], [single[0], single[1]], atol=1e-12)
+        assert best[i] == single[2]
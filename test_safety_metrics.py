@@ -0,0 +1,37 @@
+# test_safety_metrics.py
+import pytest
+
+from safety_metrics import SafetyMetrics
+from trajectory import MODE_CODES
+
+
+def test_contact_counts_once_per_entry():
+    metrics = SafetyMetrics(2, 1, [0.0, 0.0], [-2.0, 0.0])
+    # Episode 0 touches for two steps, leaves and touches again; episode 1 stays clear
+    for y in (0.1, 0.1, 0.5, 0.1):
+        metrics.update([[0.0, 0.0], [0.0, 0.0]], [[[0.0, y]], [[0.0, 1.0]]])
+    result = metrics.result()
+    assert result["collisions"].tolist() == [2, 0]
+    assert result["contact_steps"].tolist() == [4, 0]
+    assert result["min_distance"] == pytest.approx([0.1, 1.0])
+
+
+def test_path_and_arrival_stop_accumulating():
+    metrics = SafetyMetrics(1, 1, [0.0, 0.0], [-1.0, 0.0], arrive_eps=0.05, dt=0.02)
+    for step, x in enumerate((-0.5, -0.95, -0.95, -0.95), start=1):
+        metrics.update([[x, 0.0]], [[[5.0, 5.0]]], mode=[MODE_CODES["goal"]], arrived=[step >= 2])
+    result = metrics.result()
+    assert result["arrival_step"].tolist() == [2]
+    assert result["time_to_goal"] == pytest.approx([0.04])
+    assert result["path_length"] == pytest.approx([0.95])
+    assert result["path_overhead"] == pytest.approx([0.0])
+    assert result["mode_steps"]["goal"].tolist() == [2]
+
+
+def test_summary():
+    metrics = SafetyMetrics(2, 1, [0.0, 0.0], [-1.0, 0.0])
+    metrics.update([[0.0, 0.0], [0.0, 0.0]], [[[0.0, 0.1]], [[0.0, 1.0]]], arrived=[True, False])
+    summary = metrics.summary()
+    assert summary["collision_rate"] == 0.5
+    assert summary["arrival_rate"] == 0.5
+    assert summary["min_distance"] == pytest.approx(0.1)
@@ -0,0 +1,94 @@
+# test_spacetime.py
+import numpy as np
+import pytest
+
+from spacetime import SpaceTimePlanner
+
+SPEED = 0.02      # m per step
+START = np.array([0.0, 0.0])
+GOAL = np.array([-2.0, 0.0])
+
+
+def _closest(planner, path, ped_pos, ped_vel):
+    # Smallest gap to any pedestrian at every step along a planned path
+    ped_pos, ped_vel = np.asarray(ped_pos, dtype=float), np.asarray(ped_vel, dtype=float)
+    gaps = []
+    for i in range(len(path) - 1):
+        for s, f in enumerate(planner.sub, start=1):
+            p = path[i] + (path[i + 1] - path[i]) * f
+            peds = ped_pos + ped_vel * (i * planner.stride + s)
+            gaps.append(np.hypot(*(peds - p).T).min())
+    return min(gaps)
+
+
+def test_open_floor_goes_straight_to_the_goal():
+    planner = SpaceTimePlanner(SPEED)
+    path = planner.search(START, GOAL, np.zeros((0, 2)), np.zeros((0, 2)))
+    np.testing.assert_allclose(path[-1], GOAL, atol=planner.goal_eps)
+    np.testing.assert_allclose(path[:, 1], 0.0, atol=1e-12)
+    assert len(path) - 1 == int(np.ceil(2.0 / planner.step_len))
+
+
+@pytest.mark.parametrize("ped_pos, ped_vel", [
+    ([[-1.0, 0.0]], [[0.0, 0.0]]),                       # standing in the way
+    ([[-1.0, -1.0]], [[0.0, 0.02]]),                     # crossing the path
+    ([[-3.0, 0.0], [-1.0, 0.6]], [[0.02, 0.0], [0.0, -0.01]])])
+def test_blocked_moves_keep_clearance(ped_pos, ped_vel):
+    planner = SpaceTimePlanner(SPEED)
+    path = planner.search(START, GOAL, ped_pos, ped_vel)
+    assert np.hypot(*(path[-1] - GOAL)) <= planner.goal_eps
+    assert _closest(planner, path, ped_pos, ped_vel) >= planner.clearance
+
+
+def test_near_misses_cost_extra():
+    # A pedestrian 0.4 m off the straight line: allowed (clearance 0.3) but
+    # inside soft_clearance; weighted enough, passing it costs more than a detour
+    ped_pos, ped_vel = [[-1.0, 0.4]], [[0.0, 0.0]]
+    free = SpaceTimePlanner(SPEED, proximity_weight=0.0)
+    careful = SpaceTimePlanner(SPEED, proximity_weight=10.0)
+    loose = _closest(free, free.search(START, GOAL, ped_pos, ped_vel), ped_pos, ped_vel)
+    wide = _closest(careful, careful.search(START, GOAL, ped_pos, ped_vel), ped_pos, ped_vel)
+    assert loose == pytest.approx(0.4)
+    assert wide > loose
+
+
+def test_expansion_cap_keeps_the_closest_partial_path():
+    ped_pos, ped_vel = [[-1.0, 0.0]], [[0.0, 0.0]]
+    planner = SpaceTimePlanner(SPEED, max_expansions=5)
+    path = planner.search(START, GOAL, ped_pos, ped_vel)
+    assert planner.expansions == 5
+    assert 1 < len(path) <= 6
+    assert np.hypot(*(path[-1] - GOAL)) < 2.0
+    np.testing.assert_array_equal(SpaceTimePlanner(SPEED, max_expansions=5).search(START, GOAL, ped_pos, ped_vel),
+                                  path)
+
+
+def _follow(planner, ped_start, ped_vel, steps, drift=None):
+    # Follow the plan step by step with the pedestrian walking as predicted,
+    # pushed by `drift` (step, offset) once; -> replanned flags
+    pos = START.copy()
+    ped = np.array(ped_start, dtype=float)
+    flags = []
+    for step in range(steps):
+        if drift is not None and step == drift[0]:
+            ped = ped + drift[1]
+        dir_x, dir_y, replanned = planner.follow(pos, GOAL, ped, ped_vel, step)
+        flags.append(replanned)
+        pos = pos + np.array([dir_x, dir_y]) * SPEED
+        ped = ped + np.asarray(ped_vel)
+    return flags
+
+
+def test_plan_is_reused_while_pedestrians_follow_the_prediction():
+    planner = SpaceTimePlanner(SPEED)
+    flags = _follow(planner, [[-1.0, -1.0]], [[0.0, 0.02]], 40)
+    assert flags[0] and not any(flags[1:])
+    assert planner.searches == 1
+
+
+@pytest.mark.parametrize("offset, replans", [((0.0, 0.05), False), ((0.0, 0.15), True), ((-0.12, 0.0), True)])
+def test_replans_when_a_pedestrian_strays_beyond_tolerance(offset, replans):
+    planner = SpaceTimePlanner(SPEED)
+    flags = _follow(planner, [[-1.0, -1.0]], [[0.0, 0.02]], 40, drift=(20, np.array(offset)))
+    assert flags[20] == replans
+    assert planner.searches == 1 + replans
@@ -0,0 +1,81 @@
+# test_spatial_index.py
+import numpy as np
+import pytest
+
+from spatial_index import UniformGrid, neighbour_pairs
+
+
+def _brute(queries, points, radius):
+    d = np.hypot(queries[:, None, 0] - points[None, :, 0], queries[:, None, 1] - points[None, :, 1])
+    q, j = np.nonzero(d < radius)
+    return set(zip(q.tolist(), j.tolist())), d
+
+
+def _found(q, j):
+    found = list(zip(q.tolist(), j.tolist()))
+    assert len(found) == len(set(found))      # no pair twice
+    return set(found)
+
+
+@pytest.mark.parametrize("cell, radius", [(0.6, 0.6), (0.6, 0.35), (0.25, 0.6)])
+def test_pairs_match_brute_force(cell, radius):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-3.0, 3.0, (800, 2))
+    queries = rng.uniform(-3.5, 3.5, (300, 2))
+    grid = UniformGrid(cell)
+    grid.rebuild(points)
+    q, j, d = grid.pairs(queries, radius)
+    expected, dist = _brute(queries, points, radius)
+    assert _found(q, j) == expected
+    np.testing.assert_allclose(d, dist[q, j])
+
+
+def test_query_matches_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-2.0, 2.0, (500, 2))
+    grid = UniformGrid(0.4)
+    grid.rebuild(points)
+    for point in rng.uniform(-2.0, 2.0, (50, 2)):
+        idx, d = grid.query(point, 0.4)
+        expected = np.flatnonzero(np.hypot(*(points - point).T) < 0.4)
+        assert sorted(idx.tolist()) == expected.tolist()
+        np.testing.assert_allclose(d, np.hypot(*(points[idx] - point).T))
+
+
+def test_moves_keep_the_index_exact():
+    rng = np.random.default_rng(2)
+    points = rng.uniform(-2.0, 2.0, (400, 2))
+    grid = UniformGrid(0.5)
+    grid.rebuild(points)
+    queries = rng.uniform(-2.0, 2.0, (100, 2))
+    for _ in range(20):
+        points = points + rng.normal(0.0, 0.05, points.shape)
+        grid.move(points)
+        assert _found(*grid.pairs(queries, 0.5)[:2]) == _brute(queries, points, 0.5)[0]
+    # Some points only, by index
+    ids = np.array([3, 17, 250])
+    points[ids] = [[10.0, 10.0], [0.0, 0.0], [-1.9, 1.9]]
+    grid.move(points[ids], ids)
+    assert _found(*grid.pairs(queries, 0.5)[:2]) == _brute(queries, points, 0.5)[0]
+    # A different number of points rebuilds
+    grid.move(points[:100])
+    assert len(grid) == 100
+    assert _found(*grid.pairs(queries, 0.5)[:2]) == _brute(queries, points[:100], 0.5)[0]
+
+
+def test_neighbour_pairs_match_brute_force():
+    rng = np.random.default_rng(3)
+    points = rng.uniform(-5.0, 5.0, (1000, 2))
+    i, j, d = neighbour_pairs(points, 0.3)
+    expected, dist = _brute(points, points, 0.3)
+    assert _found(i, j) == {(a, b) for a, b in expected if a != b}
+    np.testing.assert_allclose(d, dist[i, j])
+
+
+def test_empty_grid():
+    grid = UniformGrid(0.5)
+    grid.rebuild(np.zeros((0, 2)))
+    idx, d = grid.query([0.0, 0.0], 0.5)
+    assert len(idx) == len(d) == 0
+    with pytest.raises(ValueError):
+        UniformGrid(0.0)
@@ -0,0 +1,90 @@
+# test_static_field.py
+import numpy as np
+import pytest
+
+from static_field import StaticField
+
+REACH = 0.4
+
+
+@pytest.fixture
+def field():
+    rng = np.random.default_rng(0)
+    return StaticField(rng.uniform(-1.0, 1.0, (12, 2)), REACH)
+
+
+def _exact(field, pos):
+    d = np.hypot(field.points[:, 0] - pos[0], field.points[:, 1] - pos[1])
+    d[~field.active] = np.inf
+    return int(d.argmin()), float(d.min())
+
+
+def test_nearest_matches_hypot_inside_reach(field):
+    rng = np.random.default_rng(1)
+    inside = 0
+    for pos in rng.uniform(-1.6, 1.6, (2000, 2)):
+        k, d = field.nearest(pos)
+        best, best_d = _exact(field, pos)
+        if best_d < REACH:
+            inside += 1
+            assert (k, d) == (best, pytest.approx(best_d, abs=1e-12))
+        elif k >= 0:
+            # Near the edge of reach it may still report the (exact) nearest
+            assert (k, d) == (best, pytest.approx(best_d, abs=1e-12))
+    assert inside > 100
+
+
+def test_sample_is_bilinear_over_the_nodes(field):
+    rng = np.random.default_rng(2)
+    pos = rng.uniform(-1.2, 1.2, (500, 2))
+    u = (pos - field.origin) / field.h
+    i, j = np.floor(u).astype(int).T
+    fx, fy = (u - np.floor(u)).T
+    d = field.dist
+    expected = ((1 - fx) * (1 - fy) * d[i, j] + fx * (1 - fy) * d[i + 1, j]
+                + (1 - fx) * fy * d[i, j + 1] + fx * fy * d[i + 1, j + 1])
+    np.testing.assert_allclose(field.sample(pos), expected, atol=1e-12)
+    # Nodes hold the exact distance, capped at limit
+    node = field.origin + np.array([40, 55]) * field.h
+    assert field.sample(node) == pytest.approx(min(_exact(field, node)[1], field.limit))
+    assert field.sample([50.0, 50.0]) == field.limit
+
+
+def test_gradient_is_the_derivative_of_sample(field):
+    rng = np.random.default_rng(3)
+    eps = 1e-7
+    for pos in rng.uniform(-1.2, 1.2, (200, 2)):
+        u = (pos - field.origin) / field.h
+        if (np.abs(u - np.round(u)) < 1e-4).any():
+            continue    # kink on a cell edge
+        dx = (field.sample(pos + [eps, 0.0]) - field.sample(pos - [eps, 0.0])) / (2 * eps)
+        dy = (field.sample(pos + [0.0, eps]) - field.sample(pos - [0.0, eps])) / (2 * eps)
+        np.testing.assert_allclose(field.gradient(pos), [dx, dy], atol=1e-5)
+
+
+def test_watch_drops_a_moved_obstacle_and_redoes_only_its_cells(field):
+    before_dist, before_owner = field.dist.copy(), field.owner.copy()
+    before = field.rasterised
+    observed = field.points.copy()
+    assert field.watch(observed).tolist() == []
+    assert field.rasterised == before
+
+    observed[5] += [0.1, 0.0]
+    assert field.watch(observed).tolist() == [5]
+    assert not field.active[5]
+    x0, x1, y0, y1 = field._window(field.points[5])
+    assert field.rasterised - before == (x1 - x0) * (y1 - y0)
+    # Outside its window nothing changed; the whole field is what a rebuild gives
+    outside = np.ones(field.shape, dtype=bool)
+    outside[x0:x1, y0:y1] = False
+    np.testing.assert_array_equal(field.dist[outside], before_dist[outside])
+    np.testing.assert_array_equal(field.owner[outside], before_owner[outside])
+    rebuilt = StaticField(field.points, REACH)
+    rebuilt.active[5] = False
+    rebuilt._rasterise(0, rebuilt.shape[0], 0, rebuilt.shape[1])
+    np.testing.assert_allclose(field.dist, rebuilt.dist)
+    assert (field.owner != 5).all()
+
+    # Once dropped it is not reported again, nor found by nearest()
+    assert field.watch(observed).tolist() == []
+    assert field.nearest(field.points[5])[0] != 5
@@ -0,0 +1,40 @@
+# test_sweep.py
+import json
+
+import sweep
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_rerun_only_resumes_the_same_configuration(tmp_path):
+    out = str(tmp_path / "r.jsonl")
+    kwargs = dict(episodes=4, chunk=2, out=out, workers=1, quiet=True, store=None)
+    rows = sweep.run("S2", "S2_Agent.py", [{"avoid_radius": 0.2}], steps=200, **kwargs)
+    assert len(_lines(out)) == 2
+    assert all(chunk["seed"] == 0 and chunk["key"] for chunk in _lines(out))
+
+    # Same configuration: nothing left to run
+    assert sweep.run("S2", "S2_Agent.py", [{"avoid_radius": 0.2}], steps=200, **kwargs) == rows
+    assert len(_lines(out)) == 2
+
+    # Same point and episodes but other steps, seed or scenario: run again,
+    # and the summary only counts this configuration's episodes
+    for changed in ({"steps": 100}, {"steps": 200, "seed": 1}):
+        (row,) = sweep.run("S2", "S2_Agent.py", [{"avoid_radius": 0.2}], **changed, **kwargs)
+        assert row["episodes"] == 4
+    (row,) = sweep.run("S3", "S3_Agent.py", [{"avoid_radius": 0.2}], steps=200, **kwargs)
+    assert row["episodes"] == 4
+    assert len(_lines(out)) == 8
+
+
+def test_rechunked_sweep_reruns_mismatched_chunks(tmp_path):
+    out = str(tmp_path / "r.jsonl")
+    kwargs = dict(episodes=4, steps=150, out=out, workers=1, quiet=True, store=None)
+    sweep.run("S2", "S2_Agent.py", [{}], chunk=4, **kwargs)
+    (row,) = sweep.run("S2", "S2_Agent.py", [{}], chunk=2, **kwargs)
+    # The 4-episode chunk does not stand in for the 2-episode ones, nor is it counted
+    assert len(_lines(out)) == 3
+    assert row["episodes"] == 4
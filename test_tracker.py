@@ -0,0 +1,68 @@
+# test_tracker.py
+import numpy as np
+import pytest
+
+from tracker import Tracker
+
+
+def test_converges_to_constant_velocity():
+    vel = np.array([[0.75, -0.5], [0.0, 1.25], [-1.5, 0.0]])
+    tracker = Tracker((3,), dt=0.02)
+    for t in range(200):
+        tracker.update(np.array([[1.0, 2.0]]) + vel * t * 0.02)
+    np.testing.assert_allclose(tracker.vel, vel, atol=1e-6)
+    assert tracker.ready.all()
+
+
+def test_unit_gains_are_the_finite_difference():
+    rng = np.random.default_rng(0)
+    path = np.cumsum(rng.normal(0.0, 0.05, (50, 2, 2)), axis=0)
+    tracker = Tracker((2,), dt=0.02, gains=(1.0, 1.0))
+    tracker.update(path[0])
+    np.testing.assert_array_equal(tracker.vel, 0.0)
+    for prev, now in zip(path[:-1], path[1:]):
+        tracker.update(now)
+        np.testing.assert_allclose(tracker.pos, now, atol=1e-12)
+        np.testing.assert_allclose(tracker.vel, (now - prev) / 0.02, atol=1e-9)
+
+
+def test_update_dt_overrides_the_step():
+    tracker = Tracker((1,), dt=0.02, gains=(1.0, 1.0))
+    tracker.update([[0.0, 0.0]])
+    tracker.update([[0.3, -0.1]], dt=0.1)
+    np.testing.assert_allclose(tracker.vel, [[3.0, -1.0]])
+
+
+def test_mask_leaves_rows_untouched():
+    tracker = Tracker((2,), dt=0.02, gains=(1.0, 1.0))
+    tracker.update([[0.0, 0.0], [1.0, 1.0]])
+    tracker.update([[0.02, 0.0], [5.0, 5.0]], mask=[True, False])
+    np.testing.assert_allclose(tracker.pos[1], [1.0, 1.0])
+    assert tracker.count.tolist() == [2, 1]
+
+
+def test_predict_seconds_ahead():
+    tracker = Tracker((2,), dt=0.02, gains=(1.0, 1.0))
+    tracker.update([[0.0, 0.0], [1.0, 0.0]])
+    tracker.update([[0.02, 0.0], [1.0, -0.01]])
+    np.testing.assert_allclose(tracker.predict(0.5), [[0.52, 0.0], [1.0, -0.26]])
+    ahead = tracker.predict(np.array([0.0, 1.0, 2.0]))
+    assert ahead.shape == (3, 2, 2)
+    np.testing.assert_allclose(ahead[:, 0, 0], [0.02, 1.02, 2.02])
+
+
+def test_history_is_a_bounded_ring():
+    tracker = Tracker((1,), dt=0.02, gains=(1.0, 1.0), history=3)
+    assert len(tracker.trail()) == 0
+    for x in range(5):
+        tracker.update([[float(x), 0.0]])
+    assert tracker.history.shape == (3, 1, 2)
+    np.testing.assert_allclose(tracker.trail()[:, 0, 0], [2.0, 3.0, 4.0])
+
+
+@pytest.mark.parametrize("shape", [(4,), (3, 5)])
+def test_any_leading_shape(shape):
+    tracker = Tracker(shape, dt=0.02, gains=(1.0, 1.0))
+    tracker.update(np.zeros(shape + (2,)))
+    tracker.update(np.full(shape + (2,), 0.01))
+    np.testing.assert_allclose(tracker.vel, 0.5)
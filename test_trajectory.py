@@ -0,0 +1,44 @@
+# test_trajectory.py
+import numpy as np
+
+import cosim
+import trajectory
+from trajectory import TrajectoryRecorder
+
+
+def _log(recorder, steps):
+    for i in range(steps):
+        recorder.log([i * 0.1, 0.0, 0.0], 3.14, [[1.0, 2.0]], -1.0, 0.0, "goal")
+
+
+def test_prefixes_do_not_share_shards(tmp_path):
+    other = TrajectoryRecorder(str(tmp_path), 1, shard_steps=4, prefix="M6_Agent_M5upgrade")
+    _log(other, 6)
+    other.close()
+    mine = TrajectoryRecorder(str(tmp_path), 1, shard_steps=4, prefix="M6_Agent")
+    _log(mine, 3)
+    mine.close()
+    assert [len(shard) for shard in trajectory.load(str(tmp_path), "M6_Agent_M5upgrade")] == [4, 2]
+    assert [len(shard) for shard in trajectory.load(str(tmp_path), "M6_Agent")] == [3]
+
+
+def test_close_trims_the_last_shard(tmp_path):
+    recorder = TrajectoryRecorder(str(tmp_path), 1, prefix="traj")
+    _log(recorder, 5)
+    recorder.close()
+    recorder.close()
+    (shard,) = trajectory.load(str(tmp_path))
+    np.testing.assert_array_equal(shard["step"], [1, 2, 3, 4, 5])
+    np.testing.assert_allclose(shard["x"], np.arange(5) * 0.1, rtol=1e-6)
+
+
+def test_agents_close_their_log_when_the_run_ends(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRAJECTORY_DIR", str(tmp_path))
+    monkeypatch.setenv("CRUISE", "0")
+    monkeypatch.setenv("DETECTION_LOG", "off")
+    world = cosim.run_scenario("S2", 300)
+    (shard,) = trajectory.load(str(tmp_path), "S2_Agent")
+    # Read in the same process: trimmed to the steps the agent ran, ending on arrival
+    assert 0 < len(shard) <= world.steps
+    assert shard["mode"][-1] == trajectory.MODE_CODES["arrived"]
+    assert shard["step"][-1] == len(shard)
@@ -0,0 +1,109 @@
+# tracker.py
+# Constant-velocity Kalman filter for every tracked pedestrian at once.
+# State lives in arrays of any leading shape (k pedestrians, or n episodes x k
+# in batch.py); one update() call filters all of them. Positions are in m,
+# velocities in m/s, and the same 2x2 (position, velocity) covariance applies
+# to X and Y. Memory is fixed at construction, including the optional ring of
+# the last `history` filtered positions.
+#   tracker = Tracker((3,), dt=0.02)
+#   tracker.update(positions)            # (3, 2)
+#   ahead = tracker.predict(0.5)         # where they will be in 0.5 s
+import numpy as np
+
+
+class Tracker:
+    def __init__(self, shape, dt, accel_std=5.0, meas_std=0.002, vel_std=2.0, gains=None, history=0):
+        # gains=(alpha, beta) fixes the gains instead of using the Kalman ones;
+        # (1, 1) gives the one-step finite difference (p - prev_p) / dt
+        self.shape = tuple(shape)
+        self.dt = float(dt)
+        self.q = accel_std ** 2
+        self.r = meas_std ** 2
+        self.v0 = vel_std ** 2
+        self.gains = gains
+
+        self.pos = np.zeros(self.shape + (2,))
+        self.vel = np.zeros(self.shape + (2,))
+        self.cov = np.zeros(self.shape + (3,))     # P00, P01, P11
+        self.count = np.zeros(self.shape, dtype=np.int64)
+
+        self.history = np.zeros((history,) + self.shape + (2,))
+        self.head = 0
+
+    def reset(self):
+        self.count[...] = 0
+        self.vel[...] = 0.0
+        self.head = 0
+
+    @property
+    def ready(self):
+        # At least two measurements, so the velocity is an estimate
+        return self.count > 1
+
+    def update(self, z, mask=None, dt=None):
+        # z: (*shape, 2) measured positions. Rows where mask is False are left
+        # untouched; dt overrides the step for decisions run at a lower rate.
+        z = np.asarray(z, dtype=float)
+        dt = self.dt if dt is None else float(dt)
+        take = np.ones(self.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        new = take & (self.count == 0)
+        old = take & ~new
+
+        # Predict
+        pos = self.pos + self.vel * dt
+        p00, p01, p11 = self.cov[..., 0], self.cov[..., 1], self.cov[..., 2]
+        q = self.q
+        p00 = p00 + 2 * dt * p01 + dt * dt * p11 + q * dt ** 4 / 4
+        p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        p11 = p11 + q * dt * dt
+
+        # Correct
+        if self.gains is None:
+            s = p00 + self.r
+            k0, k1 = p00 / s, p01 / s
+        else:
+            k0 = np.full(self.shape, float(self.gains[0]))
+            k1 = np.full(self.shape, float(self.gains[1]) / dt)
+        innov = z - pos
+        pos = pos + k0[..., None] * innov
+        vel = self.vel + k1[..., None] * innov
+        # Joseph form, valid for the fixed gains too
+        a = 1.0 - k0
+        c00 = a * a * p00 + k0 * k0 * self.r
+        c01 = a * (p01 - k1 * p00) + k0 * k1 * self.r
+        c11 = p11 - 2 * k1 * p01 + k1 * k1 * (p00 + self.r)
+
+        o = old[..., None]
+        self.pos = np.where(o, pos, self.pos)
+        self.vel = np.where(o, vel, self.vel)
+        self.cov = np.where(o, np.stack([c00, c01, c11], axis=-1), self.cov)
+
+        # First sighting: at the measurement, velocity unknown
+        n = new[..., None]
+        self.pos = np.where(n, z, self.pos)
+        self.vel = np.where(n, 0.0, self.vel)
+        self.cov = np.where(n, np.array([self.r, 0.0, self.v0]), self.cov)
+        self.count = self.count + take
+
+        if len(self.history):
+            self.history[self.head % len(self.history)] = self.pos
+            self.head += 1
+        return self.pos, self.vel
+
+    def predict(self, ahead):
+        # Positions ahead seconds from the last update; ahead may be an array of times
+        ahead = np.asarray(ahead, dtype=float)
+        return self.pos + self.vel * ahead.reshape(ahead.shape + (1,) * (len(self.shape) + 1))
+
+    def position_std(self, ahead=0.0):
+        # Standard deviation of the predicted position on each axis
+        p00, p01, p11 = self.cov[..., 0], self.cov[..., 1], self.cov[..., 2]
+        return np.sqrt(p00 + 2 * ahead * p01 + ahead * ahead * p11)
+
+    def trail(self):
+        # Last filtered positions, oldest first, (<= history, *shape, 2)
+        h = len(self.history)
+        if self.head < h:
+            return self.history[:self.head]
+        i = self.head % h
+        return np.concatenate([self.history[i:], self.history[:i]])
@@ -0,0 +1,99 @@
+# trajectory.py
+# Per-step trajectory log for the agent controllers. Each step's agent pose,
+# pedestrian positions, chosen direction and avoidance mode go into float32
+# structured rows inside memory-mapped .npy shards of fixed length, so RAM
+# stays bounded by one shard however long the run is.
+# Enabled per run with TRAJECTORY_DIR=<dir>; read back with trajectory.load(dir).
+import atexit
+import glob
+import os
+
+import numpy as np
+
+MODES = ("goal", "arrived", "dodge", "dodge_static", "dodge_flow", "overtake", "stop", "focus", "flee")
+MODE_CODES = {name: code for code, name in enumerate(MODES)}
+
+SHARD_INDEX = "[0-9]" * 5   # glob for the shard number only, so M6_Agent never matches M6_Agent_M5upgrade
+
+
+def row_dtype(n_peds):
+    return np.dtype([("step", "<u4"), ("x", "<f4"), ("y", "<f4"), ("yaw", "<f4"),
+                     ("peds", "<f4", (n_peds, 2)), ("dir_x", "<f4"), ("dir_y", "<f4"), ("mode", "u1")])
+
+
+class TrajectoryRecorder:
+    def __init__(self, out_dir, n_peds, shard_steps=65536, prefix="traj"):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.dtype = row_dtype(n_peds)
+        self.shard_steps = shard_steps
+        self.shard = None
+        self.shard_index = -1
+        self.count = 0
+        self.step = 0
+        os.makedirs(out_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(out_dir, f"{prefix}_{SHARD_INDEX}.npy")):
+            os.remove(old)
+        # Controllers close() when their loop ends; this only covers runs cut short
+        atexit.register(self.close)
+
+    @classmethod
+    def for_controller(cls, name, n_peds, **kwargs):
+        # None unless TRAJECTORY_DIR is set, so controllers pay nothing by default
+        out_dir = os.environ.get("TRAJECTORY_DIR")
+        if not out_dir:
+            return None
+        return cls(out_dir, n_peds, prefix=name, **kwargs)
+
+    def _path(self, index):
+        return os.path.join(self.out_dir, f"{self.prefix}_{index:05d}.npy")
+
+    @property
+    def paths(self):
+        # Shards written so far, in order
+        return [self._path(index) for index in range(self.shard_index + 1)]
+
+    def _next_shard(self):
+        self._close_shard()
+        self.shard_index += 1
+        self.shard = np.lib.format.open_memmap(self._path(self.shard_index), mode="w+",
+                                               dtype=self.dtype, shape=(self.shard_steps,))
+        self.count = 0
+
+    def _close_shard(self):
+        if self.shard is None:
+            return
+        self.shard.flush()
+        if self.count < self.shard_steps:
+            # Trim the last shard to the rows actually written
+            path = self._path(self.shard_index)
+            rows = np.array(self.shard[:self.count])
+            del self.shard
+            np.save(path, rows)
+        self.shard = None
+
+    def log(self, pos, yaw, peds, dir_x, dir_y, mode):
+        if self.shard is None or self.count == self.shard_steps:
+            self._next_shard()
+        self.step += 1
+        row = self.shard[self.count]
+        row["step"] = self.step
+        row["x"], row["y"], row["yaw"] = pos[0], pos[1], yaw
+        row["peds"] = [p[:2] for p in peds]
+        row["dir_x"], row["dir_y"] = dir_x, dir_y
+        row["mode"] = MODE_CODES[mode]
+        self.count += 1
+
+    def skip(self, steps):
+        # Steps the agent slept through (cruise.py) get no rows; the step column shows the gap
+        self.step += steps
+
+    def close(self):
+        self._close_shard()
+        atexit.unregister(self.close)
+
+
+def load(out_dir, prefix="traj"):
+    # Shards of one run as read-only memory maps, in order
+    paths = sorted(glob.glob(os.path.join(out_dir, f"{prefix}_{SHARD_INDEX}.npy")))
+    return [np.load(path, mmap_mode="r") for path in paths]
@@ -0,0 +1,40 @@
+# units.py
+# Speeds and durations are written in SI units (m/s, s) and turned into per-step
+# values from the world's basicTimeStep, so a world runs the same at any step.
+# The S*/M* behaviour was tuned at REFERENCE_STEP_MS: at that step the
+# conversions give back the original per-step constants exactly. At coarser
+# steps an agent splits each step into substeps() of at most the reference
+# step and runs its rules once per substep, against pedestrian positions
+# interpolated across the step, so collision checks never skip ahead.
+import math
+
+REFERENCE_STEP_MS = 20
+
+AGENT_SPEED = 1.0    # m/s (0.02 m per 20 ms step)
+
+
+def per_step(rate, step_ms):
+    # m/s -> m per step of step_ms
+    return rate * step_ms / 1000.0
+
+
+def steps(seconds, step_ms):
+    # Duration -> whole number of steps (at least one)
+    return max(1, round(seconds * 1000.0 / step_ms))
+
+
+def substeps(step_ms):
+    # Number of substeps that keeps each one no longer than the reference step
+    return max(1, math.ceil(step_ms / REFERENCE_STEP_MS - 1e-9))
+
+
+def reference_steps(t, step_ms):
+    # Step count t of a step_ms world -> elapsed reference steps (may be fractional)
+    return t * step_ms / REFERENCE_STEP_MS
+
+
+def between(last, now, k, n):
+    # A position read this step and last, k substeps of n into the step
+    if k == n or last is None:
+        return now
+    return [a + (b - a) * k / n for a, b in zip(last, now)]